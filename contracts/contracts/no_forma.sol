@@ -43,6 +43,16 @@ contract SimplifiedNoForma {
     uint256[] public customerIds;
     uint256[] public projectIds;
     
+    // Position of each ID in its array, so deletes don't have to search for it
+    mapping(uint256 => uint256) private knowledgeBaseIndex;
+    mapping(uint256 => uint256) private customerIndex;
+    mapping(uint256 => uint256) private projectIndex;
+    
+    // Last issued IDs, so entries created in the same block get distinct IDs
+    uint256 private lastKnowledgeBaseId;
+    uint256 private lastCustomerId;
+    uint256 private lastProjectId;
+    
     // Events
     event KnowledgeBaseCreated(uint256 indexed id, string title, string group);
     event KnowledgeBaseUpdated(uint256 indexed id, string title, string group);
@@ -72,6 +82,46 @@ contract SimplifiedNoForma {
         _;
     }
     
+    // Internal helpers
+    
+    /**
+     * @dev Next ID: the block timestamp, bumped past the last issued ID if needed
+     */
+    function _nextId(uint256 _lastId) internal view returns (uint256) {
+        return block.timestamp > _lastId ? block.timestamp : _lastId + 1;
+    }
+    
+    /**
+     * @dev Append an ID to its array and record its position
+     */
+    function _addId(uint256[] storage _ids, mapping(uint256 => uint256) storage _index, uint256 _id) internal {
+        _index[_id] = _ids.length;
+        _ids.push(_id);
+    }
+    
+    /**
+     * @dev Remove an ID by moving the last ID into its place
+     */
+    function _removeId(uint256[] storage _ids, mapping(uint256 => uint256) storage _index, uint256 _id) internal {
+        uint256 position = _index[_id];
+        uint256 lastId = _ids[_ids.length - 1];
+        _ids[position] = lastId;
+        _index[lastId] = position;
+        _ids.pop();
+        delete _index[_id];
+    }
+    
+    /**
+     * @dev Number of items in the page starting at _offset, at most _limit
+     */
+    function _pageLength(uint256 _total, uint256 _offset, uint256 _limit) internal pure returns (uint256) {
+        if (_offset >= _total) {
+            return 0;
+        }
+        uint256 remaining = _total - _offset;
+        return remaining < _limit ? remaining : _limit;
+    }
+    
     // Knowledge Base CRUD Operations
     
     /**
@@ -82,10 +132,39 @@ contract SimplifiedNoForma {
         string memory _group,
         string memory _content
     ) external returns (uint256) {
+        return _createKnowledgeBase(_title, _group, _content);
+    }
+    
+    /**
+     * @dev Create several knowledge base entries in one transaction
+     */
+    function createKnowledgeBaseBatch(
+        string[] memory _titles,
+        string[] memory _groups,
+        string[] memory _contents
+    ) external returns (uint256[] memory ids) {
+        require(
+            _titles.length == _groups.length && _titles.length == _contents.length,
+            "Array lengths must match"
+        );
+        
+        ids = new uint256[](_titles.length);
+        for (uint256 i = 0; i < _titles.length; i++) {
+            ids[i] = _createKnowledgeBase(_titles[i], _groups[i], _contents[i]);
+        }
+        return ids;
+    }
+    
+    function _createKnowledgeBase(
+        string memory _title,
+        string memory _group,
+        string memory _content
+    ) internal returns (uint256) {
         require(bytes(_title).length > 0, "Title cannot be empty");
         require(bytes(_content).length > 0, "Content cannot be empty");
         
-        uint256 id = block.timestamp;
+        uint256 id = _nextId(lastKnowledgeBaseId);
+        lastKnowledgeBaseId = id;
         
         knowledgeBase[id] = KnowledgeBase({
             id: id,
@@ -95,7 +174,7 @@ contract SimplifiedNoForma {
             exists: true
         });
         
-        knowledgeBaseIds.push(id);
+        _addId(knowledgeBaseIds, knowledgeBaseIndex, id);
         
         emit KnowledgeBaseCreated(id, _title, _group);
         return id;
@@ -109,7 +188,35 @@ contract SimplifiedNoForma {
         string memory _title,
         string memory _group,
         string memory _content
-    ) external knowledgeBaseExists(_id) {
+    ) external {
+        _updateKnowledgeBase(_id, _title, _group, _content);
+    }
+    
+    /**
+     * @dev Update several knowledge base entries in one transaction
+     */
+    function updateKnowledgeBaseBatch(
+        uint256[] memory _ids,
+        string[] memory _titles,
+        string[] memory _groups,
+        string[] memory _contents
+    ) external {
+        require(
+            _ids.length == _titles.length && _ids.length == _groups.length && _ids.length == _contents.length,
+            "Array lengths must match"
+        );
+        
+        for (uint256 i = 0; i < _ids.length; i++) {
+            _updateKnowledgeBase(_ids[i], _titles[i], _groups[i], _contents[i]);
+        }
+    }
+    
+    function _updateKnowledgeBase(
+        uint256 _id,
+        string memory _title,
+        string memory _group,
+        string memory _content
+    ) internal knowledgeBaseExists(_id) {
         require(bytes(_title).length > 0, "Title cannot be empty");
         require(bytes(_content).length > 0, "Content cannot be empty");
         
@@ -126,14 +233,7 @@ contract SimplifiedNoForma {
     function deleteKnowledgeBase(uint256 _id) external knowledgeBaseExists(_id) {
         knowledgeBase[_id].exists = false;
         
-        // Remove from array
-        for (uint256 i = 0; i < knowledgeBaseIds.length; i++) {
-            if (knowledgeBaseIds[i] == _id) {
-                knowledgeBaseIds[i] = knowledgeBaseIds[knowledgeBaseIds.length - 1];
-                knowledgeBaseIds.pop();
-                break;
-            }
-        }
+        _removeId(knowledgeBaseIds, knowledgeBaseIndex, _id);
         
         emit KnowledgeBaseDeleted(_id);
     }
@@ -185,6 +285,34 @@ contract SimplifiedNoForma {
         return (ids, titles, groups, contents);
     }
     
+    /**
+     * @dev Get one page of knowledge base entries, in the order of getAllKnowledgeBase
+     */
+    function getKnowledgeBasePage(uint256 _offset, uint256 _limit) external view returns (
+        uint256[] memory ids,
+        string[] memory titles,
+        string[] memory groups,
+        string[] memory contents,
+        uint256 total
+    ) {
+        total = knowledgeBaseIds.length;
+        uint256 length = _pageLength(total, _offset, _limit);
+        ids = new uint256[](length);
+        titles = new string[](length);
+        groups = new string[](length);
+        contents = new string[](length);
+        
+        for (uint256 i = 0; i < length; i++) {
+            KnowledgeBase storage kb = knowledgeBase[knowledgeBaseIds[_offset + i]];
+            ids[i] = kb.id;
+            titles[i] = kb.title;
+            groups[i] = kb.group;
+            contents[i] = kb.content;
+        }
+        
+        return (ids, titles, groups, contents, total);
+    }
+    
     // Customer CRUD Operations
     
     /**
@@ -195,10 +323,39 @@ contract SimplifiedNoForma {
         string memory _email,
         string memory _phone
     ) external returns (uint256) {
+        return _createCustomer(_name, _email, _phone);
+    }
+    
+    /**
+     * @dev Create several customers in one transaction
+     */
+    function createCustomerBatch(
+        string[] memory _names,
+        string[] memory _emails,
+        string[] memory _phones
+    ) external returns (uint256[] memory ids) {
+        require(
+            _names.length == _emails.length && _names.length == _phones.length,
+            "Array lengths must match"
+        );
+        
+        ids = new uint256[](_names.length);
+        for (uint256 i = 0; i < _names.length; i++) {
+            ids[i] = _createCustomer(_names[i], _emails[i], _phones[i]);
+        }
+        return ids;
+    }
+    
+    function _createCustomer(
+        string memory _name,
+        string memory _email,
+        string memory _phone
+    ) internal returns (uint256) {
         require(bytes(_name).length > 0, "Name cannot be empty");
         require(bytes(_email).length > 0, "Email cannot be empty");
         
-        uint256 id = block.timestamp;
+        uint256 id = _nextId(lastCustomerId);
+        lastCustomerId = id;
         
         customers[id] = Customer({
             id: id,
@@ -208,7 +365,7 @@ contract SimplifiedNoForma {
             exists: true
         });
         
-        customerIds.push(id);
+        _addId(customerIds, customerIndex, id);
         
         emit CustomerCreated(id, _name, _email, _phone);
         return id;
@@ -222,7 +379,35 @@ contract SimplifiedNoForma {
         string memory _name,
         string memory _email,
         string memory _phone
-    ) external customerExists(_id) {
+    ) external {
+        _updateCustomer(_id, _name, _email, _phone);
+    }
+    
+    /**
+     * @dev Update several customers in one transaction
+     */
+    function updateCustomerBatch(
+        uint256[] memory _ids,
+        string[] memory _names,
+        string[] memory _emails,
+        string[] memory _phones
+    ) external {
+        require(
+            _ids.length == _names.length && _ids.length == _emails.length && _ids.length == _phones.length,
+            "Array lengths must match"
+        );
+        
+        for (uint256 i = 0; i < _ids.length; i++) {
+            _updateCustomer(_ids[i], _names[i], _emails[i], _phones[i]);
+        }
+    }
+    
+    function _updateCustomer(
+        uint256 _id,
+        string memory _name,
+        string memory _email,
+        string memory _phone
+    ) internal customerExists(_id) {
         require(bytes(_name).length > 0, "Name cannot be empty");
         require(bytes(_email).length > 0, "Email cannot be empty");
         
@@ -239,14 +424,7 @@ contract SimplifiedNoForma {
     function deleteCustomer(uint256 _id) external customerExists(_id) {
         customers[_id].exists = false;
         
-        // Remove from array
-        for (uint256 i = 0; i < customerIds.length; i++) {
-            if (customerIds[i] == _id) {
-                customerIds[i] = customerIds[customerIds.length - 1];
-                customerIds.pop();
-                break;
-            }
-        }
+        _removeId(customerIds, customerIndex, _id);
         
         emit CustomerDeleted(_id);
     }
@@ -298,6 +476,34 @@ contract SimplifiedNoForma {
         return (ids, names, emails, phones);
     }
     
+    /**
+     * @dev Get one page of customers, in the order of getAllCustomers
+     */
+    function getCustomerPage(uint256 _offset, uint256 _limit) external view returns (
+        uint256[] memory ids,
+        string[] memory names,
+        string[] memory emails,
+        string[] memory phones,
+        uint256 total
+    ) {
+        total = customerIds.length;
+        uint256 length = _pageLength(total, _offset, _limit);
+        ids = new uint256[](length);
+        names = new string[](length);
+        emails = new string[](length);
+        phones = new string[](length);
+        
+        for (uint256 i = 0; i < length; i++) {
+            Customer storage customer = customers[customerIds[_offset + i]];
+            ids[i] = customer.id;
+            names[i] = customer.name;
+            emails[i] = customer.email;
+            phones[i] = customer.phone;
+        }
+        
+        return (ids, names, emails, phones, total);
+    }
+    
     // Project CRUD Operations
     
     /**
@@ -309,10 +515,41 @@ contract SimplifiedNoForma {
         string memory _status,
         string memory _details
     ) external returns (uint256) {
+        return _createProject(_name, _customer, _status, _details);
+    }
+    
+    /**
+     * @dev Create several projects in one transaction
+     */
+    function createProjectBatch(
+        string[] memory _names,
+        string[] memory _customers,
+        string[] memory _statuses,
+        string[] memory _details
+    ) external returns (uint256[] memory ids) {
+        require(
+            _names.length == _customers.length && _names.length == _statuses.length && _names.length == _details.length,
+            "Array lengths must match"
+        );
+        
+        ids = new uint256[](_names.length);
+        for (uint256 i = 0; i < _names.length; i++) {
+            ids[i] = _createProject(_names[i], _customers[i], _statuses[i], _details[i]);
+        }
+        return ids;
+    }
+    
+    function _createProject(
+        string memory _name,
+        string memory _customer,
+        string memory _status,
+        string memory _details
+    ) internal returns (uint256) {
         require(bytes(_name).length > 0, "Name cannot be empty");
         require(bytes(_customer).length > 0, "Customer cannot be empty");
         
-        uint256 id = block.timestamp;
+        uint256 id = _nextId(lastProjectId);
+        lastProjectId = id;
         
         projects[id] = Project({
             id: id,
@@ -323,7 +560,7 @@ contract SimplifiedNoForma {
             exists: true
         });
         
-        projectIds.push(id);
+        _addId(projectIds, projectIndex, id);
         
         emit ProjectCreated(id, _name, _customer, _status);
         return id;
@@ -338,7 +575,38 @@ contract SimplifiedNoForma {
         string memory _customer,
         string memory _status,
         string memory _details
-    ) external projectExists(_id) {
+    ) external {
+        _updateProject(_id, _name, _customer, _status, _details);
+    }
+    
+    /**
+     * @dev Update several projects in one transaction
+     */
+    function updateProjectBatch(
+        uint256[] memory _ids,
+        string[] memory _names,
+        string[] memory _customers,
+        string[] memory _statuses,
+        string[] memory _details
+    ) external {
+        require(
+            _ids.length == _names.length && _ids.length == _customers.length &&
+            _ids.length == _statuses.length && _ids.length == _details.length,
+            "Array lengths must match"
+        );
+        
+        for (uint256 i = 0; i < _ids.length; i++) {
+            _updateProject(_ids[i], _names[i], _customers[i], _statuses[i], _details[i]);
+        }
+    }
+    
+    function _updateProject(
+        uint256 _id,
+        string memory _name,
+        string memory _customer,
+        string memory _status,
+        string memory _details
+    ) internal projectExists(_id) {
         require(bytes(_name).length > 0, "Name cannot be empty");
         require(bytes(_customer).length > 0, "Customer cannot be empty");
         
@@ -356,14 +624,7 @@ contract SimplifiedNoForma {
     function deleteProject(uint256 _id) external projectExists(_id) {
         projects[_id].exists = false;
         
-        // Remove from array
-        for (uint256 i = 0; i < projectIds.length; i++) {
-            if (projectIds[i] == _id) {
-                projectIds[i] = projectIds[projectIds.length - 1];
-                projectIds.pop();
-                break;
-            }
-        }
+        _removeId(projectIds, projectIndex, _id);
         
         emit ProjectDeleted(_id);
     }
@@ -419,6 +680,37 @@ contract SimplifiedNoForma {
         return (ids, names, customerNames, statuses, details);
     }
     
+    /**
+     * @dev Get one page of projects, in the order of getAllProjectsWithCustomerInformation
+     */
+    function getProjectPage(uint256 _offset, uint256 _limit) external view returns (
+        uint256[] memory ids,
+        string[] memory names,
+        string[] memory customerNames,
+        string[] memory statuses,
+        string[] memory details,
+        uint256 total
+    ) {
+        total = projectIds.length;
+        uint256 length = _pageLength(total, _offset, _limit);
+        ids = new uint256[](length);
+        names = new string[](length);
+        customerNames = new string[](length);
+        statuses = new string[](length);
+        details = new string[](length);
+        
+        for (uint256 i = 0; i < length; i++) {
+            Project storage project = projects[projectIds[_offset + i]];
+            ids[i] = project.id;
+            names[i] = project.name;
+            customerNames[i] = project.customer;
+            statuses[i] = project.status;
+            details[i] = project.details;
+        }
+        
+        return (ids, names, customerNames, statuses, details, total);
+    }
+    
     // Utility functions
     
     /**
@@ -241,6 +241,35 @@ contract_abi = [
 		"stateMutability": "nonpayable",
 		"type": "function"
 	},
+	{
+		"inputs": [
+			{
+				"internalType": "string[]",
+				"name": "_names",
+				"type": "string[]"
+			},
+			{
+				"internalType": "string[]",
+				"name": "_emails",
+				"type": "string[]"
+			},
+			{
+				"internalType": "string[]",
+				"name": "_phones",
+				"type": "string[]"
+			}
+		],
+		"name": "createCustomerBatch",
+		"outputs": [
+			{
+				"internalType": "uint256[]",
+				"name": "ids",
+				"type": "uint256[]"
+			}
+		],
+		"stateMutability": "nonpayable",
+		"type": "function"
+	},
 	{
 		"inputs": [
 			{
@@ -270,6 +299,35 @@ contract_abi = [
 		"stateMutability": "nonpayable",
 		"type": "function"
 	},
+	{
+		"inputs": [
+			{
+				"internalType": "string[]",
+				"name": "_titles",
+				"type": "string[]"
+			},
+			{
+				"internalType": "string[]",
+				"name": "_groups",
+				"type": "string[]"
+			},
+			{
+				"internalType": "string[]",
+				"name": "_contents",
+				"type": "string[]"
+			}
+		],
+		"name": "createKnowledgeBaseBatch",
+		"outputs": [
+			{
+				"internalType": "uint256[]",
+				"name": "ids",
+				"type": "uint256[]"
+			}
+		],
+		"stateMutability": "nonpayable",
+		"type": "function"
+	},
 	{
 		"inputs": [
 			{
@@ -304,6 +362,40 @@ contract_abi = [
 		"stateMutability": "nonpayable",
 		"type": "function"
 	},
+	{
+		"inputs": [
+			{
+				"internalType": "string[]",
+				"name": "_names",
+				"type": "string[]"
+			},
+			{
+				"internalType": "string[]",
+				"name": "_customers",
+				"type": "string[]"
+			},
+			{
+				"internalType": "string[]",
+				"name": "_statuses",
+				"type": "string[]"
+			},
+			{
+				"internalType": "string[]",
+				"name": "_details",
+				"type": "string[]"
+			}
+		],
+		"name": "createProjectBatch",
+		"outputs": [
+			{
+				"internalType": "uint256[]",
+				"name": "ids",
+				"type": "uint256[]"
+			}
+		],
+		"stateMutability": "nonpayable",
+		"type": "function"
+	},
 	{
 		"inputs": [
 			{
@@ -371,6 +463,34 @@ contract_abi = [
 		"stateMutability": "nonpayable",
 		"type": "function"
 	},
+	{
+		"inputs": [
+			{
+				"internalType": "uint256[]",
+				"name": "_ids",
+				"type": "uint256[]"
+			},
+			{
+				"internalType": "string[]",
+				"name": "_names",
+				"type": "string[]"
+			},
+			{
+				"internalType": "string[]",
+				"name": "_emails",
+				"type": "string[]"
+			},
+			{
+				"internalType": "string[]",
+				"name": "_phones",
+				"type": "string[]"
+			}
+		],
+		"name": "updateCustomerBatch",
+		"outputs": [],
+		"stateMutability": "nonpayable",
+		"type": "function"
+	},
 	{
 		"inputs": [
 			{
@@ -399,6 +519,34 @@ contract_abi = [
 		"stateMutability": "nonpayable",
 		"type": "function"
 	},
+	{
+		"inputs": [
+			{
+				"internalType": "uint256[]",
+				"name": "_ids",
+				"type": "uint256[]"
+			},
+			{
+				"internalType": "string[]",
+				"name": "_titles",
+				"type": "string[]"
+			},
+			{
+				"internalType": "string[]",
+				"name": "_groups",
+				"type": "string[]"
+			},
+			{
+				"internalType": "string[]",
+				"name": "_contents",
+				"type": "string[]"
+			}
+		],
+		"name": "updateKnowledgeBaseBatch",
+		"outputs": [],
+		"stateMutability": "nonpayable",
+		"type": "function"
+	},
 	{
 		"inputs": [
 			{
@@ -432,6 +580,39 @@ contract_abi = [
 		"stateMutability": "nonpayable",
 		"type": "function"
 	},
+	{
+		"inputs": [
+			{
+				"internalType": "uint256[]",
+				"name": "_ids",
+				"type": "uint256[]"
+			},
+			{
+				"internalType": "string[]",
+				"name": "_names",
+				"type": "string[]"
+			},
+			{
+				"internalType": "string[]",
+				"name": "_customers",
+				"type": "string[]"
+			},
+			{
+				"internalType": "string[]",
+				"name": "_statuses",
+				"type": "string[]"
+			},
+			{
+				"internalType": "string[]",
+				"name": "_details",
+				"type": "string[]"
+			}
+		],
+		"name": "updateProjectBatch",
+		"outputs": [],
+		"stateMutability": "nonpayable",
+		"type": "function"
+	},
 	{
 		"inputs": [
 			{
@@ -675,6 +856,50 @@ contract_abi = [
 		"stateMutability": "view",
 		"type": "function"
 	},
+	{
+		"inputs": [
+			{
+				"internalType": "uint256",
+				"name": "_offset",
+				"type": "uint256"
+			},
+			{
+				"internalType": "uint256",
+				"name": "_limit",
+				"type": "uint256"
+			}
+		],
+		"name": "getCustomerPage",
+		"outputs": [
+			{
+				"internalType": "uint256[]",
+				"name": "ids",
+				"type": "uint256[]"
+			},
+			{
+				"internalType": "string[]",
+				"name": "names",
+				"type": "string[]"
+			},
+			{
+				"internalType": "string[]",
+				"name": "emails",
+				"type": "string[]"
+			},
+			{
+				"internalType": "string[]",
+				"name": "phones",
+				"type": "string[]"
+			},
+			{
+				"internalType": "uint256",
+				"name": "total",
+				"type": "uint256"
+			}
+		],
+		"stateMutability": "view",
+		"type": "function"
+	},
 	{
 		"inputs": [
 			{
@@ -709,6 +934,50 @@ contract_abi = [
 		"stateMutability": "view",
 		"type": "function"
 	},
+	{
+		"inputs": [
+			{
+				"internalType": "uint256",
+				"name": "_offset",
+				"type": "uint256"
+			},
+			{
+				"internalType": "uint256",
+				"name": "_limit",
+				"type": "uint256"
+			}
+		],
+		"name": "getKnowledgeBasePage",
+		"outputs": [
+			{
+				"internalType": "uint256[]",
+				"name": "ids",
+				"type": "uint256[]"
+			},
+			{
+				"internalType": "string[]",
+				"name": "titles",
+				"type": "string[]"
+			},
+			{
+				"internalType": "string[]",
+				"name": "groups",
+				"type": "string[]"
+			},
+			{
+				"internalType": "string[]",
+				"name": "contents",
+				"type": "string[]"
+			},
+			{
+				"internalType": "uint256",
+				"name": "total",
+				"type": "uint256"
+			}
+		],
+		"stateMutability": "view",
+		"type": "function"
+	},
 	{
 		"inputs": [
 			{
@@ -748,6 +1017,55 @@ contract_abi = [
 		"stateMutability": "view",
 		"type": "function"
 	},
+	{
+		"inputs": [
+			{
+				"internalType": "uint256",
+				"name": "_offset",
+				"type": "uint256"
+			},
+			{
+				"internalType": "uint256",
+				"name": "_limit",
+				"type": "uint256"
+			}
+		],
+		"name": "getProjectPage",
+		"outputs": [
+			{
+				"internalType": "uint256[]",
+				"name": "ids",
+				"type": "uint256[]"
+			},
+			{
+				"internalType": "string[]",
+				"name": "names",
+				"type": "string[]"
+			},
+			{
+				"internalType": "string[]",
+				"name": "customerNames",
+				"type": "string[]"
+			},
+			{
+				"internalType": "string[]",
+				"name": "statuses",
+				"type": "string[]"
+			},
+			{
+				"internalType": "string[]",
+				"name": "details",
+				"type": "string[]"
+			},
+			{
+				"internalType": "uint256",
+				"name": "total",
+				"type": "uint256"
+			}
+		],
+		"stateMutability": "view",
+		"type": "function"
+	},
 	{
 		"inputs": [
 			{
@@ -1,12 +1,40 @@
-from flask import Flask, request, jsonify, make_response
+from flask import Flask, request, jsonify, make_response, g, Response
 from flask_cors import CORS
 from web3 import Web3
+from web3.logs import DISCARD
 import os
 import json
+import hashlib
 import requests
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from functools import wraps
 from typing import Dict, Any
 import logging
 from abi import contract_abi
+from config import Config
+from nonce_manager import NonceManager, SharedNonceManager, is_nonce_error
+from tx_tracker import TransactionTracker, receipt_to_dict, STATUS_PENDING
+from indexer import ContractIndexer, ENTITIES
+from fee_cache import GasPriceCache, GasEstimateModel
+from view_cache import ViewCallCache
+from provider_pool import ProviderPool
+from ttl_cache import TTLCache
+from shared_state import FileLock, SharedCounter, SharedJSON
+from blob_store import BlobStore
+from text_codec import FieldCodec
+from page_reader import PageReader
+from payloads import (
+    batch_columns, merge_bookings, bookable_slots, records_from_columns, join_customers, is_revert,
+    view_batch, view_batch_outputs
+)
+from search_index import InvertedIndex, MAX_SEARCH_RESULTS
+from passage_index import PassageIndex, MAX_PASSAGE_RESULTS
+from search_views import SearchViews, receipt_changes
+from pagination import parse_page_request, paginate_records, page_response, parse_ids, parse_expand, project
+import metrics
+import rpc_trace
 # Configure logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
@@ -14,53 +42,160 @@ logger = logging.getLogger(__name__)
 app = Flask(__name__)
 CORS(app)  # Enable CORS for all routes
 
-# Configuration
-class Config:
-    # Provider URLs - try multiple options
-    PROVIDER_URLS = [
-        os.getenv('WEB3_PROVIDER_URL', 'http://localhost:8545'),
-        'https://eth-sepolia.g.alchemy.com/v2/demo',  # Sepolia testnet
-        'https://eth-goerli.g.alchemy.com/v2/demo',   # Goerli testnet (if needed)
-        'https://rpc.ankr.com/eth_sepolia',           # Alternative Sepolia
-    ]
-    WEB3_PROVIDER_URL = os.getenv('WEB3_PROVIDER_URL', 'http://localhost:8545')
-    CONTRACT_ADDRESS = os.getenv('CONTRACT_ADDRESS', '')
-    PRIVATE_KEY = os.getenv('PRIVATE_KEY', '')
-    FROM_ADDRESS = os.getenv('FROM_ADDRESS', '')
-    
-    # Network settings
-    DEFAULT_GAS_LIMIT = 300000
-    GAS_PRICE_MULTIPLIER = 1.1
-
-# Initialize Web3 with fallback providers
+# Initialize Web3 with a pool of fallback providers
 def create_web3_instance():
-    """Create Web3 instance with fallback providers"""
-    for provider_url in Config.PROVIDER_URLS:
-        try:
-            w3 = Web3(Web3.HTTPProvider(provider_url))
-            if w3.is_connected():
-                logger.info(f"Successfully connected to Web3 provider: {provider_url}")
-                return w3, provider_url
-            else:
-                logger.warning(f"Failed to connect to provider: {provider_url}")
-        except Exception as e:
-            logger.warning(f"Error connecting to {provider_url}: {str(e)}")
-    
-    # Fallback to the original URL even if connection fails
-    logger.error("All provider connections failed. Using original URL with no connection.")
-    return Web3(Web3.HTTPProvider(Config.WEB3_PROVIDER_URL)), Config.WEB3_PROVIDER_URL
+    """Create Web3 instance backed by a latency-aware provider pool"""
+    pool = ProviderPool(
+        [Config.WEB3_PROVIDER_URL] + Config.PROVIDER_URLS,
+        timeout=Config.RPC_TIMEOUT
+    )
+    chain_id = pool.pin_chain()
+    if chain_id is None:
+        logger.error("All provider connections failed. Requests will keep retrying the pool.")
+    else:
+        logger.info(f"Successfully connected to Web3 provider: {pool.active_url()}")
+    return instrument(Web3(pool)), pool
 
-w3, active_provider = create_web3_instance()
+def instrument(instance):
+    """Add the metrics and per-request tracing middlewares to a Web3 instance"""
+    instance.middleware_onion.add(metrics.rpc_metrics_middleware, 'metrics')
+    instance.middleware_onion.add(rpc_trace.rpc_trace_middleware, 'rpc_trace')
+    return instance
+
+def shared_path(name):
+    """Path of a coordination file shared by pre-forked workers"""
+    return os.path.join(Config.SHARED_STATE_DIR, name)
+
+# Web3 is created per worker in init_worker(), after any fork
+w3 = None
+provider_pool = None
+if Config.SHARED_STATE_DIR:
+    os.makedirs(Config.SHARED_STATE_DIR, exist_ok=True)
+    nonce_manager = SharedNonceManager(None, shared_path("nonces.json"))
+    free_slots_generation = SharedCounter(shared_path("free_slots.generation"))
+    shared_config = SharedJSON(shared_path("config.json"))
+    config_generation = SharedCounter(shared_path("config.generation"))
+    indexer_lock = FileLock(shared_path("indexer.lock"))
+    view_cache_generation = SharedCounter(shared_path("view_cache.generation"))
+else:
+    nonce_manager = NonceManager(None)
+    free_slots_generation = shared_config = config_generation = indexer_lock = None
+    view_cache_generation = None
+tx_tracker = TransactionTracker(
+    None, poll_interval=Config.TX_POLL_INTERVAL,
+    on_settle=lambda tx_hash: metrics.TRANSACTIONS_IN_FLIGHT.dec()
+)
+gas_price_cache = GasPriceCache(None, block_time=Config.BLOCK_TIME)
+gas_estimate_model = GasEstimateModel()
+view_cache = ViewCallCache(
+    None, max_entries=Config.VIEW_CACHE_SIZE, max_bytes=int(Config.VIEW_CACHE_MAX_MB * 1024 * 1024),
+    block_poll=Config.VIEW_CACHE_BLOCK_POLL, shared_generation=view_cache_generation,
+    on_lookup=lambda result: metrics.VIEW_CACHE_LOOKUPS.labels(result).inc()
+)
+blob_store = BlobStore(Config.BLOB_STORE_DIR) if Config.BLOB_STORE_DIR else None
+field_codec = FieldCodec(compress=Config.TEXT_COMPRESSION, blob_store=blob_store)
+page_reader = PageReader(page_size=Config.LIST_PAGE_SIZE, max_workers=Config.LIST_PAGE_WORKERS)
+cal_executor = ThreadPoolExecutor(max_workers=8, thread_name_prefix="cal-com")
+free_slots_cache = TTLCache(
+    Config.FREE_SLOTS_TTL, Config.FREE_SLOTS_STALE_TTL, shared_generation=free_slots_generation
+)
+
+NDJSON_MIMETYPE = "application/x-ndjson"
+# Records per chunk written to the socket when streaming NDJSON
+NDJSON_CHUNK_SIZE = 100
 
 # Contract ABI - This should match your deployed contract
 CONTRACT_ABI = contract_abi
 
 # Global variables
 contract = None
+indexer = None
+kb_search = InvertedIndex()
+kb_passages = PassageIndex()
+# Both are fed from the same knowledge base entries
+search_views = SearchViews(field_codec, kb_search, kb_passages)
+# Serializes loading from the chain and applying receipts
+search_lock = threading.Lock()
+worker_pid = None
+config_seen = None
+worker_lock = threading.Lock()
+
+def init_worker():
+    """Set up per-process state once in each worker, after fork"""
+    global w3, provider_pool, worker_pid
+    with worker_lock:
+        if worker_pid == os.getpid():
+            return
+        w3, provider_pool = create_web3_instance()
+        for component in (nonce_manager, tx_tracker, gas_price_cache, view_cache):
+            component.w3 = w3
+        # With shared state the contract is set up by apply_shared_config()
+        if shared_config is None:
+            init_contract()
+        worker_pid = os.getpid()
+
+def apply_shared_config():
+    """Pick up /config changes made by other workers"""
+    global CONTRACT_ABI, config_seen
+    if config_generation is None or config_generation.value == config_seen:
+        return
+    with worker_lock:
+        generation = config_generation.value
+        if generation == config_seen:
+            return
+        overrides = shared_config.load()
+        Config.CONTRACT_ADDRESS = overrides.get('contract_address', Config.CONTRACT_ADDRESS)
+        Config.PRIVATE_KEY = overrides.get('private_key', Config.PRIVATE_KEY)
+        Config.FROM_ADDRESS = overrides.get('from_address', Config.FROM_ADDRESS)
+        CONTRACT_ABI = overrides.get('contract_abi', CONTRACT_ABI)
+        init_contract()
+        config_seen = generation
+
+@app.before_request
+def prepare_worker():
+    init_worker()
+    apply_shared_config()
+
+@app.before_request
+def start_request_timer():
+    g.request_started = time.perf_counter()
+    g.rpc_trace = rpc_trace.start_trace()
+
+@app.after_request
+def record_request_metrics(response):
+    if 'request_started' not in g:
+        return response
+    duration = time.perf_counter() - g.request_started
+    route = request.url_rule.rule if request.url_rule else "unmatched"
+    metrics.HTTP_LATENCY.labels(request.method, route).observe(duration)
+    metrics.HTTP_REQUESTS.labels(request.method, route, str(response.status_code)).inc()
+    
+    trace = g.rpc_trace
+    response.headers["X-RPC-Calls"] = str(trace.count)
+    response.headers["X-RPC-Time-Ms"] = f"{trace.total_ms:.1f}"
+    if Config.SLOW_REQUEST_MS and duration * 1000 >= Config.SLOW_REQUEST_MS:
+        logger.warning("Slow request " + json.dumps({
+            "method": request.method,
+            "path": request.path,
+            "route": route,
+            "status": response.status_code,
+            "duration_ms": round(duration * 1000, 1),
+            "rpc_calls": trace.count,
+            "rpc_time_ms": round(trace.total_ms, 1),
+            "calls": trace.breakdown(),
+        }))
+    return response
+
+@app.teardown_request
+def end_request_trace(exc):
+    rpc_trace.end_trace()
 
 def init_contract():
     """Initialize the contract instance"""
     global contract
+    # Reload search entries on next use
+    search_views.reset()
+    view_cache.invalidate()
     try:
         if Config.CONTRACT_ADDRESS and CONTRACT_ABI:
             contract = w3.eth.contract(
@@ -68,13 +203,80 @@ def init_contract():
                 abi=CONTRACT_ABI
             )
             logger.info(f"Contract initialized at address: {Config.CONTRACT_ADDRESS}")
+            page_reader.detect(contract, [spec["page"] for spec in ENTITIES.values()])
+            init_indexer()
         else:
             logger.warning("Contract address or ABI not configured")
     except Exception as e:
         logger.error(f"Failed to initialize contract: {str(e)}")
 
-def handle_transaction(tx_function, *args, **kwargs):
-    """Handle contract transactions with proper error handling"""
+def init_indexer():
+    """Start (or restart) the background indexer for the current contract"""
+    global indexer
+    if indexer:
+        indexer.stop()
+        indexer = None
+    if not Config.INDEXER_ENABLED:
+        return
+    try:
+        indexer = ContractIndexer(
+            w3, contract, Config.INDEX_DB_PATH,
+            poll_interval=Config.INDEXER_POLL_INTERVAL,
+            confirmations=Config.INDEXER_CONFIRMATIONS,
+            sync_lock=indexer_lock,
+            page_reader=page_reader
+        )
+        indexer.start()
+        logger.info(f"Indexer started with database: {Config.INDEX_DB_PATH}")
+    except Exception as e:
+        logger.error(f"Failed to start indexer: {str(e)}")
+
+def read_from_index():
+    """Check whether GET endpoints can be served from the local index"""
+    return indexer is not None and indexer.ready
+
+def refresh_search_index():
+    """Bring the knowledge base search index up to date"""
+    with search_lock:
+        if read_from_index():
+            search_views.sync_index(indexer)
+        elif search_views.source != "chain":
+            search_views.load_chain(records_from_columns("knowledge_base", read_list("knowledge_base")))
+
+def update_search_from_receipt(receipt):
+    """Apply knowledge base events of a mined write to a chain-loaded search index"""
+    if search_views.source != "chain":
+        return
+    with search_lock:
+        for entity_id, deleted in receipt_changes(contract, receipt):
+            if deleted:
+                search_views.remove(entity_id)
+                continue
+            try:
+                output = contract.functions.getKnowledgeBase(entity_id).call(
+                    block_identifier=receipt.blockNumber
+                )
+            except Exception:
+                # Deleted again later in the same block
+                search_views.remove(entity_id)
+                continue
+            search_views.add(entity_id, dict(zip(ENTITIES["knowledge_base"]["fields"], output)))
+
+def catch_up_index(block_number):
+    """Index a write's block before responding, so reads served from the index see it"""
+    if not indexer:
+        return
+    try:
+        indexer.catch_up(block_number)
+    except Exception as e:
+        logger.warning(f"Index catch-up to block {block_number} failed: {str(e)}")
+
+def handle_transaction(tx_function, *args, on_receipt=None, **kwargs):
+    """Handle contract transactions with proper error handling
+    
+    on_receipt, if given, is called with the mined receipt and its returned
+    dict is merged into the result (e.g. IDs read from emitted events).
+    """
     try:
         if not contract:
             return {"success": False, "error": "Contract not initialized"}
@@ -82,46 +284,299 @@ def handle_transaction(tx_function, *args, **kwargs):
         # Build transaction
         tx = tx_function(*args, **kwargs)
         
-        # Estimate gas
-        gas_estimate = w3.eth.estimate_gas(tx.build_transaction({
-            'from': Config.FROM_ADDRESS,
-            'nonce': w3.eth.get_transaction_count(Config.FROM_ADDRESS),
-        }))
+        # Use a learned gas estimate when confident, otherwise ask the node
+        calldata_size = len(contract.encodeABI(fn_name=tx.fn_name, args=tx.args))
+        gas_estimate = None
+        if Config.GAS_ESTIMATE_CACHE:
+            gas_estimate = gas_estimate_model.predict(tx.fn_name, calldata_size)
+        if gas_estimate is None:
+            gas_estimate = tx.estimate_gas({'from': Config.FROM_ADDRESS})
+            gas_estimate_model.record_estimate(tx.fn_name, calldata_size, gas_estimate)
         
-        # Build and sign transaction
-        tx_dict = tx.build_transaction({
-            'from': Config.FROM_ADDRESS,
-            'nonce': w3.eth.get_transaction_count(Config.FROM_ADDRESS),
-            'gas': gas_estimate,
-            'gasPrice': w3.eth.gas_price,
-        })
+        # Reserve a nonce locally so concurrent writes don't collide
+        nonce = nonce_manager.allocate(Config.FROM_ADDRESS)
+        try:
+            # Build and sign transaction
+            tx_dict = tx.build_transaction({
+                'from': Config.FROM_ADDRESS,
+                'nonce': nonce,
+                'gas': gas_estimate,
+                'gasPrice': gas_price_cache.gas_price(),
+            })
+            
+            signed_tx = w3.eth.account.sign_transaction(tx_dict, Config.PRIVATE_KEY)
+            
+            # Send transaction
+            tx_hash = w3.eth.send_raw_transaction(signed_tx.rawTransaction)
+        except Exception as e:
+            if is_nonce_error(e):
+                nonce_manager.resync(Config.FROM_ADDRESS)
+            else:
+                nonce_manager.release(Config.FROM_ADDRESS, nonce)
+            if 'underpriced' in str(e).lower():
+                gas_price_cache.invalidate()
+            raise
+        metrics.TRANSACTIONS_IN_FLIGHT.inc()
+        view_cache.invalidate()
         
-        signed_tx = w3.eth.account.sign_transaction(tx_dict, Config.PRIVATE_KEY)
+        def after_receipt(receipt):
+            metrics.GAS_USED.labels(tx.fn_name).observe(receipt.gasUsed)
+            gas_estimate_model.record(tx.fn_name, calldata_size, receipt, tx_dict['gas'])
+            gas_price_cache.note_block(receipt.blockNumber)
+            # Reads cached while the write was pending predate it
+            view_cache.note_block(receipt.blockNumber)
+            view_cache.invalidate()
+            if indexer:
+                indexer.request_sync()
+            if receipt.status == 1:
+                update_search_from_receipt(receipt)
         
-        # Send transaction
-        tx_hash = w3.eth.send_raw_transaction(signed_tx.rawTransaction)
+        # In async mode hand the receipt wait to the background confirmer
+        if async_requested():
+            record = tx_tracker.track(tx_hash, tx.fn_name, on_receipt=after_receipt)
+            return {
+                "success": True,
+                "status": record["status"],
+                "transaction_hash": record["transaction_hash"],
+                "status_url": f"/tx/{record['transaction_hash']}"
+            }
         
         # Wait for confirmation
-        receipt = w3.eth.wait_for_transaction_receipt(tx_hash)
+        try:
+            receipt = w3.eth.wait_for_transaction_receipt(tx_hash)
+        finally:
+            metrics.TRANSACTIONS_IN_FLIGHT.dec()
+        after_receipt(receipt)
+        catch_up_index(receipt.blockNumber)
         
-        return {
-            "success": True,
+        result = {
+            "success": receipt.status == 1,
             "transaction_hash": receipt.transactionHash.hex(),
             "block_number": receipt.blockNumber,
             "gas_used": receipt.gasUsed
         }
+        if receipt.status != 1:
+            result["error"] = "Transaction reverted"
+        elif on_receipt:
+            result.update(on_receipt(receipt))
+        
+        return result
         
     except Exception as e:
         logger.error(f"Transaction failed: {str(e)}")
         return {"success": False, "error": str(e)}
 
+def list_from_index(entity, page):
+    """Serve a list endpoint from the local index"""
+    if not page.active:
+        return {"success": True, "data": indexer.list_entities(entity)}
+    records, has_more = indexer.query_entities(
+        entity, page.fields, page.offset, page.limit, page.cursor
+    )
+    return page_response(records, page, indexer.count(entity), has_more)
+
+def paginate_result(result, page):
+    """Apply pagination to a list result read from the contract"""
+    if not result["success"] or not page.active:
+        return result
+    records, total, has_more = paginate_records(result["data"], page)
+    return page_response(records, page, total, has_more)
+
+def ndjson_requested():
+    """Check whether the client asked for a newline-delimited JSON stream"""
+    best = request.accept_mimetypes.best_match(["application/json", NDJSON_MIMETYPE])
+    return best == NDJSON_MIMETYPE
+
+def ndjson_response(entity, records):
+    """Stream records as one JSON object per line
+    
+    Records are encoded as they are consumed, so a lazy iterable is never
+    held in memory. An error after the first line can no longer change the
+    status code; it is reported as a final {"success": false} line.
+    """
+    # One encoder with the app's JSON settings, instead of one per line
+    encode = json.JSONEncoder(
+        sort_keys=app.json.sort_keys, ensure_ascii=app.json.ensure_ascii, default=app.json.default
+    ).encode
+    
+    def generate():
+        lines = []
+        try:
+            for record in records:
+                field_codec.decode(entity, [record])
+                lines.append(encode(record))
+                if len(lines) == NDJSON_CHUNK_SIZE:
+                    yield "\n".join(lines) + "\n"
+                    lines = []
+            if lines:
+                yield "\n".join(lines) + "\n"
+        except Exception as e:
+            logger.error(f"Streaming {entity} failed: {str(e)}")
+            yield "".join(line + "\n" for line in lines) + encode({"success": False, "error": str(e)}) + "\n"
+    return Response(generate(), mimetype=NDJSON_MIMETYPE)
+
+def conditional(*entities):
+    """Tag responses with a strong ETag of the indexed state of entities
+    
+    A request whose If-None-Match holds the current tag gets an empty 304
+    without running the view, so an unchanged poll costs one local SQLite
+    query and no RPC. Only applies while the local index is ready, since
+    its change log is what versions the state.
+    """
+    def decorator(view):
+        @wraps(view)
+        def wrapper(*args, **kwargs):
+            if not read_from_index():
+                return view(*args, **kwargs)
+            representation = NDJSON_MIMETYPE if ndjson_requested() else "application/json"
+            version = indexer.state_version(entities)
+            etag = hashlib.sha256(f"{version}|{representation}".encode()).hexdigest()[:32]
+            if request.if_none_match.contains_weak(etag):
+                response = Response(status=304)
+            else:
+                response = make_response(view(*args, **kwargs))
+                if response.status_code != 200:
+                    return response
+            response.set_etag(etag)
+            response.headers["Cache-Control"] = "no-cache"
+            response.vary.add("Accept")
+            return response
+        return wrapper
+    return decorator
+
+def stream_entities(entity, page, ids=None, expand=()):
+    """Serve a list endpoint as NDJSON from the local index or the contract"""
+    if ids is not None:
+        result = get_entities_by_ids(entity, ids, page.fields)
+        if not result["success"]:
+            return jsonify(result)
+        records = result["data"]
+    elif read_from_index():
+        records = indexer.iter_entities(entity, page.fields, page.offset, page.limit, page.cursor)
+    else:
+        if not contract:
+            return jsonify({"success": False, "error": "Contract not initialized"})
+        data = read_list(entity)
+        records = (dict(zip(ENTITIES[entity]["fields"], row)) for row in zip(*data))
+        if page.active:
+            records, _, _ = paginate_records(list(records), page)
+    
+    if "customer" in expand:
+        records = join_customers(records, load_customers())
+    return ndjson_response(entity, records)
+
+def handle_batch_call(fn_name, arg_lists):
+    """Run one contract view per argument list in a single JSON-RPC batch
+    
+    Returns the decoded outputs in order, with None for calls that reverted
+    (e.g. an ID that does not exist). Any other error (rate limits, node
+    failures) raises ConnectionError, so it is not mistaken for a missing
+    entity.
+    """
+    calls, output_types = view_batch(contract, fn_name, arg_lists)
+    
+    if hasattr(w3.provider, 'make_batch_request'):
+        start = time.perf_counter()
+        responses = w3.provider.make_batch_request(calls)
+        duration = time.perf_counter() - start
+        metrics.observe_batch("eth_call", responses, duration)
+        trace = rpc_trace.current_trace()
+        if trace:
+            trace.record(f"batch[eth_call x{len(calls)}]", duration)
+    else:
+        # Providers without batch support get one request per call
+        responses = []
+        for method, params in calls:
+            try:
+                responses.append(w3.provider.make_request(method, params))
+            except Exception as e:
+                # Some providers raise on reverts instead of returning an error
+                if not is_revert(str(e)):
+                    raise
+                responses.append({"error": {"message": str(e)}})
+    
+    return view_batch_outputs(w3.codec, fn_name, output_types, responses)
+
+def get_entities_by_ids(entity, ids, fields):
+    """Look up several entities by ID from the index or a batched eth_call"""
+    if read_from_index():
+        found = indexer.get_entities(entity, ids, fields)
+    else:
+        if not contract:
+            return {"success": False, "error": "Contract not initialized"}
+        getter = ENTITIES[entity]["getter"]
+        outputs = view_cache.call(
+            f"batch:{getter}", ids, lambda: handle_batch_call(getter, [[entity_id] for entity_id in ids])
+        )
+        found = {
+            entity_id: project(dict(zip(ENTITIES[entity]["fields"], output)), fields)
+            for entity_id, output in zip(ids, outputs) if output is not None
+        }
+    
+    return {
+        "success": True,
+        "data": [found[entity_id] for entity_id in ids if entity_id in found],
+        "missing": [entity_id for entity_id in ids if entity_id not in found]
+    }
+
+def expand_projects(result, expand):
+    """Embed the customer of each project in a list result when ?expand=customer was given"""
+    if "customer" in expand and result["success"]:
+        result["data"] = list(join_customers(result["data"], load_customers()))
+    return result
+
+def async_requested():
+    """Check whether the current write should return before the receipt"""
+    flag = request.args.get('async')
+    if flag is None:
+        return Config.ASYNC_TRANSACTIONS
+    return flag.lower() in ('1', 'true', 'yes')
+
+def transaction_response(result):
+    """Build the HTTP response for a handle_transaction result"""
+    if result.get("status") == "pending":
+        return jsonify(result), 202
+    return jsonify(result)
+
+def created_ids(event_name):
+    """Build an on_receipt hook that reports the IDs of created entities"""
+    def extract(receipt):
+        events = getattr(contract.events, event_name)().process_receipt(receipt, errors=DISCARD)
+        return {"ids": [event.args.id for event in events]}
+    return extract
+
+def read_list(entity):
+    """Every row of an entity from the contract, in the column shape of its getAll* view"""
+    spec = ENTITIES[entity]
+    return view_cache.call(
+        spec["list"], (), lambda: page_reader.read(contract, spec["page"], spec["list"])
+    )
+
+def load_customers():
+    """Every customer record, from the local index or the contract"""
+    if read_from_index():
+        return indexer.list_entities("customers")
+    return records_from_columns("customers", read_list("customers"))
+
+def handle_list_call(entity):
+    """Read a whole entity list from the contract with proper error handling"""
+    try:
+        if not contract:
+            return {"success": False, "error": "Contract not initialized"}
+        
+        return {"success": True, "data": read_list(entity)}
+        
+    except Exception as e:
+        logger.error(f"Call failed: {str(e)}")
+        return {"success": False, "error": str(e)}
+
 def handle_call(call_function, *args):
     """Handle contract calls with proper error handling"""
     try:
         if not contract:
             return {"success": False, "error": "Contract not initialized"}
         
-        result = call_function(*args).call()
+        result = view_cache.call(call_function.fn_name, args, lambda: call_function(*args).call())
         return {"success": True, "data": result}
         
     except Exception as e:
@@ -149,10 +604,13 @@ def health_check():
         return jsonify({
             "status": "healthy",
             "web3_connected": is_connected,
-            "active_provider": active_provider,
+            "active_provider": provider_pool.active_url(),
+            "providers": provider_pool.status(),
             "contract_initialized": contract is not None,
             "contract_address": Config.CONTRACT_ADDRESS,
-            "network_info": network_info
+            "network_info": network_info,
+            "indexer": indexer.status() if indexer else None,
+            "view_cache": view_cache.status()
         })
     except Exception as e:
         return jsonify({
@@ -174,10 +632,23 @@ def update_config():
             Config.PRIVATE_KEY = data['private_key']
         if 'from_address' in data:
             Config.FROM_ADDRESS = data['from_address']
+            nonce_manager.reset()
         if 'contract_abi' in data:
             global CONTRACT_ABI
             CONTRACT_ABI = data['contract_abi']
         
+        if shared_config is not None:
+            # Other workers apply the change on their next request
+            with shared_config.lock:
+                overrides = shared_config.load()
+                overrides.update({
+                    key: data[key] for key in ('contract_address', 'private_key', 'from_address', 'contract_abi')
+                    if key in data
+                })
+                shared_config.save(overrides)
+                global config_seen
+                config_seen = config_generation.increment()
+        
         init_contract()
         
         return jsonify({"success": True, "message": "Configuration updated"})
@@ -201,10 +672,10 @@ def create_knowledge_base():
         
         result = handle_transaction(
             contract.functions.createKnowledgeBase,
-            title, group, content
+            title, group, field_codec.encode("knowledge_base", content)
         )
         
-        return jsonify(result)
+        return transaction_response(result)
     
     except Exception as e:
         return jsonify({"success": False, "error": str(e)}), 500
@@ -223,10 +694,10 @@ def update_knowledge_base(kb_id):
         
         result = handle_transaction(
             contract.functions.updateKnowledgeBase,
-            kb_id, title, group, content
+            kb_id, title, group, field_codec.encode("knowledge_base", content)
         )
         
-        return jsonify(result)
+        return transaction_response(result)
     
     except Exception as e:
         return jsonify({"success": False, "error": str(e)}), 500
@@ -240,15 +711,22 @@ def delete_knowledge_base(kb_id):
             kb_id
         )
         
-        return jsonify(result)
+        return transaction_response(result)
     
     except Exception as e:
         return jsonify({"success": False, "error": str(e)}), 500
 
 @app.route('/knowledge-base/<int:kb_id>', methods=['GET'])
+@conditional("knowledge_base")
 def get_knowledge_base(kb_id):
     """Get a knowledge base entry by ID"""
     try:
+        if read_from_index():
+            record = indexer.get_entity("knowledge_base", kb_id)
+            if record is None:
+                return jsonify({"success": False, "error": "Knowledge base entry does not exist"})
+            return jsonify({"success": True, "data": field_codec.decode("knowledge_base", [record])[0]})
+        
         result = handle_call(contract.functions.getKnowledgeBase, kb_id)
         
         if result["success"]:
@@ -260,6 +738,7 @@ def get_knowledge_base(kb_id):
                 "group": data[2],
                 "content": data[3]
             }
+            field_codec.decode("knowledge_base", [result["data"]])
         
         return jsonify(result)
     
@@ -267,10 +746,26 @@ def get_knowledge_base(kb_id):
         return jsonify({"success": False, "error": str(e)}), 500
 
 @app.route('/knowledge-base', methods=['GET'])
+@conditional("knowledge_base")
 def get_all_knowledge_base():
     """Get all knowledge base entries"""
     try:
-        result = handle_call(contract.functions.getAllKnowledgeBase)
+        page = parse_page_request(request.args, ENTITIES["knowledge_base"]["fields"])
+        
+        ids = parse_ids(request.args)
+        if ndjson_requested():
+            return stream_entities("knowledge_base", page, ids)
+        if ids is not None:
+            result = get_entities_by_ids("knowledge_base", ids, page.fields)
+            field_codec.decode("knowledge_base", result.get("data", []))
+            return jsonify(result)
+        
+        if read_from_index():
+            result = list_from_index("knowledge_base", page)
+            field_codec.decode("knowledge_base", result["data"])
+            return jsonify(result)
+        
+        result = handle_list_call("knowledge_base")
         
         if result["success"]:
             # Convert the tuple result to a structured response
@@ -287,21 +782,126 @@ def get_all_knowledge_base():
             
             result["data"] = knowledge_bases
         
+        # Resolve after paginating so only the returned page reads blobs
+        result = paginate_result(result, page)
+        if result["success"]:
+            field_codec.decode("knowledge_base", result["data"])
         return jsonify(result)
     
+    except ValueError as e:
+        return jsonify({"success": False, "error": str(e)}), 400
+    except Exception as e:
+        return jsonify({"success": False, "error": str(e)}), 500
+
+@app.route('/knowledge-base/search', methods=['GET'])
+@conditional("knowledge_base")
+def search_knowledge_base():
+    """Keyword search over knowledge base titles, groups and content"""
+    try:
+        query = request.args.get('q', '')
+        group = request.args.get('group')
+        try:
+            limit = int(request.args.get('limit', 20))
+        except ValueError:
+            return jsonify({"success": False, "error": "limit must be an integer"}), 400
+        if limit < 1 or limit > MAX_SEARCH_RESULTS:
+            return jsonify({"success": False, "error": f"limit must be between 1 and {MAX_SEARCH_RESULTS}"}), 400
+        if not query.strip() and group is None:
+            return jsonify({"success": False, "error": "q or group is required"}), 400
+        if not contract:
+            return jsonify({"success": False, "error": "Contract not initialized"})
+        
+        refresh_search_index()
+        return jsonify({"success": True, "data": kb_search.search(query, group=group, limit=limit)})
+    
+    except Exception as e:
+        return jsonify({"success": False, "error": str(e)}), 500
+
+@app.route('/knowledge-base/passages', methods=['GET'])
+@conditional("knowledge_base")
+def search_knowledge_base_passages():
+    """Passages of knowledge base content most relevant to a query, for agent context"""
+    try:
+        query = request.args.get('q', '')
+        group = request.args.get('group')
+        try:
+            k = int(request.args.get('k', 5))
+        except ValueError:
+            return jsonify({"success": False, "error": "k must be an integer"}), 400
+        if k < 1 or k > MAX_PASSAGE_RESULTS:
+            return jsonify({"success": False, "error": f"k must be between 1 and {MAX_PASSAGE_RESULTS}"}), 400
+        if not query.strip():
+            return jsonify({"success": False, "error": "q is required"}), 400
+        if not contract:
+            return jsonify({"success": False, "error": "Contract not initialized"})
+        
+        refresh_search_index()
+        return jsonify({"success": True, "data": kb_passages.search(query, k=k, group=group)})
+    
     except Exception as e:
         return jsonify({"success": False, "error": str(e)}), 500
 
 @app.route('/knowledge-base/ids', methods=['GET'])
+@conditional("knowledge_base")
 def get_all_knowledge_base_ids():
     """Get all knowledge base IDs"""
     try:
+        if read_from_index():
+            return jsonify({"success": True, "data": indexer.list_ids("knowledge_base")})
+        
         result = handle_call(contract.functions.getAllKnowledgeBaseIds)
         return jsonify(result)
     
     except Exception as e:
         return jsonify({"success": False, "error": str(e)}), 500
 
+@app.route('/knowledge-base/batch', methods=['POST'])
+def create_knowledge_base_batch():
+    """Create several knowledge base entries in one transaction"""
+    try:
+        data = request.get_json()
+        columns = batch_columns(
+            data.get('entries'), ('title', 'group', 'content'), ('title', 'content'),
+            "Title and content are required"
+        )
+        columns[-1] = [field_codec.encode("knowledge_base", content) for content in columns[-1]]
+        
+        result = handle_transaction(
+            contract.functions.createKnowledgeBaseBatch,
+            *columns,
+            on_receipt=created_ids("KnowledgeBaseCreated")
+        )
+        
+        return transaction_response(result)
+    
+    except ValueError as e:
+        return jsonify({"success": False, "error": str(e)}), 400
+    except Exception as e:
+        return jsonify({"success": False, "error": str(e)}), 500
+
+@app.route('/knowledge-base/batch', methods=['PUT'])
+def update_knowledge_base_batch():
+    """Update several knowledge base entries in one transaction"""
+    try:
+        data = request.get_json()
+        columns = batch_columns(
+            data.get('entries'), ('title', 'group', 'content'), ('title', 'content'),
+            "Title and content are required", with_id=True
+        )
+        columns[-1] = [field_codec.encode("knowledge_base", content) for content in columns[-1]]
+        
+        result = handle_transaction(
+            contract.functions.updateKnowledgeBaseBatch,
+            *columns
+        )
+        
+        return transaction_response(result)
+    
+    except ValueError as e:
+        return jsonify({"success": False, "error": str(e)}), 400
+    except Exception as e:
+        return jsonify({"success": False, "error": str(e)}), 500
+
 # Customer Endpoints
 
 @app.route('/customers', methods=['POST'])
@@ -321,7 +921,7 @@ def create_customer():
             name, email, phone
         )
         
-        return jsonify(result)
+        return transaction_response(result)
     
     except Exception as e:
         return jsonify({"success": False, "error": str(e)}), 500
@@ -343,7 +943,7 @@ def update_customer(customer_id):
             customer_id, name, email, phone
         )
         
-        return jsonify(result)
+        return transaction_response(result)
     
     except Exception as e:
         return jsonify({"success": False, "error": str(e)}), 500
@@ -357,15 +957,22 @@ def delete_customer(customer_id):
             customer_id
         )
         
-        return jsonify(result)
+        return transaction_response(result)
     
     except Exception as e:
         return jsonify({"success": False, "error": str(e)}), 500
 
 @app.route('/customers/<int:customer_id>', methods=['GET'])
+@conditional("customers")
 def get_customer(customer_id):
     """Get a customer by ID"""
     try:
+        if read_from_index():
+            record = indexer.get_entity("customers", customer_id)
+            if record is None:
+                return jsonify({"success": False, "error": "Customer does not exist"})
+            return jsonify({"success": True, "data": record})
+        
         result = handle_call(contract.functions.getCustomer, customer_id)
         
         if result["success"]:
@@ -384,10 +991,22 @@ def get_customer(customer_id):
         return jsonify({"success": False, "error": str(e)}), 500
 
 @app.route('/customers', methods=['GET'])
+@conditional("customers")
 def get_all_customers():
     """Get all customers"""
     try:
-        result = handle_call(contract.functions.getAllCustomers)
+        page = parse_page_request(request.args, ENTITIES["customers"]["fields"])
+        
+        ids = parse_ids(request.args)
+        if ndjson_requested():
+            return stream_entities("customers", page, ids)
+        if ids is not None:
+            return jsonify(get_entities_by_ids("customers", ids, page.fields))
+        
+        if read_from_index():
+            return jsonify(list_from_index("customers", page))
+        
+        result = handle_list_call("customers")
         
         if result["success"]:
             # Convert the tuple result to a structured response
@@ -404,21 +1023,72 @@ def get_all_customers():
             
             result["data"] = customers
         
-        return jsonify(result)
+        return jsonify(paginate_result(result, page))
     
+    except ValueError as e:
+        return jsonify({"success": False, "error": str(e)}), 400
     except Exception as e:
         return jsonify({"success": False, "error": str(e)}), 500
 
 @app.route('/customers/ids', methods=['GET'])
+@conditional("customers")
 def get_all_customer_ids():
     """Get all customer IDs"""
     try:
+        if read_from_index():
+            return jsonify({"success": True, "data": indexer.list_ids("customers")})
+        
         result = handle_call(contract.functions.getAllCustomerIds)
         return jsonify(result)
     
     except Exception as e:
         return jsonify({"success": False, "error": str(e)}), 500
 
+@app.route('/customers/batch', methods=['POST'])
+def create_customers_batch():
+    """Create several customers in one transaction"""
+    try:
+        data = request.get_json()
+        columns = batch_columns(
+            data.get('entries'), ('name', 'email', 'phone'), ('name', 'email'),
+            "Name and email are required"
+        )
+        
+        result = handle_transaction(
+            contract.functions.createCustomerBatch,
+            *columns,
+            on_receipt=created_ids("CustomerCreated")
+        )
+        
+        return transaction_response(result)
+    
+    except ValueError as e:
+        return jsonify({"success": False, "error": str(e)}), 400
+    except Exception as e:
+        return jsonify({"success": False, "error": str(e)}), 500
+
+@app.route('/customers/batch', methods=['PUT'])
+def update_customers_batch():
+    """Update several customers in one transaction"""
+    try:
+        data = request.get_json()
+        columns = batch_columns(
+            data.get('entries'), ('name', 'email', 'phone'), ('name', 'email'),
+            "Name and email are required", with_id=True
+        )
+        
+        result = handle_transaction(
+            contract.functions.updateCustomerBatch,
+            *columns
+        )
+        
+        return transaction_response(result)
+    
+    except ValueError as e:
+        return jsonify({"success": False, "error": str(e)}), 400
+    except Exception as e:
+        return jsonify({"success": False, "error": str(e)}), 500
+
 # Project Endpoints
 
 @app.route('/projects', methods=['POST'])
@@ -436,10 +1106,10 @@ def create_project():
         
         result = handle_transaction(
             contract.functions.createProject,
-            name, customer, status, details
+            name, customer, status, field_codec.encode("projects", details)
         )
         
-        return jsonify(result)
+        return transaction_response(result)
     
     except Exception as e:
         return jsonify({"success": False, "error": str(e)}), 500
@@ -459,10 +1129,10 @@ def update_project(project_id):
         
         result = handle_transaction(
             contract.functions.updateProject,
-            project_id, name, customer, status, details
+            project_id, name, customer, status, field_codec.encode("projects", details)
         )
         
-        return jsonify(result)
+        return transaction_response(result)
     
     except Exception as e:
         return jsonify({"success": False, "error": str(e)}), 500
@@ -476,15 +1146,22 @@ def delete_project(project_id):
             project_id
         )
         
-        return jsonify(result)
+        return transaction_response(result)
     
     except Exception as e:
         return jsonify({"success": False, "error": str(e)}), 500
 
 @app.route('/projects/<int:project_id>', methods=['GET'])
+@conditional("projects")
 def get_project(project_id):
     """Get a project by ID"""
     try:
+        if read_from_index():
+            record = indexer.get_entity("projects", project_id)
+            if record is None:
+                return jsonify({"success": False, "error": "Project does not exist"})
+            return jsonify({"success": True, "data": field_codec.decode("projects", [record])[0]})
+        
         result = handle_call(contract.functions.getProject, project_id)
         
         if result["success"]:
@@ -497,6 +1174,7 @@ def get_project(project_id):
                 "status": data[3],
                 "details": data[4]
             }
+            field_codec.decode("projects", [result["data"]])
         
         return jsonify(result)
     
@@ -504,10 +1182,30 @@ def get_project(project_id):
         return jsonify({"success": False, "error": str(e)}), 500
 
 @app.route('/projects', methods=['GET'])
+# Customers are part of the tag because ?expand=customer embeds them
+@conditional("projects", "customers")
 def get_all_projects_with_customer_info():
     """Get all projects with customer information"""
     try:
-        result = handle_call(contract.functions.getAllProjectsWithCustomerInformation)
+        page = parse_page_request(request.args, ENTITIES["projects"]["fields"])
+        expand = parse_expand(request.args, ("customer",))
+        if "customer" in expand and page.fields and "customer" not in page.fields:
+            raise ValueError("'expand=customer' needs the 'customer' field")
+        
+        ids = parse_ids(request.args)
+        if ndjson_requested():
+            return stream_entities("projects", page, ids, expand)
+        if ids is not None:
+            result = get_entities_by_ids("projects", ids, page.fields)
+            field_codec.decode("projects", result.get("data", []))
+            return jsonify(expand_projects(result, expand))
+        
+        if read_from_index():
+            result = list_from_index("projects", page)
+            field_codec.decode("projects", result["data"])
+            return jsonify(expand_projects(result, expand))
+        
+        result = handle_list_call("projects")
         
         if result["success"]:
             # Convert the tuple result to a structured response
@@ -525,27 +1223,92 @@ def get_all_projects_with_customer_info():
             
             result["data"] = projects
         
-        return jsonify(result)
+        result = paginate_result(result, page)
+        if result["success"]:
+            field_codec.decode("projects", result["data"])
+        return jsonify(expand_projects(result, expand))
     
+    except ValueError as e:
+        return jsonify({"success": False, "error": str(e)}), 400
     except Exception as e:
         return jsonify({"success": False, "error": str(e)}), 500
 
 @app.route('/projects/ids', methods=['GET'])
+@conditional("projects")
 def get_all_project_ids():
     """Get all project IDs"""
     try:
+        if read_from_index():
+            return jsonify({"success": True, "data": indexer.list_ids("projects")})
+        
         result = handle_call(contract.functions.getAllProjectIds)
         return jsonify(result)
     
     except Exception as e:
         return jsonify({"success": False, "error": str(e)}), 500
 
+@app.route('/projects/batch', methods=['POST'])
+def create_projects_batch():
+    """Create several projects in one transaction"""
+    try:
+        data = request.get_json()
+        columns = batch_columns(
+            data.get('entries'), ('name', 'customer', 'status', 'details'), ('name', 'customer'),
+            "Name and customer are required"
+        )
+        columns[-1] = [field_codec.encode("projects", details) for details in columns[-1]]
+        
+        result = handle_transaction(
+            contract.functions.createProjectBatch,
+            *columns,
+            on_receipt=created_ids("ProjectCreated")
+        )
+        
+        return transaction_response(result)
+    
+    except ValueError as e:
+        return jsonify({"success": False, "error": str(e)}), 400
+    except Exception as e:
+        return jsonify({"success": False, "error": str(e)}), 500
+
+@app.route('/projects/batch', methods=['PUT'])
+def update_projects_batch():
+    """Update several projects in one transaction"""
+    try:
+        data = request.get_json()
+        columns = batch_columns(
+            data.get('entries'), ('name', 'customer', 'status', 'details'), ('name', 'customer'),
+            "Name and customer are required", with_id=True
+        )
+        columns[-1] = [field_codec.encode("projects", details) for details in columns[-1]]
+        
+        result = handle_transaction(
+            contract.functions.updateProjectBatch,
+            *columns
+        )
+        
+        return transaction_response(result)
+    
+    except ValueError as e:
+        return jsonify({"success": False, "error": str(e)}), 400
+    except Exception as e:
+        return jsonify({"success": False, "error": str(e)}), 500
+
 # Utility Endpoints
 
 @app.route('/counts', methods=['GET'])
+@conditional("knowledge_base", "customers", "projects")
 def get_counts():
     """Get total counts of all entities"""
     try:
+        if read_from_index():
+            counts = indexer.counts()
+            return jsonify({"success": True, "data": {
+                "knowledge_base_count": counts["knowledge_base"],
+                "customer_count": counts["customers"],
+                "project_count": counts["projects"]
+            }})
+        
         result = handle_call(contract.functions.getCounts)
         
         if result["success"]:
@@ -577,8 +1340,93 @@ def get_contract_info():
         }
     })
 
+@app.route('/metrics', methods=['GET'])
+def get_metrics():
+    """Prometheus metrics in the text exposition format"""
+    body, content_type = metrics.render()
+    return Response(body, content_type=content_type)
+
+@app.route('/tx/<tx_hash>', methods=['GET'])
+def get_transaction_status(tx_hash):
+    """Get the status of a submitted transaction"""
+    try:
+        record = tx_tracker.get(tx_hash)
+        if record is None:
+            # Not submitted by this process (or evicted); ask the node directly
+            try:
+                record = receipt_to_dict(w3.eth.get_transaction_receipt(tx_hash))
+            except Exception:
+                try:
+                    # Sent by another worker and still in the mempool
+                    w3.eth.get_transaction(tx_hash)
+                    record = {"transaction_hash": tx_hash, "status": STATUS_PENDING}
+                except Exception:
+                    return jsonify({"success": False, "error": "Transaction not found"}), 404
+        
+        return jsonify({"success": True, "data": record})
+    
+    except Exception as e:
+        return jsonify({"success": False, "error": str(e)}), 500
+
 # Cal.com Scheduling Endpoints
 
+def fetch_free_slots(cal_api_key):
+    """Fetch schedules and bookings from Cal.com concurrently and merge them
+    
+    Returns (body, status_code). Bookings are appended to the schedule
+    payload as unavailable slots.
+    """
+    url = "https://api.cal.com/v2/schedules"
+    bookings_url = "https://api.cal.com/v2/bookings"
+    headers = {
+        "Content-Type": "application/json",
+        "Authorization": f"Bearer {cal_api_key}",
+        "cal-api-version": "2024-06-11"
+    }
+    
+    logger.info(f"Making request to Cal.com API: {url}")
+    logger.info(f"Using API key: {'*' * (len(cal_api_key) - 4)}{cal_api_key[-4:] if len(cal_api_key) > 4 else 'SHORT_KEY'}")
+    
+    # Both upstream calls run at the same time
+    schedules_future = cal_executor.submit(
+        metrics.observe_upstream, "cal.com", "schedules",
+        lambda: requests.get(url, headers=headers, timeout=Config.CAL_TIMEOUT)
+    )
+    bookings_future = cal_executor.submit(
+        metrics.observe_upstream, "cal.com", "bookings",
+        lambda: requests.get(bookings_url, headers=headers, timeout=Config.CAL_TIMEOUT)
+    )
+    
+    cal_response = schedules_future.result()
+    logger.info(f"Cal.com API response status: {cal_response.status_code}")
+    
+    if cal_response.status_code == 401:
+        return {
+            "error": "Unauthorized: Invalid Cal.com API key",
+            "status_code": 401,
+            "setup_info": "Please check your CAL_API_KEY environment variable. Get a valid key from https://app.cal.com/settings/developer/api-keys"
+        }, 401
+    
+    cal_response.raise_for_status()
+    
+    data = cal_response.json()
+    logger.info(f"Successfully fetched schedules: {len(data.get('data', []))} items")
+    
+    # fetch existing bookings
+    bookings_response = bookings_future.result()
+    
+    if bookings_response.status_code != 200:
+        logger.warning(f"Failed to fetch bookings: {bookings_response.status_code}")
+        return {
+            "error": f"Failed to fetch bookings, status code: {bookings_response.status_code}",
+            "schedules_data": data  # Still return schedule data even if bookings fail
+        }, 200  # Return 200 since schedules worked
+    
+    bookings_data = bookings_response.json()
+    logger.info(f"Successfully fetched bookings: {len(bookings_data.get('data', {}).get('bookings', []))} items")
+    
+    return merge_bookings(data, bookings_data), 200
+
 @app.route("/free-slots", methods=['GET', 'OPTIONS'])
 def get_free_slots():
     # Handle preflight OPTIONS request
@@ -600,78 +1448,30 @@ def get_free_slots():
         flask_response.headers.add("Access-Control-Allow-Headers", "*")
         flask_response.headers.add("Access-Control-Allow-Methods", "GET, OPTIONS")
         return flask_response, 400
-        
-    url = "https://api.cal.com/v2/schedules"
-    headers = {
-        "Content-Type": "application/json",
-        "Authorization": f"Bearer {cal_api_key}",
-        "cal-api-version": "2024-06-11"
-    }
     
     try:
-        logger.info(f"Making request to Cal.com API: {url}")
-        logger.info(f"Using API key: {'*' * (len(cal_api_key) - 4)}{cal_api_key[-4:] if len(cal_api_key) > 4 else 'SHORT_KEY'}")
-        
-        cal_response = requests.get(url, headers=headers)
-        logger.info(f"Cal.com API response status: {cal_response.status_code}")
-        
-        if cal_response.status_code == 401:
-            flask_response = make_response(jsonify({
-                "error": "Unauthorized: Invalid Cal.com API key",
-                "status_code": 401,
-                "setup_info": "Please check your CAL_API_KEY environment variable. Get a valid key from https://app.cal.com/settings/developer/api-keys"
-            }))
-            flask_response.headers.add("Access-Control-Allow-Origin", "*")
-            flask_response.headers.add("Access-Control-Allow-Headers", "*")
-            flask_response.headers.add("Access-Control-Allow-Methods", "GET, OPTIONS")
-            return flask_response, 401
-        
-        cal_response.raise_for_status()
-        
-        data = cal_response.json()
-        logger.info(f"Successfully fetched schedules: {len(data.get('data', []))} items")
+        # Serve from cache (stale entries are refreshed in the background)
+        cache_key = hashlib.sha256(cal_api_key.encode()).hexdigest()[:16]
+        (data, status_code), cache_status = free_slots_cache.get(
+            cache_key,
+            lambda: fetch_free_slots(cal_api_key),
+            cacheable=lambda result: result[1] == 200 and "error" not in result[0]
+        )
         
-        # fetch existing bookings
-        bookings_url = "https://api.cal.com/v2/bookings"
-        bookings_response = requests.get(bookings_url, headers=headers)
+        # Compute bookable slots when a range is requested
+        if status_code == 200 and "error" not in data and ('from' in request.args or 'to' in request.args):
+            try:
+                data = bookable_slots(data, request.args)
+            except ValueError as e:
+                data, status_code = {"error": str(e)}, 400
         
-        if bookings_response.status_code == 200:
-            bookings_data = bookings_response.json()
-            logger.info(f"Successfully fetched bookings: {len(bookings_data.get('data', {}).get('bookings', []))} items")
-            
-            # Safely process bookings
-            if 'data' in bookings_data and 'bookings' in bookings_data['data']:
-                for booking in bookings_data['data']['bookings']:
-                    # append unavailable slots to the data
-                    start = booking.get('startTime')
-                    end = booking.get('endTime')
-                    if start and end:
-                        # Ensure data structure exists
-                        if 'data' not in data:
-                            data['data'] = []
-                        # Append unavailable slots to the data
-                        data["data"].append({
-                            "start": start,
-                            "end": end,
-                            "type": "unavailable"
-                        })
-            
-            # Create response with proper CORS headers
-            flask_response = make_response(jsonify(data))
-            flask_response.headers.add("Access-Control-Allow-Origin", "*")
-            flask_response.headers.add("Access-Control-Allow-Headers", "*")
-            flask_response.headers.add("Access-Control-Allow-Methods", "GET, OPTIONS")
-            return flask_response
-        else:
-            logger.warning(f"Failed to fetch bookings: {bookings_response.status_code}")
-            flask_response = make_response(jsonify({
-                "error": f"Failed to fetch bookings, status code: {bookings_response.status_code}",
-                "schedules_data": data  # Still return schedule data even if bookings fail
-            }))
-            flask_response.headers.add("Access-Control-Allow-Origin", "*")
-            flask_response.headers.add("Access-Control-Allow-Headers", "*")
-            flask_response.headers.add("Access-Control-Allow-Methods", "GET, OPTIONS")
-            return flask_response, 200  # Return 200 since schedules worked
+        # Create response with proper CORS headers
+        flask_response = make_response(jsonify(data))
+        flask_response.headers.add("Access-Control-Allow-Origin", "*")
+        flask_response.headers.add("Access-Control-Allow-Headers", "*")
+        flask_response.headers.add("Access-Control-Allow-Methods", "GET, OPTIONS")
+        flask_response.headers["X-Cache"] = cache_status
+        return flask_response, status_code
             
     except requests.exceptions.RequestException as e:
         logger.error(f"Cal.com API Error: {e}")
@@ -770,12 +1570,17 @@ def create_new_schedule():
     
     try:
         logger.info(f"Creating booking for {payload['attendee']['name']} at {payload['start']}")
-        booking_response = requests.post(url, json=payload, headers=headers)
+        booking_response = metrics.observe_upstream(
+            "cal.com", "create_booking",
+            lambda: requests.post(url, json=payload, headers=headers, timeout=Config.CAL_TIMEOUT)
+        )
         logger.info(f"Booking API response status: {booking_response.status_code}")
         
         if booking_response.status_code == 201:
             booking_data = booking_response.json()
             logger.info("Booking created successfully")
+            # The new booking changes availability
+            free_slots_cache.invalidate()
             # Create response with proper CORS headers
             flask_response = make_response(jsonify(booking_data))
             flask_response.headers.add("Access-Control-Allow-Origin", "*")
@@ -805,8 +1610,7 @@ def create_new_schedule():
         flask_response.headers.add("Access-Control-Allow-Methods", "POST, OPTIONS")
         return flask_response, 500
 
-# Initialize contract on startup
-init_contract()
-
 if __name__ == '__main__':
+    # Development server; use gunicorn (see gunicorn.conf.py) for multi-worker serving
+    init_worker()
     app.run(debug=True, host='0.0.0.0', port=5000)
\ No newline at end of file
@@ -0,0 +1,1180 @@
+"""
+Asyncio serving mode for the SimplifiedNoForma API
+Built on Quart, AsyncWeb3 and aiohttp. Serves the routes of app.py with
+its response shapes, NDJSON streams, ETag / 304 responses and X-RPC-*
+headers, reading through the same per-block view cache and latency-aware
+provider pool. ?ids= lookups are sent as one JSON-RPC batch.
+
+Run with:  hypercorn async_app:app --bind 0.0.0.0:5000
+"""
+
+import asyncio
+import contextvars
+import hashlib
+import itertools
+import json
+import logging
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+from functools import wraps
+
+import aiohttp
+from quart import Quart, Response, g, request, jsonify, make_response
+from quart_cors import cors
+from web3 import AsyncWeb3, Web3
+from web3.logs import DISCARD
+
+import metrics
+import rpc_trace
+from abi import contract_abi
+from blob_store import BlobStore
+from config import Config
+from text_codec import FieldCodec
+from fee_cache import GasPriceCache, GasEstimateModel
+from indexer import ContractIndexer, ENTITIES
+from nonce_manager import AsyncNonceManager, is_nonce_error
+from page_reader import PageReader, merge_pages
+from pagination import parse_page_request, paginate_records, page_response, parse_ids, parse_expand, project
+from passage_index import PassageIndex, MAX_PASSAGE_RESULTS
+from payloads import (
+    batch_columns, merge_bookings, bookable_slots, record_from_output, records_from_columns, join_customers,
+    is_revert, view_batch, view_batch_outputs
+)
+from provider_pool import AsyncProviderPool, ProviderPool
+from search_index import InvertedIndex, MAX_SEARCH_RESULTS
+from search_views import SearchViews, receipt_changes
+from tx_tracker import TransactionTracker, receipt_to_dict
+from ttl_cache import TTLCache
+from view_cache import ViewCallCache
+
+# Configure logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+app = cors(Quart(__name__), allow_origin="*")  # Enable CORS for all routes
+
+# Per-entity route settings; mirrors the explicit routes in app.py
+ENTITY_ROUTES = {
+    "knowledge_base": {
+        "path": "/knowledge-base",
+        "fields": ('title', 'group', 'content'),
+        "required": ('title', 'content'),
+        "error": "Title and content are required",
+        "contract": "KnowledgeBase",
+        "ids_function": "getAllKnowledgeBaseIds",
+        "missing": "Knowledge base entry does not exist",
+    },
+    "customers": {
+        "path": "/customers",
+        "fields": ('name', 'email', 'phone'),
+        "required": ('name', 'email'),
+        "error": "Name and email are required",
+        "contract": "Customer",
+        "ids_function": "getAllCustomerIds",
+        "missing": "Customer does not exist",
+    },
+    "projects": {
+        "path": "/projects",
+        "fields": ('name', 'customer', 'status', 'details'),
+        "required": ('name', 'customer'),
+        "error": "Name and customer are required",
+        "contract": "Project",
+        "ids_function": "getAllProjectIds",
+        "missing": "Project does not exist",
+        "expand": ("customer",),
+    },
+}
+
+NDJSON_MIMETYPE = "application/x-ndjson"
+# Records per chunk written to the socket when streaming NDJSON
+NDJSON_CHUNK_SIZE = 100
+
+# Global variables, set up in startup()
+w3 = None
+provider_pool = None
+contract = None
+indexer = None
+cal_session = None
+CONTRACT_ABI = contract_abi
+nonce_manager = AsyncNonceManager(None)
+tx_tracker = TransactionTracker(
+    None, poll=False, on_settle=lambda tx_hash: metrics.TRANSACTIONS_IN_FLIGHT.dec()
+)
+gas_price_cache = GasPriceCache(None, block_time=Config.BLOCK_TIME)
+gas_estimate_model = GasEstimateModel()
+view_cache = ViewCallCache(
+    None, max_entries=Config.VIEW_CACHE_SIZE, max_bytes=int(Config.VIEW_CACHE_MAX_MB * 1024 * 1024),
+    block_poll=Config.VIEW_CACHE_BLOCK_POLL,
+    on_lookup=lambda result: metrics.VIEW_CACHE_LOOKUPS.labels(result).inc()
+)
+free_slots_cache = TTLCache(Config.FREE_SLOTS_TTL, Config.FREE_SLOTS_STALE_TTL)
+# Knows which contracts have the getXPage views; also reads pages for the indexer
+page_reader = PageReader(page_size=Config.LIST_PAGE_SIZE, max_workers=Config.LIST_PAGE_WORKERS)
+blob_store = BlobStore(Config.BLOB_STORE_DIR) if Config.BLOB_STORE_DIR else None
+field_codec = FieldCodec(compress=Config.TEXT_COMPRESSION, blob_store=blob_store)
+kb_search = InvertedIndex()
+kb_passages = PassageIndex()
+# Both are fed from the same knowledge base entries
+search_views = SearchViews(field_codec, kb_search, kb_passages)
+# Serializes loading from the chain and applying receipts
+search_lock = asyncio.Lock()
+background_tasks = set()
+
+
+async def create_web3_instance():
+    """Create AsyncWeb3 instance backed by a latency-aware provider pool"""
+    pool = AsyncProviderPool(
+        [Config.WEB3_PROVIDER_URL] + Config.PROVIDER_URLS,
+        timeout=Config.RPC_TIMEOUT
+    )
+    chain_id = await pool.pin_chain()
+    if chain_id is None:
+        logger.error("All provider connections failed. Requests will keep retrying the pool.")
+    else:
+        logger.info(f"Successfully connected to Web3 provider: {pool.active_url()}")
+    instance = AsyncWeb3(pool)
+    instance.middleware_onion.add(metrics.async_rpc_metrics_middleware, 'metrics')
+    instance.middleware_onion.add(rpc_trace.async_rpc_trace_middleware, 'rpc_trace')
+    return instance, pool
+
+
+async def init_contract():
+    """Initialize the contract instance and the background indexer"""
+    global contract, indexer
+    if indexer:
+        indexer.stop()
+        indexer = None
+    # Reload search entries on next use
+    search_views.reset()
+    view_cache.invalidate()
+    try:
+        if Config.CONTRACT_ADDRESS and CONTRACT_ABI:
+            contract = w3.eth.contract(address=Config.CONTRACT_ADDRESS, abi=CONTRACT_ABI)
+            logger.info(f"Contract initialized at address: {Config.CONTRACT_ADDRESS}")
+        else:
+            logger.warning("Contract address or ABI not configured")
+            return
+    except Exception as e:
+        logger.error(f"Failed to initialize contract: {str(e)}")
+        return
+
+    try:
+        code = await w3.eth.get_code(contract.address)
+    except Exception as e:
+        logger.warning(f"Could not read the code at {contract.address}, lists use the getAll* views: {str(e)}")
+    else:
+        page_reader.detect(contract, [spec["page"] for spec in ENTITIES.values()], code=code)
+
+    if Config.INDEXER_ENABLED:
+        try:
+            # The indexer runs on its own thread with a synchronous client,
+            # over a pool of the same providers pinned to the same chain
+            sync_pool = ProviderPool(
+                [Config.WEB3_PROVIDER_URL] + Config.PROVIDER_URLS,
+                timeout=Config.RPC_TIMEOUT
+            )
+            sync_pool.chain_id = provider_pool.chain_id
+            sync_w3 = Web3(sync_pool)
+            sync_contract = sync_w3.eth.contract(address=Config.CONTRACT_ADDRESS, abi=CONTRACT_ABI)
+            indexer = ContractIndexer(
+                sync_w3, sync_contract, Config.INDEX_DB_PATH,
+                poll_interval=Config.INDEXER_POLL_INTERVAL,
+                confirmations=Config.INDEXER_CONFIRMATIONS,
+                page_reader=page_reader
+            )
+            indexer.start()
+        except Exception as e:
+            logger.error(f"Failed to start indexer: {str(e)}")
+
+
+@app.before_serving
+async def startup():
+    global w3, provider_pool, cal_session
+    w3, provider_pool = await create_web3_instance()
+    for component in (nonce_manager, tx_tracker, gas_price_cache, view_cache):
+        component.w3 = w3
+    cal_session = aiohttp.ClientSession(timeout=aiohttp.ClientTimeout(total=Config.CAL_TIMEOUT))
+    await init_contract()
+
+
+@app.after_serving
+async def shutdown():
+    if indexer:
+        indexer.stop()
+    if cal_session:
+        await cal_session.close()
+    if provider_pool:
+        await provider_pool.close()
+
+
+@app.before_request
+async def start_request_timer():
+    g.request_started = time.perf_counter()
+    g.rpc_trace = rpc_trace.start_trace()
+
+
+@app.after_request
+async def record_request_metrics(response):
+    if 'request_started' not in g:
+        return response
+    duration = time.perf_counter() - g.request_started
+    route = request.url_rule.rule if request.url_rule else "unmatched"
+    metrics.HTTP_LATENCY.labels(request.method, route).observe(duration)
+    metrics.HTTP_REQUESTS.labels(request.method, route, str(response.status_code)).inc()
+
+    trace = g.rpc_trace
+    response.headers["X-RPC-Calls"] = str(trace.count)
+    response.headers["X-RPC-Time-Ms"] = f"{trace.total_ms:.1f}"
+    if Config.SLOW_REQUEST_MS and duration * 1000 >= Config.SLOW_REQUEST_MS:
+        logger.warning("Slow request " + json.dumps({
+            "method": request.method,
+            "path": request.path,
+            "route": route,
+            "status": response.status_code,
+            "duration_ms": round(duration * 1000, 1),
+            "rpc_calls": trace.count,
+            "rpc_time_ms": round(trace.total_ms, 1),
+            "calls": trace.breakdown(),
+        }))
+    return response
+
+
+@app.teardown_request
+async def end_request_trace(exc):
+    rpc_trace.end_trace()
+
+
+def read_from_index():
+    """Check whether GET endpoints can be served from the local index"""
+    return indexer is not None and indexer.ready
+
+
+def async_requested():
+    """Check whether the current write should return before the receipt"""
+    flag = request.args.get('async')
+    if flag is None:
+        return Config.ASYNC_TRANSACTIONS
+    return flag.lower() in ('1', 'true', 'yes')
+
+
+def transaction_response(result):
+    """Build the HTTP response for a handle_transaction result"""
+    if result.get("status") == "pending":
+        return jsonify(result), 202
+    return jsonify(result)
+
+
+def created_ids(event_name):
+    """Build an on_receipt hook that reports the IDs of created entities"""
+    def extract(receipt):
+        events = getattr(contract.events, event_name)().process_receipt(receipt, errors=DISCARD)
+        return {"ids": [event.args.id for event in events]}
+    return extract
+
+
+def spawn(coroutine):
+    """Run a coroutine in the background and keep a reference until it ends
+
+    The task does not inherit the request's RPC trace, as background threads
+    in app.py don't.
+    """
+    context = contextvars.copy_context()
+    context.run(rpc_trace.end_trace)
+    task = asyncio.get_running_loop().create_task(coroutine, context=context)
+    background_tasks.add(task)
+    task.add_done_callback(background_tasks.discard)
+
+
+async def confirm_transaction(tx_hash):
+    """Await a receipt for the async write mode and record the outcome"""
+    try:
+        receipt = await w3.eth.wait_for_transaction_receipt(tx_hash, timeout=tx_tracker.timeout)
+    except Exception as e:
+        tx_tracker.record_failure(tx_hash, str(e))
+        return
+    tx_tracker.record_receipt(receipt)
+    await update_search_from_receipt(receipt)
+
+
+async def handle_transaction(tx_function, *args, on_receipt=None):
+    """Handle contract transactions with proper error handling"""
+    try:
+        if not contract:
+            return {"success": False, "error": "Contract not initialized"}
+
+        # Build transaction
+        tx = tx_function(*args)
+
+        # Use a learned gas estimate when confident, otherwise ask the node
+        calldata_size = len(contract.encodeABI(fn_name=tx.fn_name, args=tx.args))
+        gas_estimate = None
+        if Config.GAS_ESTIMATE_CACHE:
+            gas_estimate = gas_estimate_model.predict(tx.fn_name, calldata_size)
+        if gas_estimate is None:
+            gas_estimate = await tx.estimate_gas({'from': Config.FROM_ADDRESS})
+            gas_estimate_model.record_estimate(tx.fn_name, calldata_size, gas_estimate)
+
+        # Reserve a nonce locally so concurrent writes don't collide
+        nonce = await nonce_manager.allocate(Config.FROM_ADDRESS)
+        try:
+            tx_dict = await tx.build_transaction({
+                'from': Config.FROM_ADDRESS,
+                'nonce': nonce,
+                'gas': gas_estimate,
+                'gasPrice': await gas_price_cache.async_gas_price(),
+            })
+            signed_tx = w3.eth.account.sign_transaction(tx_dict, Config.PRIVATE_KEY)
+            tx_hash = await w3.eth.send_raw_transaction(signed_tx.rawTransaction)
+        except Exception as e:
+            if is_nonce_error(e):
+                nonce_manager.resync(Config.FROM_ADDRESS)
+            else:
+                nonce_manager.release(Config.FROM_ADDRESS, nonce)
+            if 'underpriced' in str(e).lower():
+                gas_price_cache.invalidate()
+            raise
+        metrics.TRANSACTIONS_IN_FLIGHT.inc()
+        view_cache.invalidate()
+
+        def after_receipt(receipt):
+            metrics.GAS_USED.labels(tx.fn_name).observe(receipt.gasUsed)
+            gas_estimate_model.record(tx.fn_name, calldata_size, receipt, tx_dict['gas'])
+            gas_price_cache.note_block(receipt.blockNumber)
+            # Reads cached while the write was pending predate it
+            view_cache.note_block(receipt.blockNumber)
+            view_cache.invalidate()
+            if indexer:
+                indexer.request_sync()
+
+        # In async mode the receipt is awaited by a background task
+        if async_requested():
+            record = tx_tracker.track(tx_hash, tx.fn_name, on_receipt=after_receipt)
+            spawn(confirm_transaction(tx_hash))
+            return {
+                "success": True,
+                "status": record["status"],
+                "transaction_hash": record["transaction_hash"],
+                "status_url": f"/tx/{record['transaction_hash']}"
+            }
+
+        # Wait for confirmation without blocking other requests
+        try:
+            receipt = await w3.eth.wait_for_transaction_receipt(tx_hash)
+        finally:
+            metrics.TRANSACTIONS_IN_FLIGHT.dec()
+        after_receipt(receipt)
+        await update_search_from_receipt(receipt)
+        await catch_up_index(receipt.blockNumber)
+
+        result = {
+            "success": receipt.status == 1,
+            "transaction_hash": receipt.transactionHash.hex(),
+            "block_number": receipt.blockNumber,
+            "gas_used": receipt.gasUsed
+        }
+        if receipt.status != 1:
+            result["error"] = "Transaction reverted"
+        elif on_receipt:
+            result.update(on_receipt(receipt))
+
+        return result
+
+    except Exception as e:
+        logger.error(f"Transaction failed: {str(e)}")
+        return {"success": False, "error": str(e)}
+
+
+async def catch_up_index(block_number):
+    """Index a write's block before responding, so reads served from the index see it"""
+    if not indexer:
+        return
+    try:
+        await asyncio.to_thread(indexer.catch_up, block_number)
+    except Exception as e:
+        logger.warning(f"Index catch-up to block {block_number} failed: {str(e)}")
+
+
+async def refresh_search_index():
+    """Bring the knowledge base search index up to date"""
+    async with search_lock:
+        if read_from_index():
+            await asyncio.to_thread(search_views.sync_index, indexer)
+        elif search_views.source != "chain":
+            records = records_from_columns("knowledge_base", await read_list("knowledge_base"))
+            await asyncio.to_thread(search_views.load_chain, records)
+
+
+async def update_search_from_receipt(receipt):
+    """Apply knowledge base events of a mined write to a chain-loaded search index"""
+    if receipt.status != 1 or search_views.source != "chain":
+        return
+    async with search_lock:
+        for entity_id, deleted in receipt_changes(contract, receipt):
+            if deleted:
+                search_views.remove(entity_id)
+                continue
+            try:
+                output = await contract.functions.getKnowledgeBase(entity_id).call(
+                    block_identifier=receipt.blockNumber
+                )
+            except Exception:
+                # Deleted again later in the same block
+                search_views.remove(entity_id)
+                continue
+            await asyncio.to_thread(search_views.add, entity_id, record_from_output("knowledge_base", output))
+
+
+async def handle_call(call_function, *args):
+    """Handle contract calls with proper error handling"""
+    try:
+        if not contract:
+            return {"success": False, "error": "Contract not initialized"}
+
+        result = await view_cache.async_call(call_function.fn_name, args, lambda: call_function(*args).call())
+        return {"success": True, "data": result}
+
+    except Exception as e:
+        logger.error(f"Call failed: {str(e)}")
+        return {"success": False, "error": str(e)}
+
+
+async def read_list(entity):
+    """Every row of an entity from the contract, in the column shape of its getAll* view"""
+    return await view_cache.async_call(ENTITIES[entity]["list"], (), lambda: read_pages(entity))
+
+
+async def read_pages(entity):
+    """Read an entity list, through its getXPage views when the contract has them
+
+    Mirrors PageReader: the first page gives the total, the rest are read
+    concurrently, all at the same block.
+    """
+    spec = ENTITIES[entity]
+    size = Config.LIST_PAGE_SIZE
+    if not page_reader.paged(contract.address):
+        return await getattr(contract.functions, spec["list"])().call()
+    block_number = await w3.eth.block_number
+    limit = asyncio.Semaphore(max(Config.LIST_PAGE_WORKERS, 1))
+
+    async def fetch(offset):
+        async with limit:
+            return await getattr(contract.functions, spec["page"])(offset, size).call(
+                block_identifier=block_number
+            )
+
+    first = await fetch(0)
+    rest = await asyncio.gather(*(fetch(offset) for offset in range(size, first[-1], size)))
+    return merge_pages([first, *rest])
+
+
+async def load_customers():
+    """Every customer record, from the local index or the contract"""
+    if read_from_index():
+        return await asyncio.to_thread(indexer.list_entities, "customers")
+    return records_from_columns("customers", await read_list("customers"))
+
+
+async def handle_list_call(entity):
+    """Read a whole entity list from the contract with proper error handling"""
+    try:
+        if not contract:
+            return {"success": False, "error": "Contract not initialized"}
+
+        return {"success": True, "data": await read_list(entity)}
+
+    except Exception as e:
+        logger.error(f"Call failed: {str(e)}")
+        return {"success": False, "error": str(e)}
+
+
+def ndjson_requested():
+    """Check whether the client asked for a newline-delimited JSON stream"""
+    best = request.accept_mimetypes.best_match(["application/json", NDJSON_MIMETYPE])
+    return best == NDJSON_MIMETYPE
+
+
+def ndjson_response(entity, chunks):
+    """Stream records as one JSON object per line
+
+    chunks is an async iterator of record lists, decoded and written one
+    at a time. An error after the first line can no longer change the
+    status code; it is reported as a final {"success": false} line.
+    """
+    # One encoder with the app's JSON settings, instead of one per line
+    encode = json.JSONEncoder(
+        sort_keys=app.json.sort_keys, ensure_ascii=app.json.ensure_ascii, default=app.json.default
+    ).encode
+
+    async def generate():
+        try:
+            async for records in chunks:
+                await asyncio.to_thread(field_codec.decode, entity, records)
+                yield "".join(encode(record) + "\n" for record in records)
+        except Exception as e:
+            logger.error(f"Streaming {entity} failed: {str(e)}")
+            yield encode({"success": False, "error": str(e)}) + "\n"
+    return Response(generate(), mimetype=NDJSON_MIMETYPE)
+
+
+async def chunked(records):
+    for start in range(0, len(records), NDJSON_CHUNK_SIZE):
+        yield records[start:start + NDJSON_CHUNK_SIZE]
+
+
+async def index_chunks(entity, page):
+    """Chunks of indexer.iter_entities()
+
+    The stream holds one SQLite connection and read transaction, so every
+    chunk is read on the same thread.
+    """
+    rows = indexer.iter_entities(entity, page.fields, page.offset, page.limit, page.cursor)
+    executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="ndjson")
+    loop = asyncio.get_running_loop()
+    try:
+        while True:
+            records = await loop.run_in_executor(executor, list, itertools.islice(rows, NDJSON_CHUNK_SIZE))
+            if not records:
+                return
+            yield records
+    finally:
+        await loop.run_in_executor(executor, rows.close)
+        executor.shutdown(wait=False)
+
+
+async def with_customers(chunks, customers):
+    async for records in chunks:
+        yield list(join_customers(records, customers))
+
+
+def conditional(*entities):
+    """Tag responses with a strong ETag of the indexed state of entities
+
+    A request whose If-None-Match holds the current tag gets an empty 304
+    without running the view, so an unchanged poll costs one local SQLite
+    query and no RPC. Only applies while the local index is ready, since
+    its change log is what versions the state.
+    """
+    def decorator(view):
+        @wraps(view)
+        async def wrapper(*args, **kwargs):
+            if not read_from_index():
+                return await view(*args, **kwargs)
+            representation = NDJSON_MIMETYPE if ndjson_requested() else "application/json"
+            version = await asyncio.to_thread(indexer.state_version, entities)
+            etag = hashlib.sha256(f"{version}|{representation}".encode()).hexdigest()[:32]
+            if request.if_none_match.contains_weak(etag):
+                response = Response("", status=304)
+            else:
+                response = await make_response(await view(*args, **kwargs))
+                if response.status_code != 200:
+                    return response
+            response.set_etag(etag)
+            response.headers["Cache-Control"] = "no-cache"
+            response.vary.add("Accept")
+            return response
+        return wrapper
+    return decorator
+
+
+async def stream_entities(entity, page, ids=None, expand=()):
+    """Serve a list endpoint as NDJSON from the local index or the contract"""
+    if ids is not None:
+        result = await get_entities_by_ids(entity, ids, page.fields)
+        if not result["success"]:
+            return jsonify(result)
+        chunks = chunked(result["data"])
+    elif read_from_index():
+        chunks = index_chunks(entity, page)
+    else:
+        if not contract:
+            return jsonify({"success": False, "error": "Contract not initialized"})
+        records = records_from_columns(entity, await read_list(entity))
+        if page.active:
+            records, _, _ = paginate_records(records, page)
+        chunks = chunked(records)
+
+    if "customer" in expand:
+        chunks = with_customers(chunks, await load_customers())
+    return ndjson_response(entity, chunks)
+
+
+@app.route('/', methods=['GET'])
+async def health_check():
+    """Health check endpoint"""
+    try:
+        is_connected = await w3.is_connected()
+        network_info = {}
+
+        if is_connected:
+            try:
+                network_id, latest_block, gas_price, chain_id = await asyncio.gather(
+                    w3.net.version, w3.eth.block_number, w3.eth.gas_price, w3.eth.chain_id
+                )
+                network_info = {
+                    "network_id": network_id,
+                    "latest_block": latest_block,
+                    "gas_price": gas_price,
+                    "chain_id": chain_id
+                }
+            except Exception as e:
+                network_info = {"error": f"Failed to get network info: {str(e)}"}
+
+        return jsonify({
+            "status": "healthy",
+            "web3_connected": is_connected,
+            "active_provider": provider_pool.active_url(),
+            "providers": provider_pool.status(),
+            "contract_initialized": contract is not None,
+            "contract_address": Config.CONTRACT_ADDRESS,
+            "network_info": network_info,
+            "indexer": indexer.status() if indexer else None,
+            "view_cache": view_cache.status()
+        })
+    except Exception as e:
+        return jsonify({
+            "status": "error",
+            "error": str(e),
+            "web3_connected": False,
+            "contract_initialized": False
+        }), 500
+
+
+@app.route('/config', methods=['POST'])
+async def update_config():
+    """Update contract configuration"""
+    global CONTRACT_ABI
+    try:
+        data = await request.get_json()
+
+        if 'contract_address' in data:
+            Config.CONTRACT_ADDRESS = data['contract_address']
+        if 'private_key' in data:
+            Config.PRIVATE_KEY = data['private_key']
+        if 'from_address' in data:
+            Config.FROM_ADDRESS = data['from_address']
+            nonce_manager.reset()
+        if 'contract_abi' in data:
+            CONTRACT_ABI = data['contract_abi']
+
+        await init_contract()
+
+        return jsonify({"success": True, "message": "Configuration updated"})
+
+    except Exception as e:
+        return jsonify({"success": False, "error": str(e)})
+
+
+# Entity endpoints (knowledge base, customers, projects)
+
+def entity_handlers(entity, spec):
+    """Build the CRUD handlers for one entity"""
+    contract_name = spec["contract"]
+
+    async def encode(values):
+        """Compress or offload the text field of a row of values (or of a batch's columns)"""
+        return await asyncio.to_thread(field_codec.encode_values, entity, spec["fields"], values)
+
+    async def decode(records):
+        return await asyncio.to_thread(field_codec.decode, entity, records)
+
+    async def expand_records(result, expand):
+        """Embed related records named in ?expand= into a list result"""
+        if "customer" in expand and result["success"]:
+            result["data"] = list(join_customers(result["data"], await load_customers()))
+        return result
+
+    async def create():
+        try:
+            data = await request.get_json()
+            values = [data.get(field, '') for field in spec["fields"]]
+            if any(not data.get(field) for field in spec["required"]):
+                return jsonify({"success": False, "error": spec["error"]}), 400
+
+            result = await handle_transaction(
+                getattr(contract.functions, f"create{contract_name}"), *await encode(values)
+            )
+            return transaction_response(result)
+        except Exception as e:
+            return jsonify({"success": False, "error": str(e)}), 500
+
+    async def update(entity_id):
+        try:
+            data = await request.get_json()
+            values = [data.get(field, '') for field in spec["fields"]]
+            if any(not data.get(field) for field in spec["required"]):
+                return jsonify({"success": False, "error": spec["error"]}), 400
+
+            result = await handle_transaction(
+                getattr(contract.functions, f"update{contract_name}"), entity_id, *await encode(values)
+            )
+            return transaction_response(result)
+        except Exception as e:
+            return jsonify({"success": False, "error": str(e)}), 500
+
+    async def delete(entity_id):
+        try:
+            result = await handle_transaction(
+                getattr(contract.functions, f"delete{contract_name}"), entity_id
+            )
+            return transaction_response(result)
+        except Exception as e:
+            return jsonify({"success": False, "error": str(e)}), 500
+
+    async def get_one(entity_id):
+        try:
+            if read_from_index():
+                record = await asyncio.to_thread(indexer.get_entity, entity, entity_id)
+                if record is None:
+                    return jsonify({"success": False, "error": spec["missing"]})
+                return jsonify({"success": True, "data": (await decode([record]))[0]})
+
+            result = await handle_call(getattr(contract.functions, ENTITIES[entity]["getter"]), entity_id)
+            if result["success"]:
+                result["data"] = (await decode([record_from_output(entity, result["data"])]))[0]
+            return jsonify(result)
+        except Exception as e:
+            return jsonify({"success": False, "error": str(e)}), 500
+
+    async def get_all():
+        try:
+            page = parse_page_request(request.args, ENTITIES[entity]["fields"])
+            expand = parse_expand(request.args, spec.get("expand", ()))
+            if "customer" in expand and page.fields and "customer" not in page.fields:
+                raise ValueError("'expand=customer' needs the 'customer' field")
+
+            ids = parse_ids(request.args)
+            if ndjson_requested():
+                return await stream_entities(entity, page, ids, expand)
+            if ids is not None:
+                result = await get_entities_by_ids(entity, ids, page.fields)
+                await decode(result.get("data", []))
+                return jsonify(await expand_records(result, expand))
+
+            if read_from_index():
+                if not page.active:
+                    records = await asyncio.to_thread(indexer.list_entities, entity)
+                    result = {"success": True, "data": await decode(records)}
+                    return jsonify(await expand_records(result, expand))
+                (records, has_more), total = await asyncio.gather(
+                    asyncio.to_thread(indexer.query_entities, entity, page.fields,
+                                      page.offset, page.limit, page.cursor),
+                    asyncio.to_thread(indexer.count, entity)
+                )
+                result = page_response(await decode(records), page, total, has_more)
+                return jsonify(await expand_records(result, expand))
+
+            result = await handle_list_call(entity)
+            if result["success"]:
+                result["data"] = records_from_columns(entity, result["data"])
+                if page.active:
+                    records, total, has_more = paginate_records(result["data"], page)
+                    result = page_response(records, page, total, has_more)
+                await decode(result["data"])
+            return jsonify(await expand_records(result, expand))
+        except ValueError as e:
+            return jsonify({"success": False, "error": str(e)}), 400
+        except Exception as e:
+            return jsonify({"success": False, "error": str(e)}), 500
+
+    async def get_ids():
+        try:
+            if read_from_index():
+                return jsonify({"success": True, "data": await asyncio.to_thread(indexer.list_ids, entity)})
+            return jsonify(await handle_call(getattr(contract.functions, spec["ids_function"])))
+        except Exception as e:
+            return jsonify({"success": False, "error": str(e)}), 500
+
+    async def create_batch():
+        try:
+            data = await request.get_json()
+            columns = batch_columns(data.get('entries'), spec["fields"], spec["required"], spec["error"])
+            result = await handle_transaction(
+                getattr(contract.functions, f"create{contract_name}Batch"), *await encode(columns),
+                on_receipt=created_ids(f"{contract_name}Created")
+            )
+            return transaction_response(result)
+        except ValueError as e:
+            return jsonify({"success": False, "error": str(e)}), 400
+        except Exception as e:
+            return jsonify({"success": False, "error": str(e)}), 500
+
+    async def update_batch():
+        try:
+            data = await request.get_json()
+            columns = batch_columns(
+                data.get('entries'), spec["fields"], spec["required"], spec["error"], with_id=True
+            )
+            result = await handle_transaction(
+                getattr(contract.functions, f"update{contract_name}Batch"), *await encode(columns)
+            )
+            return transaction_response(result)
+        except ValueError as e:
+            return jsonify({"success": False, "error": str(e)}), 400
+        except Exception as e:
+            return jsonify({"success": False, "error": str(e)}), 500
+
+    path = spec["path"]
+    # Expanded lists also change with the records they embed
+    list_entities = (entity, "customers") if "customer" in spec.get("expand", ()) else (entity,)
+    return [
+        (path, 'POST', create),
+        (f"{path}/<int:entity_id>", 'PUT', update),
+        (f"{path}/<int:entity_id>", 'DELETE', delete),
+        (f"{path}/<int:entity_id>", 'GET', conditional(entity)(get_one)),
+        (path, 'GET', conditional(*list_entities)(get_all)),
+        (f"{path}/ids", 'GET', conditional(entity)(get_ids)),
+        (f"{path}/batch", 'POST', create_batch),
+        (f"{path}/batch", 'PUT', update_batch),
+    ]
+
+
+async def handle_batch_call(fn_name, arg_lists):
+    """Run one contract view per argument list in a single JSON-RPC batch
+
+    Returns the decoded outputs in order, with None for calls that reverted
+    (e.g. an ID that does not exist). Any other error (rate limits, node
+    failures) raises ConnectionError, so it is not mistaken for a missing
+    entity.
+    """
+    calls, output_types = view_batch(contract, fn_name, arg_lists)
+
+    if hasattr(w3.provider, 'make_batch_request'):
+        start = time.perf_counter()
+        responses = await w3.provider.make_batch_request(calls)
+        duration = time.perf_counter() - start
+        metrics.observe_batch("eth_call", responses, duration)
+        trace = rpc_trace.current_trace()
+        if trace:
+            trace.record(f"batch[eth_call x{len(calls)}]", duration)
+    else:
+        # Providers without batch support get one concurrent request per call
+        async def send(method, params):
+            try:
+                return await w3.provider.make_request(method, params)
+            except Exception as e:
+                # Some providers raise on reverts instead of returning an error
+                if not is_revert(str(e)):
+                    raise
+                return {"error": {"message": str(e)}}
+        responses = await asyncio.gather(*(send(method, params) for method, params in calls))
+
+    return view_batch_outputs(w3.codec, fn_name, output_types, responses)
+
+
+async def get_entities_by_ids(entity, ids, fields):
+    """Look up several entities by ID from the index or a batched eth_call"""
+    if read_from_index():
+        found = await asyncio.to_thread(indexer.get_entities, entity, ids, fields)
+    else:
+        if not contract:
+            return {"success": False, "error": "Contract not initialized"}
+        getter = ENTITIES[entity]["getter"]
+        outputs = await view_cache.async_call(
+            f"batch:{getter}", ids, lambda: handle_batch_call(getter, [[entity_id] for entity_id in ids])
+        )
+        found = {
+            entity_id: project(record_from_output(entity, output), fields)
+            for entity_id, output in zip(ids, outputs) if output is not None
+        }
+
+    return {
+        "success": True,
+        "data": [found[entity_id] for entity_id in ids if entity_id in found],
+        "missing": [entity_id for entity_id in ids if entity_id not in found]
+    }
+
+
+for entity_name, entity_spec in ENTITY_ROUTES.items():
+    for rule, method, handler in entity_handlers(entity_name, entity_spec):
+        app.add_url_rule(rule, f"{entity_name}_{handler.__name__}", handler, methods=[method])
+
+
+@app.route('/knowledge-base/search', methods=['GET'])
+@conditional("knowledge_base")
+async def search_knowledge_base():
+    """Keyword search over knowledge base titles, groups and content"""
+    try:
+        query = request.args.get('q', '')
+        group = request.args.get('group')
+        try:
+            limit = int(request.args.get('limit', 20))
+        except ValueError:
+            return jsonify({"success": False, "error": "limit must be an integer"}), 400
+        if limit < 1 or limit > MAX_SEARCH_RESULTS:
+            return jsonify({"success": False, "error": f"limit must be between 1 and {MAX_SEARCH_RESULTS}"}), 400
+        if not query.strip() and group is None:
+            return jsonify({"success": False, "error": "q or group is required"}), 400
+        if not contract:
+            return jsonify({"success": False, "error": "Contract not initialized"})
+
+        await refresh_search_index()
+        data = await asyncio.to_thread(kb_search.search, query, group=group, limit=limit)
+        return jsonify({"success": True, "data": data})
+    except Exception as e:
+        return jsonify({"success": False, "error": str(e)}), 500
+
+
+@app.route('/knowledge-base/passages', methods=['GET'])
+@conditional("knowledge_base")
+async def search_knowledge_base_passages():
+    """Passages of knowledge base content most relevant to a query, for agent context"""
+    try:
+        query = request.args.get('q', '')
+        group = request.args.get('group')
+        try:
+            k = int(request.args.get('k', 5))
+        except ValueError:
+            return jsonify({"success": False, "error": "k must be an integer"}), 400
+        if k < 1 or k > MAX_PASSAGE_RESULTS:
+            return jsonify({"success": False, "error": f"k must be between 1 and {MAX_PASSAGE_RESULTS}"}), 400
+        if not query.strip():
+            return jsonify({"success": False, "error": "q is required"}), 400
+        if not contract:
+            return jsonify({"success": False, "error": "Contract not initialized"})
+
+        await refresh_search_index()
+        data = await asyncio.to_thread(kb_passages.search, query, k=k, group=group)
+        return jsonify({"success": True, "data": data})
+    except Exception as e:
+        return jsonify({"success": False, "error": str(e)}), 500
+
+
+# Utility Endpoints
+
+@app.route('/counts', methods=['GET'])
+@conditional("knowledge_base", "customers", "projects")
+async def get_counts():
+    """Get total counts of all entities"""
+    try:
+        if read_from_index():
+            counts = await asyncio.to_thread(indexer.counts)
+            return jsonify({"success": True, "data": {
+                "knowledge_base_count": counts["knowledge_base"],
+                "customer_count": counts["customers"],
+                "project_count": counts["projects"]
+            }})
+
+        result = await handle_call(contract.functions.getCounts)
+        if result["success"]:
+            data = result["data"]
+            result["data"] = {
+                "knowledge_base_count": data[0],
+                "customer_count": data[1],
+                "project_count": data[2]
+            }
+        return jsonify(result)
+
+    except Exception as e:
+        return jsonify({"success": False, "error": str(e)}), 500
+
+
+@app.route('/contract-info', methods=['GET'])
+async def get_contract_info():
+    """Get contract information and status"""
+    is_connected = await w3.is_connected()
+    return jsonify({
+        "success": True,
+        "data": {
+            "contract_address": Config.CONTRACT_ADDRESS,
+            "from_address": Config.FROM_ADDRESS,
+            "web3_connected": is_connected,
+            "contract_initialized": contract is not None,
+            "network_id": await w3.net.version if is_connected else None,
+            "latest_block": await w3.eth.block_number if is_connected else None
+        }
+    })
+
+
+@app.route('/metrics', methods=['GET'])
+async def get_metrics():
+    """Prometheus metrics in the text exposition format"""
+    body, content_type = metrics.render()
+    return Response(body, content_type=content_type)
+
+
+@app.route('/tx/<tx_hash>', methods=['GET'])
+async def get_transaction_status(tx_hash):
+    """Get the status of a submitted transaction"""
+    try:
+        record = tx_tracker.get(tx_hash)
+        if record is None:
+            try:
+                record = receipt_to_dict(await w3.eth.get_transaction_receipt(tx_hash))
+            except Exception:
+                return jsonify({"success": False, "error": "Transaction not found"}), 404
+
+        return jsonify({"success": True, "data": record})
+
+    except Exception as e:
+        return jsonify({"success": False, "error": str(e)}), 500
+
+
+# Cal.com Scheduling Endpoints
+
+async def fetch_free_slots(cal_api_key):
+    """Fetch schedules and bookings from Cal.com concurrently and merge them"""
+    url = "https://api.cal.com/v2/schedules"
+    bookings_url = "https://api.cal.com/v2/bookings"
+    headers = {
+        "Content-Type": "application/json",
+        "Authorization": f"Bearer {cal_api_key}",
+        "cal-api-version": "2024-06-11"
+    }
+
+    async def fetch(endpoint, target):
+        async def send():
+            async with cal_session.get(target, headers=headers) as response:
+                return response.status, await response.text()
+        return await metrics.async_observe_upstream("cal.com", endpoint, send)
+
+    (status, body), (bookings_status, bookings_body) = await asyncio.gather(
+        fetch("schedules", url), fetch("bookings", bookings_url)
+    )
+    logger.info(f"Cal.com API response status: {status}")
+
+    if status == 401:
+        return {
+            "error": "Unauthorized: Invalid Cal.com API key",
+            "status_code": 401,
+            "setup_info": "Please check your CAL_API_KEY environment variable. Get a valid key from https://app.cal.com/settings/developer/api-keys"
+        }, 401
+    if status >= 400:
+        raise aiohttp.ClientResponseError(None, (), status=status, message=body[:200])
+
+    data = json.loads(body)
+
+    if bookings_status != 200:
+        logger.warning(f"Failed to fetch bookings: {bookings_status}")
+        return {
+            "error": f"Failed to fetch bookings, status code: {bookings_status}",
+            "schedules_data": data  # Still return schedule data even if bookings fail
+        }, 200  # Return 200 since schedules worked
+
+    return merge_bookings(data, json.loads(bookings_body)), 200
+
+
+async def cors_response(body, status_code, methods):
+    flask_response = await make_response(jsonify(body), status_code)
+    flask_response.headers.add("Access-Control-Allow-Origin", "*")
+    flask_response.headers.add("Access-Control-Allow-Headers", "*")
+    flask_response.headers.add("Access-Control-Allow-Methods", methods)
+    return flask_response
+
+
+@app.route("/free-slots", methods=['GET', 'OPTIONS'])
+async def get_free_slots():
+    if request.method == "OPTIONS":
+        return await cors_response({}, 200, "GET, OPTIONS")
+
+    cal_api_key = os.getenv("CAL_API_KEY", "")
+    if not cal_api_key:
+        return await cors_response({
+            "error": "CAL_API_KEY environment variable not set. Please configure your Cal.com API key.",
+            "setup_info": "Get your API key from https://app.cal.com/settings/developer/api-keys"
+        }, 400, "GET, OPTIONS")
+
+    try:
+        cache_key = hashlib.sha256(cal_api_key.encode()).hexdigest()[:16]
+        (data, status_code), cache_status = await free_slots_cache.async_get(
+            cache_key,
+            lambda: fetch_free_slots(cal_api_key),
+            cacheable=lambda result: result[1] == 200 and "error" not in result[0]
+        )
+
+        # Compute bookable slots when a range is requested
+        if status_code == 200 and "error" not in data and ('from' in request.args or 'to' in request.args):
+            try:
+                data = bookable_slots(data, request.args)
+            except ValueError as e:
+                data, status_code = {"error": str(e)}, 400
+
+        flask_response = await cors_response(data, status_code, "GET, OPTIONS")
+        flask_response.headers["X-Cache"] = cache_status
+        return flask_response
+
+    except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+        logger.error(f"Cal.com API Error: {e}")
+        return await cors_response({
+            "error": "Failed to fetch data from Cal.com API",
+            "details": str(e),
+            "api_key_configured": bool(cal_api_key)
+        }, 500, "GET, OPTIONS")
+    except json.JSONDecodeError:
+        return await cors_response({"error": "Failed to parse response from Cal.com"}, 500, "GET, OPTIONS")
+
+
+@app.route("/new-schedule", methods=['POST', 'OPTIONS'])
+async def create_new_schedule():
+    if request.method == "OPTIONS":
+        return await cors_response({}, 200, "POST, OPTIONS")
+
+    cal_api_key = os.getenv("CAL_API_KEY", "")
+    if not cal_api_key:
+        return await cors_response({
+            "error": "CAL_API_KEY environment variable not set. Please configure your Cal.com API key.",
+            "setup_info": "Get your API key from https://app.cal.com/settings/developer/api-keys"
+        }, 400, "POST, OPTIONS")
+
+    if not request.is_json:
+        return await cors_response({
+            "error": "Request must be JSON with Content-Type: application/json"
+        }, 400, "POST, OPTIONS")
+
+    body = await request.get_json()
+    if not body:
+        return await cors_response({"error": "No JSON data provided"}, 400, "POST, OPTIONS")
+
+    # validate required fields
+    for field in ["name", "email", "phone", "start"]:
+        if field not in body:
+            return await cors_response({"error": f"Missing required field: {field}"}, 400, "POST, OPTIONS")
+
+    payload = {
+        "start": body.get("start"),
+        "attendee": {
+            "name": body.get("name"),
+            "email": body.get("email"),
+            "phoneNumber": body.get("phone"),
+            "language": "en",
+            "timeZone": "Asia/Kolkata",  # Adjust timezone as needed
+        },
+        "eventTypeId": int(os.getenv("CAL_EVENT_ID", "2698509")),
+    }
+    headers = {
+        "Content-Type": "application/json",
+        "cal-api-version": "2024-08-13",
+        "Authorization": f"Bearer {cal_api_key}",
+    }
+
+    try:
+        logger.info(f"Creating booking for {payload['attendee']['name']} at {payload['start']}")
+        async def send():
+            async with cal_session.post("https://api.cal.com/v2/bookings", json=payload, headers=headers) as response:
+                return response.status, await response.text()
+        status, text = await metrics.async_observe_upstream("cal.com", "create_booking", send)
+        logger.info(f"Booking API response status: {status}")
+
+        if status == 201:
+            logger.info("Booking created successfully")
+            # The new booking changes availability
+            free_slots_cache.invalidate()
+            return await cors_response(json.loads(text), 201, "POST, OPTIONS")
+
+        logger.error(f"Cal.com API Error: {status} - {text}")
+        return await cors_response({
+            "error": f"Failed to create booking, status code: {status}",
+            "message": text,
+            "payload_sent": payload
+        }, status, "POST, OPTIONS")
+
+    except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+        logger.error(f"Request failed: {e}")
+        return await cors_response({
+            "error": "Failed to connect to Cal.com API",
+            "details": str(e)
+        }, 500, "POST, OPTIONS")
+
+
+if __name__ == '__main__':
+    app.run(host='0.0.0.0', port=5000)
@@ -0,0 +1,104 @@
+"""
+Contract builds for the benchmarks and the deploy artifacts
+A build is a compiled artifact (.json, as exported to contracts/artifacts)
+or a Solidity source compiled here with py-solc-x
+
+Run directly to regenerate contracts/artifacts from no_forma.sol with the
+settings the artifacts were exported with (solc 0.8.30, optimizer off,
+prague), keeping their Remix layout:
+    python benchmarks/contract_build.py
+"""
+
+import argparse
+import json
+import os
+import sys
+
+SERVER_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+CONTRACTS_DIR = os.path.join(SERVER_DIR, "..", "contracts")
+SOURCE_PATH = os.path.join(CONTRACTS_DIR, "contracts", "no_forma.sol")
+ARTIFACTS_DIR = os.path.join(CONTRACTS_DIR, "artifacts")
+CONTRACT_NAME = "SimplifiedNoForma"
+# Source name inside the artifacts' metadata, relative to the contracts directory
+SOURCE_KEY = "contracts/no_forma.sol"
+
+# The solc release the artifacts are built with. Sources are compiled for
+# shanghai, which the eth-tester / py-evm pinned by web3[tester]==6.15.1 runs
+# (newer targets emit opcodes such as MCOPY that it rejects).
+SOLC_VERSION = "0.8.30"
+EVM_VERSION = "shanghai"
+ARTIFACT_EVM_VERSION = "prague"
+
+
+def load_build(path, solc_version=SOLC_VERSION, evm_version=EVM_VERSION):
+    """Return (abi, bytecode) for an artifact or a Solidity source"""
+    if path.endswith(".json"):
+        with open(path) as f:
+            artifact = json.load(f)
+        return artifact["abi"], artifact["data"]["bytecode"]["object"]
+    return compile_source(path, solc_version, evm_version)
+
+
+def _solcx(path, solc_version):
+    try:
+        import solcx
+    except ImportError:
+        sys.exit(f"py-solc-x is needed to compile {path}: pip install py-solc-x")
+    if solc_version not in {str(version) for version in solcx.get_installed_solc_versions()}:
+        sys.exit(f"solc {solc_version} is not installed: python -c \"import solcx; solcx.install_solc('{solc_version}')\"")
+    return solcx
+
+
+def compile_source(path, solc_version=SOLC_VERSION, evm_version=EVM_VERSION):
+    solcx = _solcx(path, solc_version)
+    compiled = solcx.compile_files(
+        [path], output_values=["abi", "bin"], solc_version=solc_version, evm_version=evm_version
+    )
+    for name, output in compiled.items():
+        if name.endswith(f":{CONTRACT_NAME}"):
+            return output["abi"], output["bin"]
+    sys.exit(f"{CONTRACT_NAME} not found in {path}")
+
+
+def write_artifacts(solc_version=SOLC_VERSION, evm_version=ARTIFACT_EVM_VERSION):
+    """Compile no_forma.sol and rewrite the artifact and metadata files in contracts/artifacts"""
+    solcx = _solcx(SOURCE_PATH, solc_version)
+    with open(SOURCE_PATH) as f:
+        source = f.read()
+    output = solcx.compile_standard({
+        "language": "Solidity",
+        "sources": {SOURCE_KEY: {"content": source}},
+        "settings": {
+            "optimizer": {"enabled": False, "runs": 200},
+            "evmVersion": evm_version,
+            "outputSelection": {"*": {"*": [
+                "abi", "metadata", "evm.bytecode", "evm.deployedBytecode",
+                "evm.gasEstimates", "evm.methodIdentifiers",
+            ]}},
+        },
+    }, solc_version=solc_version)
+    contract = output["contracts"][SOURCE_KEY][CONTRACT_NAME]
+
+    artifact_path = os.path.join(ARTIFACTS_DIR, f"{CONTRACT_NAME}.json")
+    with open(artifact_path) as f:
+        artifact = json.load(f)
+    # The deploy section holds Remix's per-network settings and is kept
+    artifact["data"] = contract["evm"]
+    artifact["abi"] = contract["abi"]
+    with open(artifact_path, "w") as f:
+        json.dump(artifact, f, indent="\t")
+    with open(os.path.join(ARTIFACTS_DIR, f"{CONTRACT_NAME}_metadata.json"), "w") as f:
+        json.dump(json.loads(contract["metadata"]), f, indent="\t")
+    return artifact_path
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--solc", default=SOLC_VERSION, help="solc version to compile with")
+    parser.add_argument("--evm-version", default=ARTIFACT_EVM_VERSION, help="EVM version to compile for")
+    args = parser.parse_args()
+    print(f"Wrote {write_artifacts(args.solc, args.evm_version)}")
+
+
+if __name__ == "__main__":
+    main()
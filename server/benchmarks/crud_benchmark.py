@@ -0,0 +1,249 @@
+"""
+CRUD benchmark for the SimplifiedNoForma API
+Compiles the current contract source, deploys it to an in-process
+eth-tester chain (no network), seeds it to each requested size and times
+every entity route through the Flask test client.
+
+Requires the eth-tester / py-evm versions pinned by web3's tester extra, and
+py-solc-x with solc 0.8.30 (or --artifact to deploy a prebuilt build):
+    pip install "web3[tester]==6.15.1" py-solc-x
+    python -c "import solcx; solcx.install_solc('0.8.30')"
+
+Run from the server directory:
+    python benchmarks/crud_benchmark.py --sizes 10,1000,10000 --output results.json
+"""
+
+import argparse
+import json
+import os
+import platform
+import random
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime, timezone
+
+from contract_build import SOURCE_PATH, load_build
+
+SERVER_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Payloads sized like typical records; seeding and the create route use the same ones
+ENTITY_PAYLOADS = {
+    "knowledge_base": {
+        "path": "/knowledge-base",
+        "create": "createKnowledgeBase",
+        "payload": lambda i: {"title": f"Article {i}", "group": "Docs", "content": "Lorem ipsum " * 20},
+    },
+    "customers": {
+        "path": "/customers",
+        "create": "createCustomer",
+        "payload": lambda i: {"name": f"Customer {i}", "email": f"customer{i}@example.com", "phone": "+10000000000"},
+    },
+    "projects": {
+        "path": "/projects",
+        "create": "createProject",
+        "payload": lambda i: {"name": f"Project {i}", "customer": f"Customer {i}", "status": "Active",
+                              "details": "Project details " * 10},
+    },
+}
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", default="10,1000,10000",
+                        help="comma-separated entity counts to seed before each round")
+    parser.add_argument("--entities", default=",".join(ENTITY_PAYLOADS),
+                        help="comma-separated entities to benchmark")
+    parser.add_argument("--ops", type=int, default=50, help="requests per route and round")
+    parser.add_argument("--seed", type=int, default=1, help="random seed for ID selection")
+    parser.add_argument("--indexer", action="store_true", help="serve reads from the local SQLite index")
+    parser.add_argument("--artifact", default=SOURCE_PATH,
+                        help="contract to deploy: a .sol source (compiled for shanghai) or a .json artifact")
+    parser.add_argument("--output", default="benchmark_results.json", help="where to write the JSON results")
+    return parser.parse_args()
+
+
+def configure_environment(args):
+    """Settings must be in place before app.py is imported"""
+    os.environ["INDEXER_ENABLED"] = "true" if args.indexer else "false"
+    os.environ["INDEX_DB_PATH"] = os.path.join(tempfile.mkdtemp(prefix="noforma-bench-"), "index.sqlite3")
+    os.environ["SLOW_REQUEST_MS"] = "0"
+    os.environ.pop("SHARED_STATE_DIR", None)
+    os.environ.pop("PROMETHEUS_MULTIPROC_DIR", None)
+    sys.path.insert(0, SERVER_DIR)
+
+
+def deploy_chain(build_path):
+    """Start an eth-tester chain and deploy the contract"""
+    from web3 import Web3, EthereumTesterProvider
+
+    abi, bytecode = load_build(build_path)
+    w3 = Web3(EthereumTesterProvider())
+    w3.eth.default_account = w3.eth.accounts[0]
+    factory = w3.eth.contract(abi=abi, bytecode=bytecode)
+    receipt = w3.eth.wait_for_transaction_receipt(factory.constructor().transact())
+    contract = w3.eth.contract(address=receipt.contractAddress, abi=abi)
+
+    # The API signs its own transactions, so give it a funded key
+    account = w3.eth.account.create()
+    w3.eth.send_transaction({"to": account.address, "value": 10 ** 22})
+    return w3, contract, account
+
+
+def connect_app(w3, contract, account):
+    """Point the API module at the test chain, the way init_worker() would"""
+    import app as api
+
+    api.w3 = api.instrument(w3)
+    for component in (api.nonce_manager, api.tx_tracker, api.gas_price_cache, api.view_cache):
+        component.w3 = w3
+    api.worker_pid = os.getpid()
+    api.Config.CONTRACT_ADDRESS = contract.address
+    api.Config.PRIVATE_KEY = account.key.hex()
+    api.Config.FROM_ADDRESS = account.address
+    api.init_contract()
+    return api
+
+
+def seed(contract, entity, start, stop):
+    """Create entities start..stop-1 directly on chain (not timed)"""
+    spec = ENTITY_PAYLOADS[entity]
+    create = getattr(contract.functions, spec["create"])
+    for i in range(start, stop):
+        create(*spec["payload"](i).values()).transact()
+
+
+def wait_for_index(api, timeout=600):
+    if not api.indexer:
+        return
+    api.indexer.request_sync()
+    deadline = time.monotonic() + timeout
+    head = api.w3.eth.block_number
+    while time.monotonic() < deadline:
+        if api.indexer.ready and (api.indexer.last_block or 0) >= head:
+            return
+        time.sleep(0.05)
+    raise RuntimeError("Index did not catch up with the chain")
+
+
+def measure(client, name, requests_to_make):
+    """Issue each (method, url, json) request in turn and summarize latencies"""
+    latencies = []
+    errors = 0
+    responses = []
+    started = time.perf_counter()
+    for method, url, body in requests_to_make:
+        start = time.perf_counter()
+        response = client.open(url, method=method, json=body)
+        latencies.append((time.perf_counter() - start) * 1000)
+        data = response.get_json(silent=True) or {}
+        if response.status_code >= 400 or data.get("success") is False:
+            errors += 1
+        responses.append(data)
+    elapsed = time.perf_counter() - started
+
+    result = {
+        "route": name,
+        "ops": len(latencies),
+        "errors": errors,
+        "throughput_rps": round(len(latencies) / elapsed, 2) if elapsed else None,
+        "mean_ms": round(statistics.fmean(latencies), 3) if latencies else None,
+    }
+    if len(latencies) >= 2:
+        cuts = statistics.quantiles(latencies, n=100, method="inclusive")
+        result.update(p50_ms=round(cuts[49], 3), p95_ms=round(cuts[94], 3), p99_ms=round(cuts[98], 3))
+    return result, responses
+
+
+def run_round(client, api, entity, size, ops, rng):
+    """Time every route of one entity at the current chain size"""
+    spec = ENTITY_PAYLOADS[entity]
+    path = spec["path"]
+    results = []
+
+    def record(name, requests_to_make):
+        result, responses = measure(client, name, requests_to_make)
+        result.update(entity=entity, size=size)
+        results.append(result)
+        print(f"  {entity:<15} n={size:<6} {name:<28} p50={result.get('p50_ms')}ms "
+              f"p99={result.get('p99_ms')}ms errors={result['errors']}")
+        return responses
+
+    ids = client.get(f"{path}/ids").get_json()["data"]
+    sample = [rng.choice(ids) for _ in range(ops)] if ids else []
+
+    created = record(f"POST {path}", [("POST", path, spec["payload"](size + i)) for i in range(ops)])
+    wait_for_index(api)
+    record(f"GET {path}/<id>", [("GET", f"{path}/{entity_id}", None) for entity_id in sample])
+    # Full lists grow with size, so take fewer samples
+    record(f"GET {path}", [("GET", path, None)] * max(5, ops // 10))
+    record(f"GET {path}?limit=100", [("GET", f"{path}?limit=100", None)] * ops)
+    record(f"GET {path}/ids", [("GET", f"{path}/ids", None)] * ops)
+    record("GET /counts", [("GET", "/counts", None)] * ops)
+
+    # Delete what the create phase added so the next round starts at its seeded size
+    new_ids = sorted(set(client.get(f"{path}/ids").get_json()["data"]) - set(ids))
+    record(f"DELETE {path}/<id>", [("DELETE", f"{path}/{entity_id}", None) for entity_id in new_ids])
+    wait_for_index(api)
+    if created and len(new_ids) != len(created):
+        print(f"  warning: {len(created)} creates but {len(new_ids)} new IDs")
+    return results
+
+
+def git_revision():
+    try:
+        return subprocess.check_output(
+            ["git", "rev-parse", "--short", "HEAD"], cwd=SERVER_DIR, stderr=subprocess.DEVNULL
+        ).decode().strip()
+    except Exception:
+        return None
+
+
+def main():
+    args = parse_args()
+    configure_environment(args)
+    sizes = sorted(int(size) for size in args.sizes.split(","))
+    entities = [entity.strip() for entity in args.entities.split(",")]
+    rng = random.Random(args.seed)
+
+    import logging
+    logging.disable(logging.WARNING)
+
+    w3, contract, account = deploy_chain(args.artifact)
+    api = connect_app(w3, contract, account)
+    client = api.app.test_client()
+
+    results = []
+    seeded = {entity: 0 for entity in entities}
+    for size in sizes:
+        for entity in entities:
+            print(f"Seeding {entity} to {size}...")
+            seed(contract, entity, seeded[entity], size)
+            seeded[entity] = size
+            wait_for_index(api)
+            results.extend(run_round(client, api, entity, size, args.ops, rng))
+
+    import web3
+    report = {
+        "meta": {
+            "timestamp": datetime.now(timezone.utc).isoformat(),
+            "git_revision": git_revision(),
+            "python": platform.python_version(),
+            "web3": web3.__version__,
+            "platform": platform.platform(),
+            "sizes": sizes,
+            "ops_per_route": args.ops,
+            "indexer": args.indexer,
+            "contract": os.path.relpath(args.artifact, SERVER_DIR),
+        },
+        "results": results,
+    }
+    with open(args.output, "w") as f:
+        json.dump(report, f, indent=2)
+    print(f"Wrote {len(results)} results to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,208 @@
+"""
+Delete gas benchmark for the SimplifiedNoForma contract
+Deploys two builds of the contract to an in-process eth-tester chain, seeds
+each to every requested size and records the gas used by deleteX() for the
+last, middle and first entry of the ID array.
+
+A build is either a compiled artifact (.json, as exported to
+contracts/artifacts) or a Solidity source compiled with py-solc-x for
+--evm-version. The defaults compare no_forma.sol as it was before deletes
+stored each ID's position (taken from git), whose deletes search the ID
+array, with the current source, which looks the position up. Both are
+compiled with the same solc and EVM version.
+
+Requires the eth-tester / py-evm versions pinned by web3's tester extra,
+which run shanghai bytecode, and py-solc-x with the solc version given by
+--solc:
+    pip install "web3[tester]==6.15.1" py-solc-x
+    python -c "import solcx; solcx.install_solc('0.8.30')"
+
+Run from the server directory:
+    python benchmarks/delete_gas_benchmark.py --sizes 100,1000,10000 --output delete_gas.json
+
+It ends by printing a Markdown table with the old and new gas side by side,
+in the layout of the table in SETUP_GUIDE.md.
+"""
+
+import argparse
+import json
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+from datetime import datetime, timezone
+
+from contract_build import EVM_VERSION, SOLC_VERSION, SOURCE_PATH, load_build
+from crud_benchmark import ENTITY_PAYLOADS, git_revision
+
+SERVER_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+# Added to the source by the change that made deletes look the position up;
+# the baseline is the source just before the commit that introduced it
+BASELINE_MARKER = "_removeId"
+
+# (ID list view, delete function) of each entity
+ENTITY_FUNCTIONS = {
+    "knowledge_base": ("getAllKnowledgeBaseIds", "deleteKnowledgeBase"),
+    "customers": ("getAllCustomerIds", "deleteCustomer"),
+    "projects": ("getAllProjectIds", "deleteProject"),
+}
+# Entries created per transaction when the build has createXBatch
+SEED_BATCH_SIZE = 100
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--old", help="baseline build (.json artifact or .sol source); "
+                                       "defaults to no_forma.sol before the constant-gas delete change")
+    parser.add_argument("--new", default=SOURCE_PATH, help="build to compare (.json artifact or .sol source)")
+    parser.add_argument("--solc", default=SOLC_VERSION, help="solc version for .sol builds")
+    parser.add_argument("--evm-version", default=EVM_VERSION, help="EVM version .sol builds are compiled for")
+    parser.add_argument("--sizes", default="100,1000,10000",
+                        help="comma-separated entity counts to seed before deleting")
+    parser.add_argument("--entities", default="knowledge_base",
+                        help="comma-separated entities to benchmark")
+    parser.add_argument("--output", default="delete_gas_results.json", help="where to write the JSON results")
+    return parser.parse_args()
+
+
+def baseline_source():
+    """Write no_forma.sol from before the constant-gas delete change to a temporary file
+
+    Returns (path, git object name of the source).
+    """
+    source_dir, source_name = os.path.split(SOURCE_PATH)
+    try:
+        commits = subprocess.check_output(
+            ["git", "log", "--format=%H", "-S", BASELINE_MARKER, "--", source_name],
+            cwd=source_dir, stderr=subprocess.DEVNULL
+        ).decode().split()
+    except Exception as e:
+        sys.exit(f"Could not read the history of {source_name}, pass --old: {str(e)}")
+    if not commits:
+        sys.exit(f"No commit added {BASELINE_MARKER} to {source_name}, pass --old")
+    # git log lists newest first; the oldest commit introduced the marker
+    revision = f"{commits[-1][:12]}^"
+    source = subprocess.check_output(["git", "show", f"{revision}:./{source_name}"], cwd=source_dir)
+    path = os.path.join(tempfile.mkdtemp(prefix="delete-gas-"), source_name)
+    with open(path, "wb") as f:
+        f.write(source)
+    return path, f"{revision}:{os.path.relpath(SOURCE_PATH, os.path.dirname(SERVER_DIR))}"
+
+
+def deploy(w3, abi, bytecode):
+    factory = w3.eth.contract(abi=abi, bytecode=bytecode)
+    receipt = w3.eth.wait_for_transaction_receipt(factory.constructor().transact())
+    return w3.eth.contract(address=receipt.contractAddress, abi=abi)
+
+
+def seed(contract, entity, count):
+    """Create count entities, in batches when the build supports it (not measured)"""
+    spec = ENTITY_PAYLOADS[entity]
+    payloads = [list(spec["payload"](i).values()) for i in range(count)]
+    batch_name = spec["create"] + "Batch"
+    if any(item.get("name") == batch_name for item in contract.abi):
+        create_batch = getattr(contract.functions, batch_name)
+        for start in range(0, count, SEED_BATCH_SIZE):
+            rows = payloads[start:start + SEED_BATCH_SIZE]
+            create_batch(*(list(column) for column in zip(*rows))).transact()
+        return
+    create = getattr(contract.functions, spec["create"])
+    for payload in payloads:
+        create(*payload).transact()
+
+
+def measure_deletes(w3, contract, entity):
+    """Gas used deleting the last, middle and first ID, in that order
+
+    Swap-and-pop only moves the last ID, so each target is still at the
+    position it was picked for when its turn comes.
+    """
+    ids_function, delete_function = ENTITY_FUNCTIONS[entity]
+    ids = getattr(contract.functions, ids_function)().call()
+    targets = [("last", len(ids) - 1), ("middle", len(ids) // 2), ("first", 0)]
+    delete = getattr(contract.functions, delete_function)
+    results = {}
+    for label, position in targets:
+        try:
+            tx_hash = delete(ids[position]).transact()
+            results[label] = w3.eth.wait_for_transaction_receipt(tx_hash).gasUsed
+        except Exception as e:
+            # e.g. the linear scan no longer fits in the block gas limit
+            results[label] = None
+            results[f"{label}_error"] = str(e)[:200]
+    return results
+
+
+def _gas(value):
+    return f"{value:,}" if value is not None else "failed"
+
+
+def markdown_table(results, entity):
+    """Old and new gas for each size and position of one entity, as a Markdown table"""
+    by_size = {}
+    for row in results:
+        if row["entity"] == entity:
+            by_size.setdefault(row["size"], {})[row["build"]] = row
+    positions = ("last", "middle", "first")
+    header = " | ".join(f"{position.capitalize()} (old) | {position.capitalize()} (new)" for position in positions)
+    lines = [f"| Entries | {header} |", "|" + "---|" * (1 + 2 * len(positions))]
+    for size, builds in sorted(by_size.items()):
+        cells = [_gas(builds[build][position]) for position in positions for build in ("old", "new")]
+        lines.append(f"| {size:,} | " + " | ".join(cells) + " |")
+    return "\n".join(lines)
+
+
+def main():
+    args = parse_args()
+    sizes = sorted(int(size) for size in args.sizes.split(","))
+    entities = [entity.strip() for entity in args.entities.split(",")]
+    if args.old:
+        old_path, old_label = args.old, os.path.relpath(args.old, SERVER_DIR)
+    else:
+        old_path, old_label = baseline_source()
+    builds = {
+        "old": load_build(old_path, args.solc, args.evm_version),
+        "new": load_build(args.new, args.solc, args.evm_version),
+    }
+
+    from web3 import Web3, EthereumTesterProvider
+
+    w3 = Web3(EthereumTesterProvider())
+    w3.eth.default_account = w3.eth.accounts[0]
+
+    results = []
+    for size in sizes:
+        for entity in entities:
+            for build, (abi, bytecode) in builds.items():
+                # A fresh deployment per round keeps the sizes exact
+                contract = deploy(w3, abi, bytecode)
+                seed(contract, entity, size)
+                gas = measure_deletes(w3, contract, entity)
+                results.append({"build": build, "entity": entity, "size": size, **gas})
+                print(f"  {build:<4} {entity:<15} n={size:<6} last={gas['last']} "
+                      f"middle={gas['middle']} first={gas['first']}")
+
+    report = {
+        "meta": {
+            "timestamp": datetime.now(timezone.utc).isoformat(),
+            "git_revision": git_revision(),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "old": old_label,
+            "new": os.path.relpath(args.new, SERVER_DIR),
+            "solc": args.solc,
+            "evm_version": args.evm_version,
+            "sizes": sizes,
+        },
+        "results": results,
+    }
+    with open(args.output, "w") as f:
+        json.dump(report, f, indent=2)
+    print(f"Wrote {len(results)} results to {args.output}")
+    for entity in entities:
+        print(f"\n{ENTITY_FUNCTIONS[entity][1]}():\n{markdown_table(results, entity)}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,85 @@
+"""
+Content-addressed storage for large text fields kept off-chain
+The contract stores a reference holding the SHA-256 of the text; the text
+itself lives in a local file named after that hash
+"""
+
+import hashlib
+import logging
+import mmap
+import os
+
+logger = logging.getLogger(__name__)
+
+# References start with a control character, so user text that merely looks
+# like one is told apart; the field codec escapes text starting with it
+BLOB_TAG = "\x02"
+REF_PREFIX = BLOB_TAG + "blob:sha256:"
+
+
+class BlobStore:
+    """Files under root/<first two hex digits>/<sha256>, written once and never changed
+
+    Reads are memory-mapped and checked against the hash in the reference,
+    so a truncated or altered file is never served. Writes go through a
+    temporary file and os.replace, so several workers can share one root.
+    """
+
+    def __init__(self, root):
+        self.root = root
+        os.makedirs(root, exist_ok=True)
+
+    @staticmethod
+    def is_ref(value):
+        return isinstance(value, str) and value.startswith(REF_PREFIX) and len(value) == len(REF_PREFIX) + 64
+
+    def _path(self, digest):
+        return os.path.join(self.root, digest[:2], digest)
+
+    def put(self, text):
+        """Store text and return the reference to save on-chain"""
+        data = text.encode("utf-8")
+        digest = hashlib.sha256(data).hexdigest()
+        path = self._path(digest)
+        if not os.path.exists(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            tmp_path = f"{path}.{os.getpid()}.tmp"
+            with open(tmp_path, "wb") as f:
+                f.write(data)
+                f.flush()
+                os.fsync(f.fileno())
+            os.replace(tmp_path, path)
+        return REF_PREFIX + digest
+
+    def get(self, ref):
+        """Return the text behind ref
+
+        Raises FileNotFoundError if the blob is not in this store and
+        ValueError if its contents do not match the hash.
+        """
+        digest = ref[len(REF_PREFIX):]
+        with open(self._path(digest), "rb") as f:
+            # mmap cannot map an empty file
+            if os.fstat(f.fileno()).st_size == 0:
+                actual, text = hashlib.sha256(b"").hexdigest(), ""
+            else:
+                with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+                    actual = hashlib.sha256(mapped).hexdigest()
+                    text = mapped[:].decode("utf-8", errors="replace")
+        if actual != digest:
+            raise ValueError(f"Blob {digest} does not match its hash")
+        return text
+
+    def resolve(self, value):
+        """Return the text behind value if it is a reference, else value itself
+
+        A blob that is missing or fails verification is logged and served
+        as None rather than failing the whole response.
+        """
+        if not self.is_ref(value):
+            return value
+        try:
+            return self.get(value)
+        except (OSError, ValueError) as e:
+            logger.error(f"Could not read blob {value[len(BLOB_TAG):]}: {str(e)}")
+            return None
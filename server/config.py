@@ -0,0 +1,70 @@
+"""
+Configuration for the SimplifiedNoForma API
+Shared by the Flask app and the asyncio serving mode
+"""
+
+import os
+
+# Configuration
+class Config:
+    # Provider URLs - try multiple options
+    PROVIDER_URLS = [
+        os.getenv('WEB3_PROVIDER_URL', 'http://localhost:8545'),
+        'https://eth-sepolia.g.alchemy.com/v2/demo',  # Sepolia testnet
+        'https://eth-goerli.g.alchemy.com/v2/demo',   # Goerli testnet (if needed)
+        'https://rpc.ankr.com/eth_sepolia',           # Alternative Sepolia
+    ]
+    WEB3_PROVIDER_URL = os.getenv('WEB3_PROVIDER_URL', 'http://localhost:8545')
+    RPC_TIMEOUT = float(os.getenv('RPC_TIMEOUT', '10'))
+    CONTRACT_ADDRESS = os.getenv('CONTRACT_ADDRESS', '')
+    PRIVATE_KEY = os.getenv('PRIVATE_KEY', '')
+    FROM_ADDRESS = os.getenv('FROM_ADDRESS', '')
+    
+    # Network settings
+    DEFAULT_GAS_LIMIT = 300000
+    GAS_PRICE_MULTIPLIER = 1.1
+    
+    # Return 202 with the transaction hash instead of waiting for the receipt
+    ASYNC_TRANSACTIONS = os.getenv('ASYNC_TRANSACTIONS', 'false').lower() == 'true'
+    TX_POLL_INTERVAL = float(os.getenv('TX_POLL_INTERVAL', '2'))
+    
+    # Gas price is cached for about one block; learned estimates replace eth_estimateGas
+    BLOCK_TIME = float(os.getenv('BLOCK_TIME', '12'))
+    GAS_ESTIMATE_CACHE = os.getenv('GAS_ESTIMATE_CACHE', 'true').lower() == 'true'
+    
+    # Contract view results are reused until a new block or a write (VIEW_CACHE_SIZE=0 disables)
+    VIEW_CACHE_SIZE = int(os.getenv('VIEW_CACHE_SIZE', '1024'))
+    VIEW_CACHE_MAX_MB = float(os.getenv('VIEW_CACHE_MAX_MB', '64'))
+    VIEW_CACHE_BLOCK_POLL = float(os.getenv('VIEW_CACHE_BLOCK_POLL', '1'))
+    
+    # Cal.com: /free-slots is fresh for FREE_SLOTS_TTL seconds, then served stale while refreshing
+    CAL_TIMEOUT = float(os.getenv('CAL_TIMEOUT', '10'))
+    FREE_SLOTS_TTL = float(os.getenv('FREE_SLOTS_TTL', '30'))
+    FREE_SLOTS_STALE_TTL = float(os.getenv('FREE_SLOTS_STALE_TTL', '300'))
+    MAX_SLOT_RANGE_DAYS = int(os.getenv('MAX_SLOT_RANGE_DAYS', '62'))
+    
+    # Lists read from the contract are fetched as pages of LIST_PAGE_SIZE rows,
+    # LIST_PAGE_WORKERS at a time (LIST_PAGE_SIZE=0 uses the getAll* views)
+    LIST_PAGE_SIZE = int(os.getenv('LIST_PAGE_SIZE', '200'))
+    LIST_PAGE_WORKERS = int(os.getenv('LIST_PAGE_WORKERS', '4'))
+    
+    # Maximum number of entries accepted by the /batch endpoints
+    MAX_BATCH_SIZE = int(os.getenv('MAX_BATCH_SIZE', '50'))
+    
+    # Local SQLite index of contract state used by the GET endpoints
+    INDEXER_ENABLED = os.getenv('INDEXER_ENABLED', 'true').lower() == 'true'
+    INDEX_DB_PATH = os.getenv('INDEX_DB_PATH', 'noforma_index.sqlite3')
+    INDEXER_POLL_INTERVAL = float(os.getenv('INDEXER_POLL_INTERVAL', '2'))
+    INDEXER_CONFIRMATIONS = int(os.getenv('INDEXER_CONFIRMATIONS', '0'))
+    
+    # Requests slower than this are logged with their JSON-RPC call breakdown (0 disables)
+    SLOW_REQUEST_MS = float(os.getenv('SLOW_REQUEST_MS', '1000'))
+    
+    # Directory for state shared by pre-forked workers (nonces, cache invalidation, /config)
+    SHARED_STATE_DIR = os.getenv('SHARED_STATE_DIR', '')
+    
+    # Store knowledge base content in this directory and only its SHA-256 on-chain (empty disables)
+    BLOB_STORE_DIR = os.getenv('BLOB_STORE_DIR', '')
+    
+    # Compress knowledge base content and project details on-chain when that saves bytes
+    TEXT_COMPRESSION = os.getenv('TEXT_COMPRESSION', 'false').lower() == 'true'
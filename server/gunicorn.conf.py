@@ -0,0 +1,37 @@
+"""
+Gunicorn settings for the multi-worker serving mode
+Run from this directory with:  gunicorn app:app
+"""
+
+import multiprocessing
+import os
+import tempfile
+
+bind = os.getenv('BIND', '0.0.0.0:5000')
+workers = int(os.getenv('WEB_CONCURRENCY', multiprocessing.cpu_count()))
+worker_class = 'gthread'
+threads = int(os.getenv('GUNICORN_THREADS', '4'))
+# Synchronous writes hold a request open until the receipt arrives
+timeout = int(os.getenv('GUNICORN_TIMEOUT', '180'))
+
+# Workers share nonces, /free-slots invalidation and /config changes through
+# files in this directory; a fresh one is created for every server start
+if not os.getenv('SHARED_STATE_DIR'):
+    os.environ['SHARED_STATE_DIR'] = tempfile.mkdtemp(prefix='noforma-')
+
+# Each worker writes metric samples here so /metrics can aggregate all of them
+if not os.getenv('PROMETHEUS_MULTIPROC_DIR'):
+    os.environ['PROMETHEUS_MULTIPROC_DIR'] = os.path.join(os.environ['SHARED_STATE_DIR'], 'metrics')
+    os.makedirs(os.environ['PROMETHEUS_MULTIPROC_DIR'], exist_ok=True)
+
+
+def post_worker_init(worker):
+    """Connect to the chain and set up the contract once per worker, after fork"""
+    import app
+    app.init_worker()
+    app.apply_shared_config()
+
+
+def child_exit(server, worker):
+    from prometheus_client import multiprocess
+    multiprocess.mark_process_dead(worker.pid)
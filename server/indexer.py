@@ -0,0 +1,481 @@
+"""
+Event-sourced local index of SimplifiedNoForma state
+Follows contract logs and keeps a SQLite copy of every entity for fast reads
+"""
+
+import logging
+import sqlite3
+import threading
+import uuid
+from contextlib import contextmanager, nullcontext
+
+from eth_utils import event_abi_to_log_topic
+from web3.exceptions import BlockNotFound, ContractLogicError
+
+logger = logging.getLogger(__name__)
+
+# Entity layout shared by the indexer tables and the API responses
+ENTITIES = {
+    "knowledge_base": {
+        "fields": ("id", "title", "group", "content"),
+        "getter": "getKnowledgeBase",
+        "page": "getKnowledgeBasePage",
+        "list": "getAllKnowledgeBase",
+        "events": ("KnowledgeBaseCreated", "KnowledgeBaseUpdated", "KnowledgeBaseDeleted"),
+    },
+    "customers": {
+        "fields": ("id", "name", "email", "phone"),
+        "getter": "getCustomer",
+        "page": "getCustomerPage",
+        "list": "getAllCustomers",
+        "events": ("CustomerCreated", "CustomerUpdated", "CustomerDeleted"),
+    },
+    "projects": {
+        "fields": ("id", "name", "customer", "status", "details"),
+        "getter": "getProject",
+        "page": "getProjectPage",
+        "list": "getAllProjectsWithCustomerInformation",
+        "events": ("ProjectCreated", "ProjectUpdated", "ProjectDeleted"),
+    },
+}
+
+
+def _columns(entity, fields=None):
+    return ", ".join(f'"{field}"' for field in (fields or ENTITIES[entity]["fields"]))
+
+
+class ContractIndexer:
+    """Mirrors contract entities into SQLite by following emitted events
+
+    On first start the current state is snapshotted with the getAll* views,
+    or their paginated versions through page_reader when one is given.
+    After that each poll reads new logs with eth_getLogs, collects the set of
+    touched IDs and fetches every touched entity once with its getX(id) view
+    at the poll's head block. Deleted events remove the row.
+
+    The hash of the last indexed block is kept next to its number. If a
+    later sync finds a different block at that height, the chain was
+    reorganized and the index is rebuilt from a new snapshot, so rows from
+    orphaned blocks never outlive the reorg.
+
+    Several processes may index into the same database when they share a
+    sync_lock (a FileLock); syncs then run one at a time and a worker that
+    waited finds the index already at the head.
+
+    Every row change is also appended to a bounded change log, so in-memory
+    views in any process (e.g. the search index) can follow the database
+    with changes_since() instead of reloading it.
+    """
+
+    def __init__(self, w3, contract, db_path, poll_interval=2.0, confirmations=0,
+                 max_block_range=2000, sync_lock=None, change_log_size=50000, page_reader=None):
+        self.w3 = w3
+        self.contract = contract
+        self.db_path = db_path
+        self.poll_interval = poll_interval
+        self.confirmations = confirmations
+        self.max_block_range = max_block_range
+        self.sync_lock = sync_lock or nullcontext()
+        self.change_log_size = change_log_size
+        self.page_reader = page_reader
+        self.ready = False
+        self.last_error = None
+        self._stop = threading.Event()
+        self._wakeup = threading.Event()
+        self._thread = None
+        # Request threads may sync too (catch_up), so syncs in this process take turns
+        self._sync_mutex = threading.Lock()
+        self._topics = self._build_topic_map()
+        with self.sync_lock:
+            self._init_db()
+
+    # Storage
+
+    @contextmanager
+    def _connect(self):
+        conn = sqlite3.connect(self.db_path, timeout=10)
+        conn.row_factory = sqlite3.Row
+        try:
+            with conn:
+                yield conn
+        finally:
+            conn.close()
+
+    def _init_db(self):
+        with self._connect() as conn:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT)")
+            for entity, spec in ENTITIES.items():
+                columns = ", ".join(
+                    '"id" INTEGER PRIMARY KEY' if field == "id" else f'"{field}" TEXT'
+                    for field in spec["fields"]
+                )
+                conn.execute(f"CREATE TABLE IF NOT EXISTS {entity} ({columns}, block_number INTEGER)")
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS changes "
+                "(seq INTEGER PRIMARY KEY AUTOINCREMENT, entity TEXT, entity_id INTEGER)"
+            )
+            conn.execute("CREATE INDEX IF NOT EXISTS changes_entity ON changes (entity, seq)")
+            row = conn.execute("SELECT value FROM meta WHERE key = 'contract_address'").fetchone()
+            if row and row["value"].lower() != self.contract.address.lower():
+                # Index belongs to another deployment; start over
+                logger.info("Contract address changed, clearing local index")
+                for entity in ENTITIES:
+                    conn.execute(f"DELETE FROM {entity}")
+                conn.execute("DELETE FROM meta")
+                self._reset_change_log(conn)
+            conn.execute(
+                "INSERT OR REPLACE INTO meta (key, value) VALUES ('contract_address', ?)",
+                (self.contract.address,)
+            )
+            if self._get_meta(conn, "state_epoch") is None:
+                self._set_meta(conn, "state_epoch", uuid.uuid4().hex)
+
+    def _get_meta(self, conn, key):
+        row = conn.execute("SELECT value FROM meta WHERE key = ?", (key,)).fetchone()
+        return row["value"] if row else None
+
+    def _set_meta(self, conn, key, value):
+        conn.execute("INSERT OR REPLACE INTO meta (key, value) VALUES (?, ?)", (key, str(value)))
+
+    def _last_seq(self, conn):
+        row = conn.execute("SELECT MAX(seq) AS seq FROM changes").fetchone()
+        if row["seq"] is not None:
+            return row["seq"]
+        row = conn.execute("SELECT seq FROM sqlite_sequence WHERE name = 'changes'").fetchone()
+        return row["seq"] if row else 0
+
+    def _reset_change_log(self, conn):
+        """Invalidate every reader's position (and state version), e.g. after a snapshot"""
+        conn.execute("DELETE FROM changes")
+        self._set_meta(conn, "change_log_start", self._last_seq(conn) + 1)
+        self._set_meta(conn, "state_epoch", uuid.uuid4().hex)
+
+    def _log_changes(self, conn, changes):
+        conn.executemany("INSERT INTO changes (entity, entity_id) VALUES (?, ?)", changes)
+        last_seq = self._last_seq(conn)
+        if last_seq > self.change_log_size:
+            cutoff = last_seq - self.change_log_size
+            conn.execute("DELETE FROM changes WHERE seq <= ?", (cutoff,))
+            self._set_meta(conn, "change_log_start", cutoff + 1)
+
+    def _block_hash(self, block_number):
+        return bytes(self.w3.eth.get_block(block_number)["hash"]).hex()
+
+    def _is_canonical(self, block_number):
+        """Whether the last indexed block is still part of the chain"""
+        with self._connect() as conn:
+            stored = self._get_meta(conn, "last_block_hash")
+        # Indexes written before hashes were kept are trusted once
+        if stored is None:
+            return True
+        try:
+            return stored == self._block_hash(block_number)
+        except BlockNotFound:
+            # The new chain is shorter than the indexed one
+            return False
+
+    @property
+    def last_block(self):
+        with self._connect() as conn:
+            value = self._get_meta(conn, "last_block")
+        return int(value) if value is not None else None
+
+    # Reads
+
+    def list_entities(self, entity):
+        """Return every indexed entity as a list of dicts ordered by ID"""
+        with self._connect() as conn:
+            rows = conn.execute(f"SELECT {_columns(entity)} FROM {entity} ORDER BY id").fetchall()
+        return [dict(row) for row in rows]
+
+    def query_entities(self, entity, fields=None, offset=0, limit=None, after_id=None):
+        """Return one page of entities ordered by ID as (records, has_more)
+
+        Slicing and projection happen in SQLite, so the cost depends on the
+        page size rather than the table size.
+        """
+        # Fetch one extra row to learn whether another page follows
+        sql, params = self._page_query(entity, fields, offset, limit + 1 if limit is not None else None, after_id)
+        with self._connect() as conn:
+            rows = conn.execute(sql, params).fetchall()
+        has_more = limit is not None and len(rows) > limit
+        return [dict(row) for row in rows[:limit]], has_more
+
+    def iter_entities(self, entity, fields=None, offset=0, limit=None, after_id=None, batch_size=500):
+        """Yield entities ordered by ID, reading batch_size rows at a time
+
+        The rows come from a single read transaction, so the stream is
+        consistent even if the indexer writes while it is consumed.
+        """
+        sql, params = self._page_query(entity, fields, offset, limit, after_id)
+        with self._connect() as conn:
+            cursor = conn.execute(sql, params)
+            while True:
+                rows = cursor.fetchmany(batch_size)
+                if not rows:
+                    return
+                for row in rows:
+                    yield dict(row)
+
+    def _page_query(self, entity, fields, offset, limit, after_id):
+        where = "WHERE id > ?" if after_id is not None else ""
+        params = [after_id] if after_id is not None else []
+        params += [limit if limit is not None else -1, offset]
+        return f"SELECT {_columns(entity, fields)} FROM {entity} {where} ORDER BY id LIMIT ? OFFSET ?", params
+
+    def count(self, entity):
+        with self._connect() as conn:
+            return conn.execute(f"SELECT COUNT(*) FROM {entity}").fetchone()[0]
+
+    def get_entity(self, entity, entity_id):
+        """Return one indexed entity or None"""
+        with self._connect() as conn:
+            row = conn.execute(
+                f"SELECT {_columns(entity)} FROM {entity} WHERE id = ?", (entity_id,)
+            ).fetchone()
+        return dict(row) if row else None
+
+    def get_entities(self, entity, entity_ids, fields=None):
+        """Return the indexed entities among entity_ids, keyed by ID"""
+        if not entity_ids:
+            return {}
+        placeholders = ", ".join("?" for _ in entity_ids)
+        with self._connect() as conn:
+            rows = conn.execute(
+                f"SELECT {_columns(entity, fields)} FROM {entity} WHERE id IN ({placeholders})",
+                list(entity_ids)
+            ).fetchall()
+        return {row["id"]: dict(row) for row in rows}
+
+    def export(self, entity):
+        """Return (seq, records) read in one transaction, for changes_since()"""
+        with self._connect() as conn:
+            conn.execute("BEGIN")
+            seq = self._last_seq(conn)
+            rows = conn.execute(f"SELECT {_columns(entity)} FROM {entity}").fetchall()
+        return seq, [dict(row) for row in rows]
+
+    def changes_since(self, entity, seq):
+        """Return (seq, upserted records, deleted IDs) after position seq
+
+        Returns None when seq is older than the retained log (or predates a
+        snapshot); the caller has to export() again.
+        """
+        with self._connect() as conn:
+            conn.execute("BEGIN")
+            start = int(self._get_meta(conn, "change_log_start") or 1)
+            if seq + 1 < start:
+                return None
+            rows = conn.execute(
+                "SELECT seq, entity_id FROM changes WHERE seq > ? AND entity = ? ORDER BY seq",
+                (seq, entity)
+            ).fetchall()
+            last_seq = self._last_seq(conn)
+            ids = list(dict.fromkeys(row["entity_id"] for row in rows))
+            records = {}
+            if ids:
+                placeholders = ", ".join("?" for _ in ids)
+                found = conn.execute(
+                    f"SELECT {_columns(entity)} FROM {entity} WHERE id IN ({placeholders})", ids
+                ).fetchall()
+                records = {row["id"]: dict(row) for row in found}
+        deleted = [entity_id for entity_id in ids if entity_id not in records]
+        return last_seq, list(records.values()), deleted
+
+    def state_version(self, entities):
+        """Opaque version of the indexed state of entities, read from the change log
+
+        It changes whenever any of the entities changes. An entity whose
+        changes were all pruned from the log falls back to the start of the
+        log, which may change the version spuriously but never misses a
+        change. The epoch is replaced whenever the log is reset.
+        """
+        with self._connect() as conn:
+            conn.execute("BEGIN")
+            start = int(self._get_meta(conn, "change_log_start") or 1)
+            parts = [self._get_meta(conn, "state_epoch")]
+            for entity in entities:
+                row = conn.execute(
+                    "SELECT MAX(seq) AS seq FROM changes WHERE entity = ?", (entity,)
+                ).fetchone()
+                parts.append(str(row["seq"] if row["seq"] is not None else start - 1))
+        return ":".join(parts)
+
+    def list_ids(self, entity):
+        with self._connect() as conn:
+            rows = conn.execute(f"SELECT id FROM {entity} ORDER BY id").fetchall()
+        return [row["id"] for row in rows]
+
+    def counts(self):
+        with self._connect() as conn:
+            return {
+                entity: conn.execute(f"SELECT COUNT(*) FROM {entity}").fetchone()[0]
+                for entity in ENTITIES
+            }
+
+    # Syncing
+
+    def _build_topic_map(self):
+        topics = {}
+        for entity, spec in ENTITIES.items():
+            for event_name in spec["events"]:
+                event_abi = next(
+                    (item for item in self.contract.abi
+                     if item.get("type") == "event" and item.get("name") == event_name),
+                    None
+                )
+                if event_abi is None:
+                    continue
+                topic = event_abi_to_log_topic(event_abi)
+                topics[topic] = (entity, event_name.endswith("Deleted"))
+        return topics
+
+    def _snapshot(self, block_number):
+        """Load the full current state with the list views"""
+        # Taken first: if the block is replaced while it is read, the next
+        # sync sees the stale hash and snapshots again
+        block_hash = self._block_hash(block_number)
+        with self._connect() as conn:
+            for entity, spec in ENTITIES.items():
+                if self.page_reader:
+                    data = self.page_reader.read(self.contract, spec["page"], spec["list"], block_number)
+                else:
+                    data = getattr(self.contract.functions, spec["list"])().call(
+                        block_identifier=block_number
+                    )
+                conn.execute(f"DELETE FROM {entity}")
+                rows = [
+                    tuple(column[i] for column in data) + (block_number,)
+                    for i in range(len(data[0]))
+                ]
+                placeholders = ", ".join("?" for _ in range(len(spec["fields"]) + 1))
+                conn.executemany(
+                    f"INSERT OR REPLACE INTO {entity} ({_columns(entity)}, block_number) "
+                    f"VALUES ({placeholders})",
+                    rows
+                )
+            self._reset_change_log(conn)
+            self._set_meta(conn, "last_block", block_number)
+            self._set_meta(conn, "last_block_hash", block_hash)
+        logger.info(f"Index snapshot taken at block {block_number}")
+
+    def _apply_range(self, from_block, to_block):
+        """Apply every contract log in [from_block, to_block]"""
+        block_hash = self._block_hash(to_block)
+        logs = self.w3.eth.get_logs({
+            "address": self.contract.address,
+            "fromBlock": from_block,
+            "toBlock": to_block,
+        })
+        touched = {}
+        for log in logs:
+            if not log["topics"]:
+                continue
+            match = self._topics.get(bytes(log["topics"][0]))
+            if match is None:
+                continue
+            entity, deleted = match
+            entity_id = int.from_bytes(bytes(log["topics"][1]), "big")
+            # Only the final state of each ID within the range matters
+            touched[(entity, entity_id)] = deleted
+
+        updates = []
+        for (entity, entity_id), deleted in touched.items():
+            record = None
+            if not deleted:
+                getter = getattr(self.contract.functions, ENTITIES[entity]["getter"])
+                try:
+                    record = getter(entity_id).call(block_identifier=to_block)
+                except ContractLogicError:
+                    # Reverts when the entity no longer exists at to_block;
+                    # any other error fails the range so it is retried
+                    record = None
+            updates.append((entity, entity_id, record))
+
+        with self._connect() as conn:
+            for entity, entity_id, record in updates:
+                if record is None:
+                    conn.execute(f"DELETE FROM {entity} WHERE id = ?", (entity_id,))
+                else:
+                    placeholders = ", ".join("?" for _ in range(len(record) + 1))
+                    conn.execute(
+                        f"INSERT OR REPLACE INTO {entity} ({_columns(entity)}, block_number) "
+                        f"VALUES ({placeholders})",
+                        tuple(record) + (to_block,)
+                    )
+            self._log_changes(conn, [(entity, entity_id) for entity, entity_id, _ in updates])
+            self._set_meta(conn, "last_block", to_block)
+            self._set_meta(conn, "last_block_hash", block_hash)
+        return len(updates)
+
+    def sync_once(self):
+        """Bring the index up to the current head; returns the indexed block"""
+        with self._sync_mutex, self.sync_lock:
+            return self._sync_to_head()
+
+    def _sync_to_head(self):
+        head = self.w3.eth.block_number - self.confirmations
+        last_block = self.last_block
+        if last_block is not None and not self._is_canonical(last_block):
+            logger.warning(f"Indexed block {last_block} is no longer part of the chain, taking a new snapshot")
+            last_block = None
+        if last_block is None:
+            self._snapshot(head)
+            self.ready = True
+            return head
+
+        from_block = last_block + 1
+        while from_block <= head:
+            to_block = min(from_block + self.max_block_range - 1, head)
+            changed = self._apply_range(from_block, to_block)
+            if changed:
+                logger.info(f"Indexed {changed} change(s) in blocks {from_block}-{to_block}")
+            from_block = to_block + 1
+        self.ready = True
+        return head
+
+    def catch_up(self, block_number):
+        """Sync in the calling thread until the index covers block_number
+
+        Used after a write so reads that follow it see its effects. Returns
+        False if the block is not indexable yet because of confirmations.
+        """
+        last_block = self.last_block
+        if last_block is not None and last_block >= block_number:
+            return True
+        return self.sync_once() >= block_number
+
+    def request_sync(self):
+        """Wake the indexer thread, e.g. right after this server sent a write"""
+        self._wakeup.set()
+
+    def _run(self):
+        while not self._stop.is_set():
+            try:
+                self.sync_once()
+                self.last_error = None
+            except Exception as e:
+                self.last_error = str(e)
+                logger.warning(f"Indexer sync failed: {str(e)}")
+            self._wakeup.wait(self.poll_interval)
+            self._wakeup.clear()
+
+    def start(self):
+        if self._thread and self._thread.is_alive():
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="contract-indexer", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        self._wakeup.set()
+
+    def status(self):
+        return {
+            "ready": self.ready,
+            "last_block": self.last_block,
+            "db_path": self.db_path,
+            "last_error": self.last_error,
+        }
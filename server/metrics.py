@@ -0,0 +1,126 @@
+"""
+Prometheus metrics for the SimplifiedNoForma API
+Served by GET /metrics; cheap enough to stay enabled in production
+"""
+
+import os
+import time
+
+from prometheus_client import (
+    CONTENT_TYPE_LATEST, REGISTRY, CollectorRegistry, Counter, Gauge, Histogram, generate_latest,
+)
+from prometheus_client import multiprocess
+
+# Gas limits of single writes range from ~21k to a few million for large batches
+GAS_BUCKETS = (25_000, 50_000, 100_000, 200_000, 400_000, 800_000, 1_600_000, 3_200_000, 6_400_000)
+
+HTTP_LATENCY = Histogram(
+    "noforma_http_request_duration_seconds", "API request latency by route", ["method", "route"]
+)
+HTTP_REQUESTS = Counter(
+    "noforma_http_requests", "API requests by route and status code", ["method", "route", "status"]
+)
+RPC_LATENCY = Histogram(
+    "noforma_rpc_duration_seconds", "JSON-RPC round trip latency by method", ["method"]
+)
+RPC_REQUESTS = Counter(
+    "noforma_rpc_requests", "JSON-RPC requests by method and outcome", ["method", "outcome"]
+)
+UPSTREAM_LATENCY = Histogram(
+    "noforma_upstream_duration_seconds", "Latency of third-party API calls", ["service", "endpoint"]
+)
+UPSTREAM_RESPONSES = Counter(
+    "noforma_upstream_responses", "Third-party API responses by status code", ["service", "endpoint", "status"]
+)
+GAS_USED = Histogram(
+    "noforma_gas_used", "Gas used per mined transaction by contract function", ["function"],
+    buckets=GAS_BUCKETS
+)
+VIEW_CACHE_LOOKUPS = Counter(
+    "noforma_view_cache_lookups", "Contract view call cache lookups by result", ["result"]
+)
+TRANSACTIONS_IN_FLIGHT = Gauge(
+    "noforma_transactions_in_flight", "Transactions sent and not yet mined or failed",
+    multiprocess_mode="livesum"
+)
+
+
+def rpc_metrics_middleware(make_request, w3):
+    """web3 middleware that counts and times every JSON-RPC request"""
+    def middleware(method, params):
+        start = time.perf_counter()
+        try:
+            response = make_request(method, params)
+        except Exception:
+            RPC_REQUESTS.labels(method, "exception").inc()
+            raise
+        finally:
+            RPC_LATENCY.labels(method).observe(time.perf_counter() - start)
+        RPC_REQUESTS.labels(method, "error" if "error" in response else "ok").inc()
+        return response
+    return middleware
+
+
+async def async_rpc_metrics_middleware(make_request, w3):
+    """rpc_metrics_middleware for AsyncWeb3"""
+    async def middleware(method, params):
+        start = time.perf_counter()
+        try:
+            response = await make_request(method, params)
+        except Exception:
+            RPC_REQUESTS.labels(method, "exception").inc()
+            raise
+        finally:
+            RPC_LATENCY.labels(method).observe(time.perf_counter() - start)
+        RPC_REQUESTS.labels(method, "error" if "error" in response else "ok").inc()
+        return response
+    return middleware
+
+
+def observe_batch(method, responses, duration):
+    """Record a JSON-RPC batch as one round trip and one request per call"""
+    RPC_LATENCY.labels("batch").observe(duration)
+    for response in responses:
+        RPC_REQUESTS.labels(method, "error" if "error" in response else "ok").inc()
+
+
+def observe_upstream(service, endpoint, send):
+    """Call send() and record its latency and status code"""
+    start = time.perf_counter()
+    try:
+        response = send()
+    except Exception:
+        UPSTREAM_RESPONSES.labels(service, endpoint, "error").inc()
+        raise
+    finally:
+        UPSTREAM_LATENCY.labels(service, endpoint).observe(time.perf_counter() - start)
+    UPSTREAM_RESPONSES.labels(service, endpoint, str(response.status_code)).inc()
+    return response
+
+
+async def async_observe_upstream(service, endpoint, send):
+    """observe_upstream() for a coroutine send() that returns (status, body)"""
+    start = time.perf_counter()
+    try:
+        status, body = await send()
+    except Exception:
+        UPSTREAM_RESPONSES.labels(service, endpoint, "error").inc()
+        raise
+    finally:
+        UPSTREAM_LATENCY.labels(service, endpoint).observe(time.perf_counter() - start)
+    UPSTREAM_RESPONSES.labels(service, endpoint, str(status)).inc()
+    return status, body
+
+
+def render():
+    """Return (body, content_type) for the /metrics endpoint
+
+    Under gunicorn every worker writes its samples to PROMETHEUS_MULTIPROC_DIR
+    and the scrape aggregates all of them.
+    """
+    if os.getenv("PROMETHEUS_MULTIPROC_DIR"):
+        registry = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)
+    else:
+        registry = REGISTRY
+    return generate_latest(registry), CONTENT_TYPE_LATEST
@@ -0,0 +1,173 @@
+"""
+In-process nonce allocation for the SimplifiedNoForma API
+Lets several Flask threads sign and send transactions from the same account
+"""
+
+import heapq
+import logging
+import threading
+
+from shared_state import SharedJSON
+
+logger = logging.getLogger(__name__)
+
+# Substrings of node errors that mean our local view of the nonce is stale
+NONCE_ERROR_MARKERS = (
+    "nonce too low",
+    "already known",
+    "known transaction",
+    "replacement transaction underpriced",
+    "invalid nonce",
+)
+
+
+def is_nonce_error(error):
+    """Check whether an exception raised by the node is a nonce conflict"""
+    message = str(error).lower()
+    return any(marker in message for marker in NONCE_ERROR_MARKERS)
+
+
+class _AccountNonces:
+    """Nonce state for a single sending address"""
+
+    def __init__(self):
+        self.next_nonce = None
+        self.released = []
+
+
+class NonceManager:
+    """Hands out strictly increasing nonces per sender under a lock
+
+    The starting nonce is read from the chain once (including pending
+    transactions). After that every allocation is local. Nonces of
+    transactions that never reached the node are released and handed out
+    again first, so a failed send does not leave a gap that stalls every
+    later transaction from the same account.
+    """
+
+    def __init__(self, w3):
+        self.w3 = w3
+        self._lock = threading.Lock()
+        self._accounts = {}
+
+    def _account(self, address):
+        key = address.lower()
+        if key not in self._accounts:
+            self._accounts[key] = _AccountNonces()
+        return self._accounts[key]
+
+    def allocate(self, address):
+        """Reserve the next nonce for address"""
+        with self._lock:
+            account = self._account(address)
+            if account.next_nonce is None and not account.released:
+                self._sync(address, account, self.w3.eth.get_transaction_count(address, 'pending'))
+            return self._take(account)
+
+    def _sync(self, address, account, chain_nonce):
+        account.next_nonce = chain_nonce
+        logger.info(f"Nonce sequence for {address} synced from chain at {chain_nonce}")
+
+    def _take(self, account):
+        if account.released:
+            return heapq.heappop(account.released)
+        nonce = account.next_nonce
+        account.next_nonce += 1
+        return nonce
+
+    def release(self, address, nonce):
+        """Return a nonce whose transaction was never accepted by the node"""
+        with self._lock:
+            account = self._account(address)
+            if account.next_nonce is None or nonce >= account.next_nonce:
+                return
+            if nonce in account.released:
+                return
+            heapq.heappush(account.released, nonce)
+            # Shrink the sequence while its top nonce has been released
+            top = account.next_nonce - 1
+            if top in account.released:
+                while top in account.released:
+                    account.released.remove(top)
+                    top -= 1
+                account.next_nonce = top + 1
+                heapq.heapify(account.released)
+
+    def resync(self, address):
+        """Forget local state so the next allocation re-reads the chain"""
+        with self._lock:
+            self._accounts.pop(address.lower(), None)
+        logger.warning(f"Nonce sequence for {address} will be resynced from chain")
+
+    def reset(self):
+        """Drop state for every account, e.g. after the signing key changes"""
+        with self._lock:
+            self._accounts.clear()
+
+
+class AsyncNonceManager(NonceManager):
+    """NonceManager for AsyncWeb3; the chain is read without holding the lock"""
+
+    async def allocate(self, address):
+        while True:
+            with self._lock:
+                account = self._account(address)
+                if account.next_nonce is not None or account.released:
+                    return self._take(account)
+            chain_nonce = await self.w3.eth.get_transaction_count(address, 'pending')
+            with self._lock:
+                account = self._account(address)
+                # Another task may have synced while we were waiting
+                if account.next_nonce is None and not account.released:
+                    self._sync(address, account, chain_nonce)
+
+
+class SharedNonceManager(NonceManager):
+    """NonceManager whose state lives in a file shared by pre-forked workers
+
+    Every operation loads the sequence under an exclusive file lock, applies
+    the in-process logic and writes it back, so workers signing for the same
+    account never hand out the same nonce.
+    """
+
+    def __init__(self, w3, path):
+        super().__init__(w3)
+        self._store = SharedJSON(path)
+
+    def _load(self):
+        self._accounts = {}
+        for key, (next_nonce, released) in self._store.load().items():
+            account = self._accounts[key] = _AccountNonces()
+            account.next_nonce = next_nonce
+            account.released = released
+            heapq.heapify(account.released)
+
+    def _save(self):
+        self._store.save({
+            key: [account.next_nonce, account.released]
+            for key, account in self._accounts.items()
+        })
+
+    def allocate(self, address):
+        with self._store.lock:
+            self._load()
+            nonce = super().allocate(address)
+            self._save()
+            return nonce
+
+    def release(self, address, nonce):
+        with self._store.lock:
+            self._load()
+            super().release(address, nonce)
+            self._save()
+
+    def resync(self, address):
+        with self._store.lock:
+            self._load()
+            super().resync(address)
+            self._save()
+
+    def reset(self):
+        with self._store.lock:
+            super().reset()
+            self._save()
@@ -0,0 +1,115 @@
+"""
+Reading whole entity lists through the contract's paginated views
+Large lists are fetched as fixed-size pages in parallel instead of one
+getAll* call whose response grows with the contract
+"""
+
+import contextvars
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from eth_utils import function_abi_to_4byte_selector
+
+logger = logging.getLogger(__name__)
+
+
+def has_page_views(abi, code, page_functions):
+    """Whether a deployed contract implements every page view
+
+    The ABI alone can list views an older deployment lacks, so each
+    selector must also appear in the runtime bytecode, where the function
+    dispatcher pushes it (PUSH4, or a shorter PUSH when it has leading zero
+    bytes). A proxy's own code holds none of the selectors, so proxies are
+    read with the getAll* views.
+    """
+    functions = {item.get("name"): item for item in abi if item.get("type") == "function"}
+    for name in page_functions:
+        if name not in functions:
+            return False
+        selector = function_abi_to_4byte_selector(functions[name])
+        short = selector.lstrip(b"\x00")
+        if b"\x63" + selector not in code and bytes([0x5f + len(short)]) + short not in code:
+            return False
+    return True
+
+
+def merge_pages(pages):
+    """Concatenate page results into the columns of the getAll* view, dropping the totals"""
+    return tuple(
+        [value for page in pages for value in page[column]]
+        for column in range(len(pages[0]) - 1)
+    )
+
+
+class PageReader:
+    """Assembles a list view from getXPage(offset, limit) calls
+
+    The first page is read alone, since its trailing total says how many
+    more are needed; the rest run at the same time on a small thread pool.
+    Every page is read at the same block, so the assembled list is the
+    state of one block even if writes land while it is being read. Results
+    have the column shape of the matching getAll* view.
+
+    Whether a contract has the page views is decided once per address by
+    detect(), from its ABI and deployed bytecode. Lists of contracts that
+    lack them, or that were never checked, are read with the getAll* view.
+    """
+
+    def __init__(self, page_size=200, max_workers=4):
+        self.page_size = page_size
+        self.max_workers = max_workers
+        self._executor = None
+        self._paged = {}
+        self._lock = threading.Lock()
+
+    def _submit(self, fn, *args):
+        with self._lock:
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(
+                    max_workers=self.max_workers, thread_name_prefix="list-pages"
+                )
+        # Each task runs in a copy of the caller's context, so its RPC calls
+        # are still attributed to the request that asked for the list
+        return self._executor.submit(contextvars.copy_context().run, fn, *args)
+
+    def detect(self, contract, page_functions, code=None):
+        """Check whether contract has every page view and remember the answer
+
+        code is the deployed bytecode if the caller already has it; it is
+        fetched otherwise. If it cannot be fetched, the getAll* views are
+        used until the next check.
+        """
+        try:
+            if code is None:
+                code = contract.w3.eth.get_code(contract.address)
+        except Exception as e:
+            logger.warning(f"Could not read the code at {contract.address}, lists use the getAll* views: {str(e)}")
+            self._paged.pop(contract.address, None)
+            return False
+        paged = has_page_views(contract.abi, bytes(code), page_functions)
+        if not paged:
+            logger.warning(f"Contract at {contract.address} has no page views, lists use the getAll* views")
+        self._paged[contract.address] = paged
+        return paged
+
+    def paged(self, address):
+        """Whether lists at address are read in pages"""
+        return self.page_size > 0 and self._paged.get(address, False)
+
+    def read(self, contract, page_function, list_function, block_identifier=None):
+        """Return every row of a list view as columns, e.g. (ids, titles, ...)"""
+        if not self.paged(contract.address):
+            return getattr(contract.functions, list_function)().call(block_identifier=block_identifier)
+        if block_identifier is None:
+            block_identifier = contract.w3.eth.block_number
+
+        def fetch(offset):
+            return getattr(contract.functions, page_function)(offset, self.page_size).call(
+                block_identifier=block_identifier
+            )
+
+        first = fetch(0)
+        total = first[-1]
+        futures = [self._submit(fetch, offset) for offset in range(self.page_size, total, self.page_size)]
+        return merge_pages([first] + [future.result() for future in futures])
@@ -0,0 +1,120 @@
+"""
+Pagination and field projection for the list endpoints
+"""
+
+MAX_PAGE_SIZE = 1000
+MAX_IDS_PER_REQUEST = 100
+
+
+class PageRequest:
+    """Parsed ?offset=&limit=&cursor=&fields= query parameters"""
+
+    def __init__(self, offset=0, limit=None, cursor=None, fields=None):
+        self.offset = offset
+        self.limit = limit
+        self.cursor = cursor
+        self.fields = fields
+
+    @property
+    def active(self):
+        """True when the client asked for anything but the full list"""
+        return bool(self.offset or self.limit is not None or self.cursor is not None or self.fields)
+
+
+def _parse_int(args, name, minimum):
+    value = args.get(name)
+    if value is None or value == '':
+        return None
+    try:
+        value = int(value)
+    except ValueError:
+        raise ValueError(f"'{name}' must be an integer")
+    if value < minimum:
+        raise ValueError(f"'{name}' must be >= {minimum}")
+    return value
+
+
+def parse_page_request(args, allowed_fields):
+    """Build a PageRequest from request args, raising ValueError on bad input
+
+    The cursor is the ID of the last record of the previous page. The id
+    field is always part of a projection so the next cursor can be derived.
+    """
+    offset = _parse_int(args, 'offset', 0) or 0
+    limit = _parse_int(args, 'limit', 1)
+    if limit is not None and limit > MAX_PAGE_SIZE:
+        raise ValueError(f"'limit' must be <= {MAX_PAGE_SIZE}")
+    cursor = _parse_int(args, 'cursor', 0)
+
+    fields = None
+    if args.get('fields'):
+        requested = [field.strip() for field in args['fields'].split(',') if field.strip()]
+        unknown = [field for field in requested if field not in allowed_fields]
+        if unknown:
+            raise ValueError(f"Unknown field(s): {', '.join(unknown)}. "
+                             f"Allowed: {', '.join(allowed_fields)}")
+        fields = ['id'] + [field for field in requested if field != 'id']
+
+    return PageRequest(offset=offset, limit=limit, cursor=cursor, fields=fields)
+
+
+def parse_ids(args):
+    """Parse ?ids=1,2,3 into a de-duplicated list of IDs, or None if absent"""
+    if 'ids' not in args:
+        return None
+    try:
+        ids = [int(value) for value in args['ids'].split(',') if value.strip()]
+    except ValueError:
+        raise ValueError("'ids' must be a comma-separated list of integers")
+    ids = list(dict.fromkeys(ids))
+    if not ids:
+        raise ValueError("'ids' must not be empty")
+    if len(ids) > MAX_IDS_PER_REQUEST:
+        raise ValueError(f"At most {MAX_IDS_PER_REQUEST} ids can be requested at once")
+    return ids
+
+
+def parse_expand(args, allowed):
+    """Parse ?expand=a,b into a set of related records to embed, raising ValueError on unknown names"""
+    requested = {name.strip() for name in args.get('expand', '').split(',') if name.strip()}
+    unknown = sorted(requested - set(allowed))
+    if unknown:
+        raise ValueError(f"Unknown expansion(s): {', '.join(unknown)}. Allowed: {', '.join(allowed)}")
+    return requested
+
+
+def project(record, fields):
+    """Keep only the requested fields of a record"""
+    if not fields:
+        return record
+    return {field: record[field] for field in fields}
+
+
+def paginate_records(records, page):
+    """Slice and project an in-memory list of records
+
+    Returns (page_records, total, has_more). Records are ordered by ID so
+    cursors stay stable between requests.
+    """
+    total = len(records)
+    records = sorted(records, key=lambda record: record['id'])
+    if page.cursor is not None:
+        records = [record for record in records if record['id'] > page.cursor]
+    end = page.offset + page.limit if page.limit is not None else len(records)
+    selected = records[page.offset:end]
+    has_more = end < len(records)
+    return [project(record, page.fields) for record in selected], total, has_more
+
+
+def page_response(records, page, total, has_more):
+    """Build the JSON body for a paginated list response"""
+    return {
+        "success": True,
+        "data": records,
+        "pagination": {
+            "offset": page.offset,
+            "limit": page.limit,
+            "total": total,
+            "next_cursor": records[-1]['id'] if has_more and records else None
+        }
+    }
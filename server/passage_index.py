@@ -0,0 +1,231 @@
+"""
+TF-IDF passage retrieval over knowledge base content
+Keeps sparse term-frequency matrices of passages and scores queries with
+sparse matrix-vector products
+"""
+
+import re
+import threading
+from collections import Counter
+
+import numpy as np
+from scipy import sparse
+
+from search_index import tokenize
+
+MAX_PASSAGE_RESULTS = 20
+SENTENCE_PATTERN = re.compile(r"(?<=[.!?])\s+")
+# Deleted rows are dropped from the matrix once they make up this share of it
+COMPACT_RATIO = 0.25
+# New rows are merged into the main matrix once they exceed this share of it
+MERGE_RATIO = 0.1
+MIN_MERGE_ROWS = 1000
+
+
+def split_passages(text, max_words=80):
+    """Split text into passages of whole sentences, about max_words each
+
+    Paragraphs (blank-line separated) always start a new passage.
+    """
+    passages = []
+    for paragraph in re.split(r"\n\s*\n", str(text or "")):
+        current, words = [], 0
+        for sentence in SENTENCE_PATTERN.split(paragraph.strip()):
+            sentence_words = len(sentence.split())
+            if current and words + sentence_words > max_words:
+                passages.append(" ".join(current))
+                current, words = [], 0
+            current.append(sentence)
+            words += sentence_words
+        if current and words:
+            passages.append(" ".join(current))
+    return passages
+
+
+def _grow(array, size):
+    """Return array with room for at least size elements (capacity doubles)"""
+    if size <= len(array):
+        return array
+    grown = np.zeros(max(size, 2 * len(array), 64), dtype=array.dtype)
+    grown[:len(array)] = array
+    return grown
+
+
+
+class PassageIndex:
+    """Cosine similarity search over TF-IDF vectors of passages
+
+    Passages are rows of raw term counts. Most rows live in a column-major
+    main matrix, so a query only reads the columns of its own terms; rows
+    added since the last merge sit in a small row-major delta matrix that
+    is folded in once it grows past MERGE_RATIO of the main one. Deleted
+    rows are masked until they make up COMPACT_RATIO of all rows.
+
+    IDF weights and row norms follow from document frequencies, which
+    add() and remove() keep current, and are recomputed by the first query
+    after a change.
+    """
+
+    def __init__(self, text_field="content", group_field="group", max_words=80):
+        self.text_field = text_field
+        self.group_field = group_field
+        self.max_words = max_words
+        self._lock = threading.RLock()
+        self.clear()
+
+    def clear(self):
+        with self._lock:
+            self._columns = {}
+            self._df = np.zeros(0, dtype=np.int64)
+            self._alive = np.zeros(0, dtype=bool)
+            self._rows = []
+            self._doc_rows = {}
+            self._records = {}
+            self._live_rows = 0
+            self._main = sparse.csc_matrix((0, 0))
+            self._main_squared = self._main
+            self._merged_rows = 0
+            self._delta = None
+            self._norms = None
+
+    def __len__(self):
+        return len(self._records)
+
+    def add(self, doc_id, record):
+        """Index the passages of record under doc_id, replacing any previous version"""
+        passages = []
+        for text in split_passages(record.get(self.text_field), self.max_words):
+            counts = Counter(tokenize(text))
+            if counts:
+                passages.append((text, counts))
+        with self._lock:
+            self.remove(doc_id)
+            rows = []
+            for text, counts in passages:
+                columns = np.fromiter((self._column(token) for token in counts), dtype=np.int64, count=len(counts))
+                values = np.fromiter(counts.values(), dtype=np.float64, count=len(counts))
+                self._df = _grow(self._df, len(self._columns))
+                self._df[columns] += 1
+                rows.append(len(self._rows))
+                self._rows.append((doc_id, text, columns, values))
+            self._alive = _grow(self._alive, len(self._rows))
+            self._alive[rows] = True
+            self._live_rows += len(rows)
+            self._doc_rows[doc_id] = rows
+            self._records[doc_id] = {key: value for key, value in record.items() if key != self.text_field}
+            self._delta = None
+            self._norms = None
+
+    def remove(self, doc_id):
+        with self._lock:
+            rows = self._doc_rows.pop(doc_id, None)
+            if rows is None:
+                return
+            for row in rows:
+                self._alive[row] = False
+                self._df[self._rows[row][2]] -= 1
+            self._live_rows -= len(rows)
+            del self._records[doc_id]
+            self._norms = None
+
+    def _column(self, token):
+        column = self._columns.get(token)
+        if column is None:
+            column = self._columns[token] = len(self._columns)
+        return column
+
+    def _build(self, rows):
+        """CSR matrix of the term counts of rows"""
+        indptr = np.zeros(len(rows) + 1, dtype=np.int64)
+        if rows:
+            np.cumsum([len(columns) for _, _, columns, _ in rows], out=indptr[1:])
+            indices = np.concatenate([columns for _, _, columns, _ in rows])
+            data = np.concatenate([values for _, _, _, values in rows])
+        else:
+            indices, data = np.zeros(0, dtype=np.int64), np.zeros(0)
+        return sparse.csr_matrix((data, indices, indptr), shape=(len(rows), len(self._columns)))
+
+    def _compact(self):
+        """Drop deleted rows, renumbering the rest and rebuilding the main matrix"""
+        self._rows = [row for row, alive in zip(self._rows, self._alive) if alive]
+        self._alive = np.ones(len(self._rows), dtype=bool)
+        self._doc_rows = {}
+        for row, (doc_id, _, _, _) in enumerate(self._rows):
+            self._doc_rows.setdefault(doc_id, []).append(row)
+        self._merged_rows = 0
+        self._merge()
+
+    def _merge(self):
+        """Fold every row added since the last merge into the main matrix"""
+        if self._merged_rows:
+            main = self._main.tocsr()
+            main.resize((self._merged_rows, len(self._columns)))
+            main = sparse.vstack([main, self._build(self._rows[self._merged_rows:])], format="csr")
+        else:
+            main = self._build(self._rows)
+        self._main = main.tocsc()
+        self._main_squared = sparse.csc_matrix(
+            (self._main.data ** 2, self._main.indices, self._main.indptr), shape=self._main.shape
+        )
+        self._merged_rows = len(self._rows)
+        self._delta = None
+
+    def _prepare(self):
+        """Bring the matrices, IDF weights and row norms up to date"""
+        n_rows = len(self._rows)
+        if n_rows - self._live_rows > COMPACT_RATIO * n_rows:
+            self._compact()
+        pending = n_rows - self._merged_rows
+        if pending > max(MIN_MERGE_ROWS, MERGE_RATIO * self._merged_rows):
+            self._merge()
+        elif pending and self._delta is None:
+            self._delta = self._build(self._rows[self._merged_rows:])
+        n_columns = len(self._columns)
+        if self._main.shape[1] != n_columns:
+            self._main.resize((self._merged_rows, n_columns))
+            self._main_squared.resize((self._merged_rows, n_columns))
+
+        if self._norms is None:
+            self._idf = np.log((1 + self._live_rows) / (1 + self._df[:n_columns])) + 1
+            squared_idf = self._idf ** 2
+            norms = self._main_squared @ squared_idf
+            if self._delta is not None:
+                norms = np.concatenate([norms, self._delta.power(2) @ squared_idf])
+            norms = np.sqrt(norms)
+            norms[norms == 0] = 1
+            self._norms = norms
+
+    def search(self, query, k=5, group=None):
+        """Return the k passages most similar to query, best first"""
+        with self._lock:
+            counts = Counter(token for token in tokenize(query) if token in self._columns)
+            if not counts or not self._live_rows:
+                return []
+            self._prepare()
+
+            columns = np.fromiter((self._columns[token] for token in counts), dtype=np.int64, count=len(counts))
+            query_weights = np.fromiter(counts.values(), dtype=np.float64, count=len(counts)) * self._idf[columns]
+            # Row dot products are sum(tf * idf * query_tf * idf) over the query terms
+            weights = query_weights * self._idf[columns]
+            scores = self._main[:, columns] @ weights
+            if self._delta is not None:
+                scores = np.concatenate([scores, self._delta[:, columns] @ weights])
+            scores /= self._norms * np.linalg.norm(query_weights)
+
+            candidates = np.flatnonzero((scores > 0) & self._alive[:len(scores)])
+            if group is not None:
+                wanted = group.lower()
+                in_group = [
+                    str(self._records[self._rows[row][0]].get(self.group_field) or "").lower() == wanted
+                    for row in candidates
+                ]
+                candidates = candidates[np.array(in_group, dtype=bool)]
+            if len(candidates) > k:
+                candidates = candidates[np.argpartition(-scores[candidates], k - 1)[:k]]
+            candidates = candidates[np.argsort(-scores[candidates], kind="stable")]
+
+            results = []
+            for row in candidates:
+                doc_id, text, _, _ = self._rows[row]
+                results.append(dict(self._records[doc_id], passage=text, score=round(float(scores[row]), 4)))
+            return results
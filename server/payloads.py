@@ -0,0 +1,191 @@
+"""
+Request payload helpers shared by the Flask app and the asyncio serving mode
+"""
+
+from datetime import datetime, timedelta, timezone
+
+from hexbytes import HexBytes
+
+import slot_engine
+from config import Config
+from indexer import ENTITIES
+
+
+def batch_columns(entries, fields, required, error, with_id=False):
+    """Validate batch entries and turn them into one argument array per field"""
+    if not isinstance(entries, list) or not entries:
+        raise ValueError("'entries' must be a non-empty list")
+    if len(entries) > Config.MAX_BATCH_SIZE:
+        raise ValueError(f"A batch can contain at most {Config.MAX_BATCH_SIZE} entries")
+    
+    ids = []
+    columns = [[] for _ in fields]
+    for index, entry in enumerate(entries):
+        if not isinstance(entry, dict):
+            raise ValueError(f"Entry {index}: must be an object")
+        if with_id:
+            if not isinstance(entry.get('id'), int):
+                raise ValueError(f"Entry {index}: 'id' is required")
+            ids.append(entry['id'])
+        if any(not entry.get(field) for field in required):
+            raise ValueError(f"Entry {index}: {error}")
+        for column, field in zip(columns, fields):
+            column.append(entry.get(field, ''))
+    
+    return ([ids] if with_id else []) + columns
+
+
+def merge_bookings(data, bookings_data):
+    """Append Cal.com bookings to the schedules payload as unavailable slots
+
+    Cancelled and rejected bookings free their time again, so they are
+    left out; the others keep their status.
+    """
+    # Safely process bookings
+    if 'data' in bookings_data and 'bookings' in bookings_data['data']:
+        for booking in bookings_data['data']['bookings']:
+            status = booking.get('status')
+            if str(status or '').lower() in slot_engine.CANCELLED_STATUSES:
+                continue
+            # append unavailable slots to the data
+            start = booking.get('startTime')
+            end = booking.get('endTime')
+            if start and end:
+                # Ensure data structure exists
+                if 'data' not in data:
+                    data['data'] = []
+                # Append unavailable slots to the data
+                data["data"].append({
+                    "start": start,
+                    "end": end,
+                    "type": "unavailable",
+                    "status": status
+                })
+    
+    return data
+
+
+def bookable_slots(data, args):
+    """Compute bookable slots from a /free-slots payload and ?from=&to=&duration="""
+    try:
+        range_start = slot_engine.parse_instant(args['from'])
+        range_end = slot_engine.parse_instant(args['to'])
+        duration = int(args.get('duration', '30'))
+        step = int(args['step']) if args.get('step') else None
+        schedule_id = int(args['scheduleId']) if args.get('scheduleId') else None
+        output_tz = args.get('timeZone', 'UTC')
+        slot_engine.ZoneInfo(output_tz)
+    except KeyError as e:
+        raise ValueError(f"Missing required parameter: {e.args[0]}")
+    except Exception:
+        raise ValueError("Invalid from/to/duration/step/scheduleId/timeZone parameter")
+    
+    if range_end <= range_start:
+        raise ValueError("'to' must be after 'from'")
+    if range_end - range_start > timedelta(days=Config.MAX_SLOT_RANGE_DAYS):
+        raise ValueError(f"Range can span at most {Config.MAX_SLOT_RANGE_DAYS} days")
+    if not 5 <= duration <= 24 * 60 or (step is not None and step < 5):
+        raise ValueError("'duration' must be between 5 and 1440 minutes and 'step' at least 5")
+    
+    # The merged payload lists schedules followed by bookings marked unavailable
+    items = data.get('data') or []
+    schedules = [item for item in items if item.get('type') != 'unavailable']
+    bookings = [item for item in items if item.get('type') == 'unavailable']
+    schedule = slot_engine.select_schedule(schedules, schedule_id)
+    if schedule is None:
+        raise ValueError("No matching Cal.com schedule found")
+    
+    slots = slot_engine.compute_free_slots(
+        schedule, bookings, range_start, range_end, duration,
+        step_minutes=step, now=datetime.now(timezone.utc), output_tz=output_tz
+    )
+    return {
+        "data": {
+            "schedule_id": schedule.get('id'),
+            "time_zone": output_tz,
+            "duration": duration,
+            "slots": slots
+        }
+    }
+
+
+def is_revert(error):
+    """Whether a JSON-RPC error, exception or message reports a call that reverted"""
+    if isinstance(error, dict):
+        # geth and its forks use code 3 for reverts; others only say so in the message
+        if error.get("code") == 3:
+            return True
+        error = error.get("message", "")
+    return "revert" in str(error).lower()
+
+
+def view_batch(contract, fn_name, arg_lists):
+    """(eth_call requests, output types) for one call of a view per argument list"""
+    fn_abi = contract.get_function_by_name(fn_name).abi
+    output_types = [output['type'] for output in fn_abi['outputs']]
+    calls = [
+        ("eth_call", [{"to": contract.address, "data": contract.encodeABI(fn_name=fn_name, args=args)}, "latest"])
+        for args in arg_lists
+    ]
+    return calls, output_types
+
+
+def view_batch_outputs(codec, fn_name, output_types, responses):
+    """Decode the responses to view_batch() calls, with None for calls that reverted
+
+    Any other error (rate limits, node failures) raises ConnectionError, so
+    it is not mistaken for a missing entity.
+    """
+    results = []
+    for response in responses:
+        if "error" in response:
+            if not is_revert(response["error"]):
+                raise ConnectionError(f"{fn_name} call failed: {response['error']}")
+            results.append(None)
+        elif not response.get("result"):
+            results.append(None)
+        else:
+            results.append(codec.decode(output_types, HexBytes(response["result"])))
+    return results
+
+
+def record_from_output(entity, output):
+    """Turn a getX(id) view result into a response record"""
+    return dict(zip(ENTITIES[entity]["fields"], output))
+
+
+def records_from_columns(entity, data):
+    """Turn a getAllX() view result (one array per field) into response records"""
+    fields = ENTITIES[entity]["fields"]
+    return [
+        {field: column[i] for field, column in zip(fields, data)}
+        for i in range(len(data[0]))
+    ]
+
+
+def _name_key(name):
+    return name.strip().casefold() if isinstance(name, str) else None
+
+
+def join_customers(projects, customers):
+    """Attach to each project the customer its customer field refers to, as customer_record
+
+    The field holds a customer ID or name. Customers are hashed by both in
+    one pass, then projects are matched in a second, so the cost is linear
+    in the two list sizes. An ID match wins; names compare case-insensitively
+    and, if several customers share one, the oldest (lowest ID) is used.
+    Unmatched projects get None. Projects are yielded as they are matched,
+    so a lazy iterable can feed a stream.
+    """
+    by_id = {}
+    by_name = {}
+    for customer in customers:
+        by_id[str(customer["id"])] = customer
+        key = _name_key(customer.get("name"))
+        if key and (key not in by_name or customer["id"] < by_name[key]["id"]):
+            by_name[key] = customer
+    for record in projects:
+        value = record.get("customer")
+        match = by_id.get(value.strip()) if isinstance(value, str) else None
+        record["customer_record"] = match or by_name.get(_name_key(value))
+        yield record
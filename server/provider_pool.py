@@ -0,0 +1,394 @@
+"""
+Latency-aware pool of JSON-RPC providers with live failover
+Replaces the single provider picked at import time
+"""
+
+import asyncio
+import itertools
+import logging
+import threading
+import time
+from collections import deque
+
+import aiohttp
+import requests
+from web3 import AsyncWeb3, Web3
+from web3.providers.async_base import AsyncBaseProvider
+from web3.providers.base import BaseProvider
+
+logger = logging.getLogger(__name__)
+
+# Reads that are safe to retry against another endpoint
+IDEMPOTENT_METHODS = frozenset({
+    "web3_clientVersion",
+    "net_version",
+    "eth_chainId",
+    "eth_blockNumber",
+    "eth_call",
+    "eth_estimateGas",
+    "eth_gasPrice",
+    "eth_maxPriorityFeePerGas",
+    "eth_feeHistory",
+    "eth_getBalance",
+    "eth_getBlockByNumber",
+    "eth_getBlockByHash",
+    "eth_getCode",
+    "eth_getLogs",
+    "eth_getStorageAt",
+    "eth_getTransactionByHash",
+    "eth_getTransactionCount",
+    "eth_getTransactionReceipt",
+})
+
+# Seconds of latency an endpoint's score is charged per unit of error rate
+ERROR_PENALTY = 1.0
+
+
+class Endpoint:
+    """Rolling health statistics for one provider URL"""
+
+    def __init__(self, url, provider, window):
+        self.url = url
+        self.provider = provider
+        self.latency_ewma = None
+        self.outcomes = deque(maxlen=window)
+        self.consecutive_failures = 0
+        self.cooldown_until = 0.0
+        self.excluded = False
+        # Set once eth_chainId has confirmed the endpoint serves the pool's chain
+        self.verified = False
+        self.next_check = 0.0
+        self.requests = 0
+
+    @property
+    def error_rate(self):
+        if not self.outcomes:
+            return 0.0
+        return self.outcomes.count(False) / len(self.outcomes)
+
+    def score(self):
+        """Lower is better; untried endpoints score 0 so they get probed"""
+        return (self.latency_ewma or 0.0) + self.error_rate * ERROR_PENALTY
+
+    def status(self, now):
+        return {
+            "url": self.url,
+            "latency_ms": round(self.latency_ewma * 1000, 2) if self.latency_ewma is not None else None,
+            "error_rate": round(self.error_rate, 3),
+            "requests": self.requests,
+            "cooling_down": self.cooldown_until > now,
+            "excluded": self.excluded,
+            "verified": self.verified,
+        }
+
+
+class ProviderPool(BaseProvider):
+    """Routes every RPC to the healthiest endpoint
+
+    Endpoints are ranked by an exponentially weighted latency plus a penalty
+    for their recent error rate. An endpoint that fails max_failures times in a
+    row sits out for cooldown seconds. Idempotent reads fail over to the
+    next endpoint within the same request; writes are sent once.
+
+    An endpoint only serves requests once its eth_chainId matches the chain
+    the pool is pinned to. One that is unreachable when the chain is pinned
+    is checked again, at most every cooldown seconds, before its first use.
+    """
+
+    def __init__(self, urls, timeout=10, window=50, alpha=0.2, max_failures=3, cooldown=30.0):
+        super().__init__()
+        self.alpha = alpha
+        self.max_failures = max_failures
+        self.cooldown = cooldown
+        self.timeout = timeout
+        self._lock = threading.Lock()
+        self._session = requests.Session()
+        # Created on first use by AsyncProviderPool, inside the event loop
+        self._batch_session = None
+        self._ids = itertools.count()
+        self.chain_id = None
+        self.endpoints = [
+            Endpoint(url, self._make_provider(url), window)
+            for url in dict.fromkeys(url for url in urls if url)
+        ]
+
+    def _make_provider(self, url):
+        return Web3.HTTPProvider(url, request_kwargs={"timeout": self.timeout})
+
+    def pin_chain(self):
+        """Exclude endpoints that serve a different chain than the first reachable one
+
+        Returns the chain ID in use, or None if no endpoint answered.
+        """
+        for endpoint in self.endpoints:
+            self._check_chain(endpoint)
+        return self.chain_id
+
+    def _check_chain(self, endpoint):
+        """Ask endpoint for its chain ID and verify or exclude it"""
+        try:
+            response = endpoint.provider.make_request("eth_chainId", [])
+            endpoint_chain = int(response["result"], 16)
+        except Exception as e:
+            self._unreachable(endpoint, e)
+            return
+        self._apply_chain(endpoint, endpoint_chain)
+
+    def _unreachable(self, endpoint, error):
+        logger.warning(f"Error connecting to {endpoint.url}: {str(error)}")
+        self._record(endpoint, None, False)
+        with self._lock:
+            endpoint.next_check = time.monotonic() + self.cooldown
+
+    def _apply_chain(self, endpoint, endpoint_chain):
+        with self._lock:
+            if self.chain_id is None:
+                self.chain_id = endpoint_chain
+                logger.info(f"Provider pool pinned to chain {self.chain_id} via {endpoint.url}")
+            if endpoint_chain == self.chain_id:
+                endpoint.verified = True
+            else:
+                endpoint.excluded = True
+                logger.warning(f"Excluding {endpoint.url}: chain {endpoint_chain} != {self.chain_id}")
+
+    def _due_checks(self):
+        """Unverified endpoints that are due for a chain check"""
+        now = time.monotonic()
+        with self._lock:
+            due = [
+                e for e in self.endpoints
+                if not e.verified and not e.excluded and e.next_check <= now
+            ]
+            # Claimed under the lock so concurrent requests check each endpoint once
+            for endpoint in due:
+                endpoint.next_check = now + self.cooldown
+        return due
+
+    def _ranked(self):
+        for endpoint in self._due_checks():
+            self._check_chain(endpoint)
+        return self._candidates()
+
+    def _candidates(self):
+        now = time.monotonic()
+        with self._lock:
+            candidates = [e for e in self.endpoints if e.verified and not e.excluded]
+            healthy = sorted((e for e in candidates if e.cooldown_until <= now), key=Endpoint.score)
+            cooling = sorted((e for e in candidates if e.cooldown_until > now),
+                             key=lambda e: e.cooldown_until)
+        # Endpoints in cooldown are only used when nothing else is left
+        return healthy + cooling
+
+    def _record(self, endpoint, elapsed, ok):
+        with self._lock:
+            endpoint.requests += 1
+            endpoint.outcomes.append(ok)
+            if elapsed is not None:
+                if endpoint.latency_ewma is None:
+                    endpoint.latency_ewma = elapsed
+                else:
+                    endpoint.latency_ewma += self.alpha * (elapsed - endpoint.latency_ewma)
+            if ok:
+                endpoint.consecutive_failures = 0
+                endpoint.cooldown_until = 0.0
+            else:
+                endpoint.consecutive_failures += 1
+                if endpoint.consecutive_failures >= self.max_failures:
+                    endpoint.cooldown_until = time.monotonic() + self.cooldown
+
+    def make_request(self, method, params):
+        candidates = self._ranked()
+        if not candidates:
+            raise ConnectionError("No Web3 provider is reachable on the pinned chain")
+        if method not in IDEMPOTENT_METHODS:
+            candidates = candidates[:1]
+
+        last_error = None
+        for endpoint in candidates:
+            start = time.perf_counter()
+            try:
+                response = endpoint.provider.make_request(method, params)
+            except Exception as e:
+                self._record(endpoint, None, False)
+                logger.warning(f"RPC {method} failed on {endpoint.url}: {str(e)}")
+                last_error = e
+                continue
+            self._record(endpoint, time.perf_counter() - start, True)
+            return response
+        raise last_error
+
+    def make_batch_request(self, calls):
+        """Send several (method, params) calls as one JSON-RPC batch
+
+        Returns the responses in the order of calls. The whole batch fails
+        over like a single request when every call is an idempotent read.
+        """
+        if not calls:
+            return []
+        ids, payload = self._batch_payload(calls)
+        candidates = self._batch_candidates(calls, self._ranked())
+
+        last_error = None
+        for endpoint in candidates:
+            start = time.perf_counter()
+            try:
+                response = self._session.post(endpoint.url, json=payload, timeout=self.timeout)
+                response.raise_for_status()
+                body = _batch_body(response.json())
+            except Exception as e:
+                self._record(endpoint, None, False)
+                logger.warning(f"RPC batch of {len(calls)} failed on {endpoint.url}: {str(e)}")
+                last_error = e
+                continue
+            self._record(endpoint, time.perf_counter() - start, True)
+            return _batch_responses(body, ids)
+        raise last_error
+
+    def _batch_payload(self, calls):
+        ids = [next(self._ids) for _ in calls]
+        payload = [
+            {"jsonrpc": "2.0", "method": method, "params": params, "id": request_id}
+            for request_id, (method, params) in zip(ids, calls)
+        ]
+        return ids, payload
+
+    @staticmethod
+    def _batch_candidates(calls, candidates):
+        if not candidates:
+            raise ConnectionError("No Web3 provider is reachable on the pinned chain")
+        if any(method not in IDEMPOTENT_METHODS for method, _ in calls):
+            return candidates[:1]
+        return candidates
+
+    def is_connected(self, show_traceback=False):
+        try:
+            response = self.make_request("web3_clientVersion", [])
+        except Exception:
+            if show_traceback:
+                raise
+            return False
+        return "error" not in response
+
+    def active_url(self):
+        """URL that the next request will be routed to"""
+        candidates = self._ranked()
+        return candidates[0].url if candidates else None
+
+    def status(self):
+        now = time.monotonic()
+        with self._lock:
+            return [endpoint.status(now) for endpoint in self.endpoints]
+
+
+def _batch_body(body):
+    if not isinstance(body, list):
+        # Some nodes answer an unsupported batch with a single error object
+        raise ValueError(f"Batch requests not supported: {body}")
+    return body
+
+
+def _batch_responses(body, ids):
+    """Batch responses in request order; nodes may answer a batch in any order"""
+    by_id = {item.get("id"): item for item in body}
+    return [
+        by_id.get(request_id, {"error": {"code": -32603, "message": "Missing response"}})
+        for request_id in ids
+    ]
+
+
+class AsyncProviderPool(AsyncBaseProvider, ProviderPool):
+    """ProviderPool for AsyncWeb3
+
+    Ranking, failover and chain pinning are the same; requests are awaited
+    on AsyncHTTPProvider endpoints and batches are posted with aiohttp.
+    Call close() on shutdown to release the batch session.
+    """
+
+    def _make_provider(self, url):
+        return AsyncWeb3.AsyncHTTPProvider(
+            url, request_kwargs={"timeout": aiohttp.ClientTimeout(total=self.timeout)}
+        )
+
+    async def pin_chain(self):
+        for endpoint in self.endpoints:
+            await self._check_chain(endpoint)
+        return self.chain_id
+
+    async def _check_chain(self, endpoint):
+        try:
+            response = await endpoint.provider.make_request("eth_chainId", [])
+            endpoint_chain = int(response["result"], 16)
+        except Exception as e:
+            self._unreachable(endpoint, e)
+            return
+        self._apply_chain(endpoint, endpoint_chain)
+
+    async def _ranked(self):
+        due = self._due_checks()
+        if due:
+            await asyncio.gather(*(self._check_chain(endpoint) for endpoint in due))
+        return self._candidates()
+
+    async def make_request(self, method, params):
+        candidates = await self._ranked()
+        if not candidates:
+            raise ConnectionError("No Web3 provider is reachable on the pinned chain")
+        if method not in IDEMPOTENT_METHODS:
+            candidates = candidates[:1]
+
+        last_error = None
+        for endpoint in candidates:
+            start = time.perf_counter()
+            try:
+                response = await endpoint.provider.make_request(method, params)
+            except Exception as e:
+                self._record(endpoint, None, False)
+                logger.warning(f"RPC {method} failed on {endpoint.url}: {str(e)}")
+                last_error = e
+                continue
+            self._record(endpoint, time.perf_counter() - start, True)
+            return response
+        raise last_error
+
+    async def make_batch_request(self, calls):
+        if not calls:
+            return []
+        ids, payload = self._batch_payload(calls)
+        candidates = self._batch_candidates(calls, await self._ranked())
+        if self._batch_session is None or self._batch_session.closed:
+            self._batch_session = aiohttp.ClientSession(timeout=aiohttp.ClientTimeout(total=self.timeout))
+
+        last_error = None
+        for endpoint in candidates:
+            start = time.perf_counter()
+            try:
+                async with self._batch_session.post(endpoint.url, json=payload) as response:
+                    response.raise_for_status()
+                    body = _batch_body(await response.json(content_type=None))
+            except Exception as e:
+                self._record(endpoint, None, False)
+                logger.warning(f"RPC batch of {len(calls)} failed on {endpoint.url}: {str(e)}")
+                last_error = e
+                continue
+            self._record(endpoint, time.perf_counter() - start, True)
+            return _batch_responses(body, ids)
+        raise last_error
+
+    async def is_connected(self, show_traceback=False):
+        try:
+            response = await self.make_request("web3_clientVersion", [])
+        except Exception:
+            if show_traceback:
+                raise
+            return False
+        return "error" not in response
+
+    def active_url(self):
+        """URL that the next request will be routed to, without checking pending endpoints"""
+        candidates = self._candidates()
+        return candidates[0].url if candidates else None
+
+    async def close(self):
+        if self._batch_session is not None:
+            await self._batch_session.close()
+
@@ -0,0 +1,91 @@
+"""
+Per-request attribution of JSON-RPC calls
+Collects every web3 request made while serving an API request
+"""
+
+import time
+from contextvars import ContextVar
+
+_current_trace = ContextVar("rpc_trace", default=None)
+
+
+class RPCTrace:
+    """The JSON-RPC calls issued on behalf of one API request"""
+
+    def __init__(self):
+        self.calls = []
+
+    def record(self, method, duration, outcome="ok"):
+        self.calls.append((method, duration, outcome))
+
+    @property
+    def count(self):
+        return len(self.calls)
+
+    @property
+    def total_ms(self):
+        return sum(duration for _, duration, _ in self.calls) * 1000
+
+    def breakdown(self):
+        """Calls in the order they were made, for the slow-request log"""
+        return [
+            {"method": method, "ms": round(duration * 1000, 2), "outcome": outcome}
+            for method, duration, outcome in self.calls
+        ]
+
+
+def start_trace():
+    """Begin attributing calls made from the current context"""
+    trace = RPCTrace()
+    _current_trace.set(trace)
+    return trace
+
+
+def current_trace():
+    return _current_trace.get()
+
+
+def end_trace():
+    _current_trace.set(None)
+
+
+def rpc_trace_middleware(make_request, w3):
+    """web3 middleware that adds each request to the current trace, if any
+
+    Background threads (receipt polling, the indexer) have no trace, so
+    their calls are not attributed to whichever request happens to be running.
+    """
+    def middleware(method, params):
+        trace = _current_trace.get()
+        if trace is None:
+            return make_request(method, params)
+        start = time.perf_counter()
+        try:
+            response = make_request(method, params)
+        except Exception:
+            trace.record(method, time.perf_counter() - start, "exception")
+            raise
+        trace.record(method, time.perf_counter() - start, "error" if "error" in response else "ok")
+        return response
+    return middleware
+
+
+async def async_rpc_trace_middleware(make_request, w3):
+    """rpc_trace_middleware for AsyncWeb3
+
+    Tasks copy the context they are created in, so calls made by tasks a
+    request spawns (e.g. asyncio.gather) are added to its trace.
+    """
+    async def middleware(method, params):
+        trace = _current_trace.get()
+        if trace is None:
+            return await make_request(method, params)
+        start = time.perf_counter()
+        try:
+            response = await make_request(method, params)
+        except Exception:
+            trace.record(method, time.perf_counter() - start, "exception")
+            raise
+        trace.record(method, time.perf_counter() - start, "error" if "error" in response else "ok")
+        return response
+    return middleware
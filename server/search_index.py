@@ -0,0 +1,172 @@
+"""
+In-memory keyword search over knowledge base entries
+An inverted index kept up to date incrementally as entries change
+"""
+
+import bisect
+import heapq
+import re
+import threading
+
+MAX_SEARCH_RESULTS = 100
+TOKEN_PATTERN = re.compile(r"\w+")
+# A prefix matching more tokens than this is checked per candidate entry
+# instead of being expanded over the vocabulary
+PREFIX_EXPANSION_LIMIT = 32
+# Shorter final terms only match whole tokens
+MIN_PREFIX_LENGTH = 2
+_EMPTY = frozenset()
+
+
+def tokenize(text):
+    """Lowercase word tokens of text"""
+    return TOKEN_PATTERN.findall(str(text or "").lower())
+
+
+class _Postings:
+    """Token -> IDs, plus the sorted vocabulary used for prefix lookups"""
+
+    def __init__(self):
+        self.ids = {}
+        self.vocabulary = []
+
+    def add(self, token, doc_id):
+        ids = self.ids.get(token)
+        if ids is None:
+            ids = self.ids[token] = set()
+            bisect.insort(self.vocabulary, token)
+        ids.add(doc_id)
+
+    def discard(self, token, doc_id):
+        ids = self.ids[token]
+        ids.discard(doc_id)
+        if not ids:
+            del self.ids[token]
+            del self.vocabulary[bisect.bisect_left(self.vocabulary, token)]
+
+    def get(self, token):
+        return self.ids.get(token, _EMPTY)
+
+    def prefix_tokens(self, prefix):
+        """Every token starting with prefix"""
+        start = bisect.bisect_left(self.vocabulary, prefix)
+        end = bisect.bisect_left(self.vocabulary, prefix + "\uffff", start)
+        return self.vocabulary[start:end]
+
+
+class InvertedIndex:
+    """Maps tokens to the IDs of the entries that contain them
+
+    Every query term must match (AND). The last term also matches as a
+    prefix so partially typed words work for autocomplete. Entries whose
+    title contains every term are returned first, newest first within each
+    group. Matching is done with set intersections and a heap picks the
+    top `limit` matches without sorting the rest, so query time depends on
+    posting sizes rather than on the number of entries.
+
+    add() and remove() only touch the postings of the affected entry.
+    """
+
+    def __init__(self, fields=("title", "group", "content"), title_field="title", group_field="group"):
+        self.fields = fields
+        self.title_field = title_field
+        self.group_field = group_field
+        self._lock = threading.RLock()
+        self._all = _Postings()
+        self._titles = _Postings()
+        self._groups = {}
+        self._doc_tokens = {}
+        self._records = {}
+
+    def __len__(self):
+        return len(self._records)
+
+    def __contains__(self, doc_id):
+        return doc_id in self._records
+
+    def add(self, doc_id, record):
+        """Index record under doc_id, replacing any previous version"""
+        tokens = set()
+        for field in self.fields:
+            tokens.update(tokenize(record.get(field)))
+        title_tokens = set(tokenize(record.get(self.title_field)))
+        group = str(record.get(self.group_field) or "").lower()
+        with self._lock:
+            self.remove(doc_id)
+            for token in tokens:
+                self._all.add(token, doc_id)
+            for token in title_tokens:
+                self._titles.add(token, doc_id)
+            self._groups.setdefault(group, set()).add(doc_id)
+            self._doc_tokens[doc_id] = (tokens, title_tokens)
+            self._records[doc_id] = dict(record)
+
+    def remove(self, doc_id):
+        with self._lock:
+            record = self._records.pop(doc_id, None)
+            if record is None:
+                return
+            tokens, title_tokens = self._doc_tokens.pop(doc_id)
+            for token in tokens:
+                self._all.discard(token, doc_id)
+            for token in title_tokens:
+                self._titles.discard(token, doc_id)
+            group = str(record.get(self.group_field) or "").lower()
+            members = self._groups[group]
+            members.discard(doc_id)
+            if not members:
+                del self._groups[group]
+
+    def clear(self):
+        with self._lock:
+            self._all = _Postings()
+            self._titles = _Postings()
+            self._groups.clear()
+            self._doc_tokens.clear()
+            self._records.clear()
+
+    def _match(self, postings, exact, prefix, extra=(), token_slot=0):
+        """IDs matching every exact term, the prefix and any extra ID sets"""
+        required = [postings.get(term) for term in exact] + list(extra)
+        required.sort(key=len)
+        if not required:
+            base = None
+        elif len(required) == 1:
+            base = required[0]
+        else:
+            base = required[0].intersection(*required[1:])
+        if prefix is None:
+            return base if base is not None else _EMPTY
+        tokens = postings.prefix_tokens(prefix)
+        if base is None:
+            if len(tokens) == 1:
+                return postings.ids[tokens[0]]
+            return set().union(*(postings.ids[token] for token in tokens))
+        if len(tokens) > PREFIX_EXPANSION_LIMIT:
+            return {
+                doc_id for doc_id in base
+                if any(token.startswith(prefix) for token in self._doc_tokens[doc_id][token_slot])
+            }
+        return set().union(*(base.intersection(postings.ids[token]) for token in tokens))
+
+    def search(self, query, group=None, limit=20):
+        """Return up to limit matching records, best matches first"""
+        terms = tokenize(query)
+        exact, prefix = terms[:-1], (terms[-1] if terms else None)
+        if prefix is not None and len(prefix) < MIN_PREFIX_LENGTH:
+            exact, prefix = terms, None
+        with self._lock:
+            groups = [self._groups.get(group.lower(), _EMPTY)] if group is not None else []
+            if not terms and not groups:
+                return []
+
+            # Entries with every term in the title come first; they match
+            # overall too, so the full match set is only built when they
+            # don't fill the page
+            title_hits = self._match(self._titles, exact, prefix, groups, token_slot=1) if terms else _EMPTY
+            best = heapq.nlargest(limit, title_hits)
+            if len(best) < limit:
+                matches = self._match(self._all, exact, prefix, groups)
+                rest = (doc_id for doc_id in matches if doc_id not in title_hits)
+                best.extend(heapq.nlargest(limit - len(best), rest))
+            return [dict(self._records[doc_id]) for doc_id in best]
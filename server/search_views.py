@@ -0,0 +1,92 @@
+"""
+Knowledge base search indexes kept in step with their source
+Shared by the Flask app and the asyncio serving mode, which do the reads
+"""
+
+import logging
+import threading
+
+from web3.logs import DISCARD
+
+from indexer import ENTITIES
+
+logger = logging.getLogger(__name__)
+
+
+class SearchViews:
+    """Feeds knowledge base entries to a set of search indexes
+
+    With the local index ready, changes are read from its change log (this
+    also picks up writes made by other workers or clients). Otherwise the
+    entries are loaded from the contract once and kept current from the
+    receipts of this process's writes.
+    """
+
+    def __init__(self, codec, *views):
+        self.codec = codec
+        self.views = views
+        # "index", "chain" or None before the first load
+        self.source = None
+        self._seq = None
+        self._lock = threading.Lock()
+
+    def reset(self):
+        """Load every entry again on next use, e.g. after the contract changes"""
+        self.source = None
+
+    def sync_index(self, indexer):
+        """Apply the local index's changes since the last sync, or load it whole"""
+        with self._lock:
+            if self.source == "index":
+                changes = indexer.changes_since("knowledge_base", self._seq)
+                if changes is not None:
+                    self._seq, records, deleted = changes
+                    self.codec.decode("knowledge_base", records)
+                    for record in records:
+                        self._add(record["id"], record)
+                    for entity_id in deleted:
+                        self._remove(entity_id)
+                    return
+            self._seq, records = indexer.export("knowledge_base")
+            self._load(records, "index")
+
+    def load_chain(self, records):
+        """Replace every entry with records read from the contract"""
+        with self._lock:
+            self._load(records, "chain")
+
+    def _load(self, records, source):
+        self.codec.decode("knowledge_base", records)
+        for view in self.views:
+            view.clear()
+            for record in records:
+                view.add(record["id"], record)
+        self.source = source
+        logger.info(f"Search index loaded {len(records)} knowledge base entries from {source}")
+
+    def add(self, entity_id, record):
+        """Add or replace one entry read from the contract"""
+        self.codec.decode("knowledge_base", [record])
+        with self._lock:
+            self._add(entity_id, record)
+
+    def remove(self, entity_id):
+        with self._lock:
+            self._remove(entity_id)
+
+    def _add(self, entity_id, record):
+        for view in self.views:
+            view.add(entity_id, record)
+
+    def _remove(self, entity_id):
+        for view in self.views:
+            view.remove(entity_id)
+
+
+def receipt_changes(contract, receipt):
+    """(id, deleted) for each knowledge base event in a mined receipt"""
+    changes = []
+    for event_name in ENTITIES["knowledge_base"]["events"]:
+        for event in getattr(contract.events, event_name)().process_receipt(receipt, errors=DISCARD):
+            changes.append((event.args.id, event_name.endswith("Deleted")))
+    return changes
@@ -0,0 +1,137 @@
+"""
+Cross-process coordination for the multi-worker serving mode
+File locks and mmap-backed counters shared by pre-forked workers on one host
+"""
+
+import fcntl
+import json
+import mmap
+import os
+import struct
+import threading
+
+COUNTER_FORMAT = "<Q"
+COUNTER_SIZE = struct.calcsize(COUNTER_FORMAT)
+
+
+class FileLock:
+    """Exclusive lock over a file, held across threads and processes
+
+    flock() only excludes other open file descriptions, so a thread lock
+    serializes callers within a process. The file is reopened after a fork
+    so each worker gets its own lock.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self._thread_lock = threading.Lock()
+        self._fd = None
+        self._pid = None
+
+    def _file(self):
+        if self._pid != os.getpid():
+            self._fd = os.open(self.path, os.O_RDWR | os.O_CREAT, 0o600)
+            self._pid = os.getpid()
+        return self._fd
+
+    def __enter__(self):
+        self._thread_lock.acquire()
+        try:
+            fcntl.flock(self._file(), fcntl.LOCK_EX)
+        except Exception:
+            self._thread_lock.release()
+            raise
+        return self
+
+    def __exit__(self, *exc_info):
+        fcntl.flock(self._fd, fcntl.LOCK_UN)
+        self._thread_lock.release()
+
+
+class SharedCounter:
+    """A 64-bit counter in a memory-mapped file
+
+    Reads are a plain memory load, so checking it on every request is cheap.
+    Increments take a file lock.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self._lock = FileLock(f"{path}.lock")
+        self._map = None
+        self._pid = None
+
+    def _mapping(self):
+        if self._pid != os.getpid():
+            fd = os.open(self.path, os.O_RDWR | os.O_CREAT, 0o600)
+            try:
+                if os.fstat(fd).st_size < COUNTER_SIZE:
+                    os.ftruncate(fd, COUNTER_SIZE)
+                self._map = mmap.mmap(fd, COUNTER_SIZE)
+            finally:
+                os.close(fd)
+            self._pid = os.getpid()
+        return self._map
+
+    @property
+    def value(self):
+        return struct.unpack_from(COUNTER_FORMAT, self._mapping())[0]
+
+    def increment(self):
+        """Add one and return the new value"""
+        with self._lock:
+            mapping = self._mapping()
+            value = struct.unpack_from(COUNTER_FORMAT, mapping)[0] + 1
+            struct.pack_into(COUNTER_FORMAT, mapping, 0, value)
+            return value
+
+
+class SharedGeneration:
+    """This process's view of a SharedCounter used as an invalidation generation
+
+    Caches call changed() under their own lock on every lookup and drop
+    their entries when it returns True, and call bump() when they
+    invalidate locally. Without a counter both are no-ops.
+    """
+
+    def __init__(self, counter=None):
+        self.counter = counter
+        self._seen = counter.value if counter is not None else None
+
+    def changed(self):
+        """Whether another process has invalidated since the last call"""
+        if self.counter is None:
+            return False
+        value = self.counter.value
+        if value == self._seen:
+            return False
+        self._seen = value
+        return True
+
+    def bump(self):
+        """Tell the other processes that this one invalidated"""
+        if self.counter is not None:
+            self._seen = self.counter.increment()
+
+
+class SharedJSON:
+    """A JSON document in a file, read and replaced under a file lock"""
+
+    def __init__(self, path):
+        self.path = path
+        self.lock = FileLock(f"{path}.lock")
+
+    def load(self):
+        """Read the document; callers that modify it should hold self.lock"""
+        try:
+            with open(self.path) as f:
+                return json.load(f)
+        except (FileNotFoundError, json.JSONDecodeError):
+            return {}
+
+    def save(self, data):
+        tmp_path = f"{self.path}.{os.getpid()}.tmp"
+        fd = os.open(tmp_path, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600)
+        with os.fdopen(fd, "w") as f:
+            json.dump(data, f)
+        os.replace(tmp_path, self.path)
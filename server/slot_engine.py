@@ -0,0 +1,176 @@
+"""
+Free-slot computation for Cal.com schedules
+Expands weekly availability over a date range and subtracts bookings
+"""
+
+import math
+from datetime import date, datetime, time, timedelta, timezone
+from zoneinfo import ZoneInfo
+
+WEEKDAYS = ("Monday", "Tuesday", "Wednesday", "Thursday", "Friday", "Saturday", "Sunday")
+CANCELLED_STATUSES = {"cancelled", "canceled", "rejected"}
+
+
+def parse_time(value):
+    """Parse 'HH:MM' or 'HH:MM:SS' into a time"""
+    parts = [int(part) for part in value.split(":")]
+    return time(*parts[:3])
+
+
+def parse_instant(value):
+    """Parse an ISO 8601 timestamp into an aware UTC datetime"""
+    if isinstance(value, datetime):
+        parsed = value
+    else:
+        parsed = datetime.fromisoformat(value.replace("Z", "+00:00"))
+    if parsed.tzinfo is None:
+        parsed = parsed.replace(tzinfo=timezone.utc)
+    return parsed.astimezone(timezone.utc)
+
+
+def _weekday_index(day):
+    """Cal.com sends day names (v2) or numbers with 0 = Sunday (v1)"""
+    if isinstance(day, int):
+        return (day - 1) % 7
+    return WEEKDAYS.index(day.capitalize())
+
+
+def weekly_windows(schedule):
+    """Map weekday (0 = Monday) to a list of (start_time, end_time) windows"""
+    windows = {weekday: [] for weekday in range(7)}
+    for rule in schedule.get("availability") or []:
+        start, end = parse_time(rule["startTime"]), parse_time(rule["endTime"])
+        for day in rule.get("days", []):
+            windows[_weekday_index(day)].append((start, end))
+    return windows
+
+
+def date_overrides(schedule):
+    """Map date to its override windows; an empty list means unavailable"""
+    overrides = {}
+    for override in schedule.get("overrides") or []:
+        day = date.fromisoformat(override["date"])
+        start, end = parse_time(override["startTime"]), parse_time(override["endTime"])
+        overrides.setdefault(day, [])
+        if start != end:
+            overrides[day].append((start, end))
+    return overrides
+
+
+def merge_intervals(intervals):
+    """Sort and merge overlapping or touching (start, end) intervals"""
+    merged = []
+    for start, end in sorted(intervals):
+        if end <= start:
+            continue
+        if merged and start <= merged[-1][1]:
+            if end > merged[-1][1]:
+                merged[-1] = (merged[-1][0], end)
+        else:
+            merged.append((start, end))
+    return merged
+
+
+def expand_availability(schedule, range_start, range_end):
+    """Expand a schedule into merged UTC intervals clipped to the range"""
+    tz = ZoneInfo(schedule.get("timeZone") or "UTC")
+    windows = weekly_windows(schedule)
+    overrides = date_overrides(schedule)
+
+    intervals = []
+    # Pad by a day on each side so windows crossing midnight in tz are kept
+    day = range_start.astimezone(tz).date() - timedelta(days=1)
+    last_day = range_end.astimezone(tz).date() + timedelta(days=1)
+    while day <= last_day:
+        day_windows = overrides[day] if day in overrides else windows[day.weekday()]
+        for start_time, end_time in day_windows:
+            start = datetime.combine(day, start_time, tzinfo=tz)
+            # An end at or before the start (e.g. 00:00) runs to the next midnight
+            end_day = day if end_time > start_time else day + timedelta(days=1)
+            end = datetime.combine(end_day, end_time, tzinfo=tz)
+            start = max(start.astimezone(timezone.utc), range_start)
+            end = min(end.astimezone(timezone.utc), range_end)
+            if start < end:
+                intervals.append((start, end))
+        day += timedelta(days=1)
+    return merge_intervals(intervals)
+
+
+def booking_intervals(bookings):
+    """Turn Cal.com bookings into merged busy UTC intervals"""
+    intervals = []
+    for booking in bookings:
+        if str(booking.get("status", "")).lower() in CANCELLED_STATUSES:
+            continue
+        start = booking.get("start") or booking.get("startTime")
+        end = booking.get("end") or booking.get("endTime")
+        if start and end:
+            intervals.append((parse_instant(start), parse_instant(end)))
+    return merge_intervals(intervals)
+
+
+def subtract_intervals(available, busy):
+    """Remove busy intervals from available ones
+
+    Both lists must be sorted and merged. A single sweep with two cursors
+    keeps this O(n + m).
+    """
+    free = []
+    j = 0
+    for start, end in available:
+        # Skip bookings that end before this window starts
+        while j < len(busy) and busy[j][1] <= start:
+            j += 1
+        cursor = start
+        k = j
+        while k < len(busy) and busy[k][0] < end:
+            if busy[k][0] > cursor:
+                free.append((cursor, busy[k][0]))
+            cursor = max(cursor, busy[k][1])
+            k += 1
+        if cursor < end:
+            free.append((cursor, end))
+    return free
+
+
+def generate_slots(free, duration, step=None, not_before=None):
+    """Cut free intervals into slots of duration, starting every step"""
+    step = step or duration
+    slots = []
+    for start, end in free:
+        slot_start = start
+        if not_before and slot_start < not_before:
+            skipped = math.ceil((not_before - slot_start) / step)
+            slot_start += skipped * step
+        while slot_start + duration <= end:
+            slots.append((slot_start, slot_start + duration))
+            slot_start += step
+    return slots
+
+
+def select_schedule(schedules, schedule_id=None):
+    """Pick the requested schedule, else the default one, else the first"""
+    if schedule_id is not None:
+        return next((s for s in schedules if s.get("id") == schedule_id), None)
+    return next((s for s in schedules if s.get("isDefault")), schedules[0] if schedules else None)
+
+
+def compute_free_slots(schedule, bookings, range_start, range_end, duration_minutes,
+                       step_minutes=None, now=None, output_tz="UTC"):
+    """Bookable slots of duration_minutes within [range_start, range_end)
+
+    Returns a list of {"start", "end"} dicts formatted in output_tz.
+    """
+    range_start, range_end = parse_instant(range_start), parse_instant(range_end)
+    duration = timedelta(minutes=duration_minutes)
+    step = timedelta(minutes=step_minutes) if step_minutes else None
+
+    available = expand_availability(schedule, range_start, range_end)
+    free = subtract_intervals(available, booking_intervals(bookings))
+    slots = generate_slots(free, duration, step, parse_instant(now) if now else None)
+
+    tz = ZoneInfo(output_tz)
+    return [
+        {"start": start.astimezone(tz).isoformat(), "end": end.astimezone(tz).isoformat()}
+        for start, end in slots
+    ]
@@ -0,0 +1,49 @@
+"""
+Free-slot computation against recorded Cal.com schedule and booking payloads
+Run from the server directory: python -m pytest tests
+"""
+
+import copy
+import json
+import os
+import sys
+import unittest
+
+SERVER_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, SERVER_DIR)
+
+from payloads import bookable_slots, merge_bookings
+
+with open(os.path.join(SERVER_DIR, "tests", "fixtures", "cal_free_slots.json")) as f:
+    FIXTURE = json.load(f)
+
+RANGE = {"from": "2099-03-02T00:00:00Z", "to": "2099-03-03T00:00:00Z", "duration": "30"}
+
+
+def merged_payload():
+    return merge_bookings(copy.deepcopy(FIXTURE["schedules"]), FIXTURE["bookings"])
+
+
+class FreeSlotsTest(unittest.TestCase):
+    def test_merge_keeps_status_and_drops_cancelled_bookings(self):
+        bookings = [item for item in merged_payload()["data"] if item.get("type") == "unavailable"]
+        self.assertEqual(bookings, [{
+            "start": "2099-03-02T10:30:00.000Z",
+            "end": "2099-03-02T11:00:00.000Z",
+            "type": "unavailable",
+            "status": "accepted",
+        }])
+
+    def test_cancelled_and_rejected_bookings_leave_slots_free(self):
+        slots = bookable_slots(merged_payload(), RANGE)["data"]["slots"]
+        self.assertEqual([slot["start"] for slot in slots], [
+            "2099-03-02T09:00:00+00:00",
+            "2099-03-02T09:30:00+00:00",
+            "2099-03-02T10:00:00+00:00",
+            "2099-03-02T11:00:00+00:00",
+            "2099-03-02T11:30:00+00:00",
+        ])
+
+
+if __name__ == "__main__":
+    unittest.main()
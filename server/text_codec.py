@@ -0,0 +1,115 @@
+"""
+Encoding of long text fields on their way to and from the contract
+Values are compressed, or moved to the blob store, before they are written
+and restored in every response, so clients always see the original text
+"""
+
+import base64
+import logging
+import zlib
+
+from blob_store import BLOB_TAG
+
+logger = logging.getLogger(__name__)
+
+# The long free-text field of each entity
+TEXT_FIELDS = {"knowledge_base": "content", "projects": "details"}
+# Entities whose text field goes to the blob store when one is configured
+BLOB_ENTITIES = ("knowledge_base",)
+
+# Leading character of a compressed value, followed by base85 of the zlib
+# stream; ABI strings must be valid UTF-8, so raw zlib bytes can't be used.
+ZLIB_TAG = "\x01"
+# Leading character added to plain text that itself starts with a tag, so
+# user text is never mistaken for an encoded value
+ESCAPE_TAG = "\x03"
+TAGS = (ZLIB_TAG, BLOB_TAG, ESCAPE_TAG)
+
+
+def escape(text):
+    """Return text as stored uncompressed"""
+    return ESCAPE_TAG + text if text.startswith(TAGS) else text
+
+
+def compress(text):
+    """Return the compressed form of text, or escape(text) if that is not shorter"""
+    data = text.encode("utf-8")
+    encoded = ZLIB_TAG + base64.b85encode(zlib.compress(data, 9)).decode("ascii")
+    return encoded if len(encoded) < len(data) else escape(text)
+
+
+def decompress(value):
+    """Inverse of compress() and escape(); untagged (legacy) text is returned as is"""
+    if not isinstance(value, str):
+        return value
+    if value.startswith(ESCAPE_TAG):
+        return value[len(ESCAPE_TAG):]
+    if value.startswith(ZLIB_TAG):
+        return zlib.decompress(base64.b85decode(value[len(ZLIB_TAG):])).decode("utf-8")
+    return value
+
+
+class FieldCodec:
+    """Applies compression and the blob store to the text field of each entity"""
+
+    def __init__(self, compress=False, blob_store=None):
+        self.compress = compress
+        self.blob_store = blob_store
+
+    def encode(self, entity, value):
+        """What to send on-chain for a value of the entity's text field"""
+        if entity not in TEXT_FIELDS or not isinstance(value, str) or not value:
+            return value
+        if self.blob_store is not None and entity in BLOB_ENTITIES:
+            return self.blob_store.put(value)
+        if self.compress:
+            return compress(value)
+        return escape(value)
+
+    def encode_values(self, entity, fields, values):
+        """Encode the text field in values, a list aligned with fields
+
+        Items may be single values or, for batches, whole columns. Extra
+        leading items (the ID column of update batches) are left alone.
+        """
+        field = TEXT_FIELDS.get(entity)
+        if field not in fields:
+            return values
+        index = fields.index(field) - len(fields)
+        value = values[index]
+        if isinstance(value, list):
+            values[index] = [self.encode(entity, item) for item in value]
+        else:
+            values[index] = self.encode(entity, value)
+        return values
+
+    def decode(self, entity, records):
+        """Restore the text field of records read from the contract or index, in place
+
+        Always runs, so values written while compression was enabled stay
+        readable after it is turned off. Blob references need the blob store.
+        Values that cannot be restored are logged and returned as None.
+        """
+        field = TEXT_FIELDS.get(entity)
+        if field is None:
+            return records
+        blobs = self.blob_store if entity in BLOB_ENTITIES else None
+        for record in records:
+            value = record.get(field)
+            if not isinstance(value, str) or not value.startswith(TAGS):
+                continue
+            # Each value is decoded once: text restored from an escape or a
+            # blob is never looked at for tags again
+            if value.startswith(BLOB_TAG):
+                if blobs is None:
+                    logger.error(f"{entity} {field} of {record.get('id')} is a blob but BLOB_STORE_DIR is not set")
+                    record[field] = None
+                else:
+                    record[field] = blobs.resolve(value)
+                continue
+            try:
+                record[field] = decompress(value)
+            except (ValueError, zlib.error) as e:
+                logger.error(f"Could not decompress {entity} {field} of {record.get('id')}: {str(e)}")
+                record[field] = None
+        return records
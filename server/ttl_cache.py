@@ -0,0 +1,143 @@
+"""
+TTL cache with stale-while-revalidate refreshes
+Used for upstream responses (Cal.com) that callers are waiting on
+"""
+
+import asyncio
+import logging
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from shared_state import SharedGeneration
+
+logger = logging.getLogger(__name__)
+
+CACHE_HIT = "HIT"
+CACHE_STALE = "STALE"
+CACHE_MISS = "MISS"
+
+
+class TTLCache:
+    """Serves fresh entries for ttl seconds and stale ones for stale_ttl more
+
+    A stale hit returns immediately and schedules one background refresh per
+    key. invalidate() bumps a generation counter so a refresh that was
+    already running when the entry was invalidated cannot store its result.
+    Passing a SharedCounter as shared_generation extends invalidation to
+    every process that shares it.
+    """
+
+    def __init__(self, ttl, stale_ttl=0, max_workers=2, shared_generation=None):
+        self.ttl = ttl
+        self.stale_ttl = stale_ttl
+        self._entries = {}
+        self._refreshing = set()
+        self._tasks = set()
+        self._generation = 0
+        self._shared = SharedGeneration(shared_generation)
+        self._lock = threading.Lock()
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="ttl-cache")
+
+    def get(self, key, loader, cacheable=lambda value: True):
+        """Return (value, cache_status), calling loader() on a miss"""
+        now = time.monotonic()
+        with self._lock:
+            if self._shared.changed():
+                self._clear()
+            entry = self._entries.get(key)
+            generation = self._generation
+        if entry is not None:
+            value, stored_at = entry
+            age = now - stored_at
+            if age < self.ttl:
+                return value, CACHE_HIT
+            if age < self.ttl + self.stale_ttl:
+                self._refresh_in_background(key, loader, cacheable)
+                return value, CACHE_STALE
+
+        value = loader()
+        if cacheable(value):
+            self._store(key, value, generation)
+        return value, CACHE_MISS
+
+    async def async_get(self, key, loader, cacheable=lambda value: True):
+        """get() for a coroutine loader; stale refreshes run as asyncio tasks"""
+        now = time.monotonic()
+        with self._lock:
+            if self._shared.changed():
+                self._clear()
+            entry = self._entries.get(key)
+            generation = self._generation
+        if entry is not None:
+            value, stored_at = entry
+            age = now - stored_at
+            if age < self.ttl:
+                return value, CACHE_HIT
+            if age < self.ttl + self.stale_ttl:
+                self._refresh_task(key, loader, cacheable)
+                return value, CACHE_STALE
+
+        value = await loader()
+        if cacheable(value):
+            self._store(key, value, generation)
+        return value, CACHE_MISS
+
+    def _refresh_task(self, key, loader, cacheable):
+        with self._lock:
+            if key in self._refreshing:
+                return
+            self._refreshing.add(key)
+            generation = self._generation
+
+        async def refresh():
+            try:
+                value = await loader()
+                if cacheable(value):
+                    self._store(key, value, generation)
+            except Exception as e:
+                logger.warning(f"Background refresh of {key!r} failed: {str(e)}")
+            finally:
+                with self._lock:
+                    self._refreshing.discard(key)
+
+        task = asyncio.get_running_loop().create_task(refresh())
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+    def _clear(self):
+        self._entries.clear()
+        self._generation += 1
+
+    def _store(self, key, value, generation):
+        with self._lock:
+            if self._shared.changed():
+                self._clear()
+            if generation == self._generation:
+                self._entries[key] = (value, time.monotonic())
+
+    def _refresh_in_background(self, key, loader, cacheable):
+        with self._lock:
+            if key in self._refreshing:
+                return
+            self._refreshing.add(key)
+            generation = self._generation
+
+        def refresh():
+            try:
+                value = loader()
+                if cacheable(value):
+                    self._store(key, value, generation)
+            except Exception as e:
+                logger.warning(f"Background refresh of {key!r} failed: {str(e)}")
+            finally:
+                with self._lock:
+                    self._refreshing.discard(key)
+
+        self._executor.submit(refresh)
+
+    def invalidate(self):
+        """Drop every entry and discard refreshes that are in flight"""
+        with self._lock:
+            self._clear()
+            self._shared.bump()
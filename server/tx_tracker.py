@@ -0,0 +1,188 @@
+"""
+Background confirmation of submitted transactions
+Used by the async write mode so HTTP workers don't block on receipts
+"""
+
+import logging
+import threading
+import time
+from collections import OrderedDict
+
+logger = logging.getLogger(__name__)
+
+STATUS_PENDING = "pending"
+STATUS_MINED = "mined"
+STATUS_FAILED = "failed"
+
+
+class TransactionTracker:
+    """Polls for receipts of submitted transactions on a daemon thread
+
+    Records are kept in memory, bounded by max_records (oldest finished
+    records are dropped first), and looked up by transaction hash. With
+    poll=False no thread is started and the owner reports receipts through
+    record_receipt() (used by the asyncio app, which awaits them itself).
+    on_settle, if given, is called with the hash of every tracked transaction
+    once it stops being pending (mined, reverted or timed out).
+    """
+
+    def __init__(self, w3, poll_interval=2.0, timeout=600, max_records=10000, poll=True,
+                 on_settle=None):
+        self.w3 = w3
+        self.on_settle = on_settle
+        self.poll = poll
+        self.poll_interval = poll_interval
+        self.timeout = timeout
+        self.max_records = max_records
+        self._records = OrderedDict()
+        self._callbacks = {}
+        self._lock = threading.Lock()
+        self._wakeup = threading.Event()
+        self._thread = None
+
+    def track(self, tx_hash, function_name=None, on_receipt=None):
+        """Start tracking a transaction that has been sent to the node
+
+        on_receipt, if given, is called with the receipt once it is mined.
+        """
+        tx_hash = _normalize_hash(tx_hash)
+        record = {
+            "transaction_hash": tx_hash,
+            "status": STATUS_PENDING,
+            "function": function_name,
+            "submitted_at": time.time(),
+            "confirmed_at": None,
+            "block_number": None,
+            "gas_used": None,
+            "error": None,
+        }
+        with self._lock:
+            self._records[tx_hash] = record
+            if on_receipt:
+                self._callbacks[tx_hash] = on_receipt
+            self._evict()
+        self._ensure_running()
+        self._wakeup.set()
+        return dict(record)
+
+    def get(self, tx_hash):
+        """Return a copy of the record for tx_hash, or None if unknown"""
+        with self._lock:
+            record = self._records.get(_normalize_hash(tx_hash))
+            return dict(record) if record else None
+
+    def pending_count(self):
+        with self._lock:
+            return sum(1 for r in self._records.values() if r["status"] == STATUS_PENDING)
+
+    def _evict(self):
+        if len(self._records) <= self.max_records:
+            return
+        for tx_hash in list(self._records):
+            if len(self._records) <= self.max_records:
+                break
+            if self._records[tx_hash]["status"] != STATUS_PENDING:
+                del self._records[tx_hash]
+
+    def _ensure_running(self):
+        if not self.poll:
+            return
+        with self._lock:
+            if self._thread and self._thread.is_alive():
+                return
+            self._thread = threading.Thread(target=self._run, name="tx-confirmer", daemon=True)
+            self._thread.start()
+
+    def _run(self):
+        while True:
+            self._wakeup.wait(self.poll_interval)
+            self._wakeup.clear()
+            with self._lock:
+                pending = [r["transaction_hash"] for r in self._records.values()
+                           if r["status"] == STATUS_PENDING]
+            for tx_hash in pending:
+                self._poll(tx_hash)
+
+    def _poll(self, tx_hash):
+        try:
+            receipt = self.w3.eth.get_transaction_receipt(tx_hash)
+        except Exception as e:
+            # TransactionNotFound until mined; anything else is retried next round
+            if type(e).__name__ != "TransactionNotFound":
+                logger.warning(f"Receipt lookup for {tx_hash} failed: {str(e)}")
+            self._check_timeout(tx_hash)
+            return
+        self.record_receipt(receipt)
+
+    def record_receipt(self, receipt):
+        """Store the outcome of a mined transaction"""
+        tx_hash = _normalize_hash(receipt.transactionHash)
+        with self._lock:
+            record = self._records.get(tx_hash)
+            if record is None:
+                return
+            was_pending = record["status"] == STATUS_PENDING
+            record["status"] = STATUS_MINED if receipt.status == 1 else STATUS_FAILED
+            record["block_number"] = receipt.blockNumber
+            record["gas_used"] = receipt.gasUsed
+            record["confirmed_at"] = time.time()
+            if receipt.status != 1:
+                record["error"] = "Transaction reverted"
+            callback = self._callbacks.pop(tx_hash, None)
+        if was_pending:
+            self._settled(tx_hash)
+        if callback:
+            try:
+                callback(receipt)
+            except Exception as e:
+                logger.warning(f"Receipt callback for {tx_hash} failed: {str(e)}")
+        logger.info(f"Transaction {tx_hash} {record['status']} in block {receipt.blockNumber}")
+
+    def record_failure(self, tx_hash, error):
+        """Mark a tracked transaction as failed without a receipt"""
+        tx_hash = _normalize_hash(tx_hash)
+        with self._lock:
+            record = self._records.get(tx_hash)
+            settled = record is not None and record["status"] == STATUS_PENDING
+            if settled:
+                record["status"] = STATUS_FAILED
+                record["error"] = error
+            self._callbacks.pop(tx_hash, None)
+        if settled:
+            self._settled(tx_hash)
+
+    def _check_timeout(self, tx_hash):
+        with self._lock:
+            record = self._records.get(tx_hash)
+            timed_out = (record is not None and record["status"] == STATUS_PENDING
+                         and time.time() - record["submitted_at"] > self.timeout)
+            if timed_out:
+                record["status"] = STATUS_FAILED
+                record["error"] = f"No receipt after {self.timeout} seconds"
+                self._callbacks.pop(tx_hash, None)
+        if timed_out:
+            self._settled(tx_hash)
+
+    def _settled(self, tx_hash):
+        if self.on_settle:
+            try:
+                self.on_settle(tx_hash)
+            except Exception as e:
+                logger.warning(f"Settle callback for {tx_hash} failed: {str(e)}")
+
+
+def _normalize_hash(tx_hash):
+    if isinstance(tx_hash, (bytes, bytearray)):
+        tx_hash = tx_hash.hex()
+    tx_hash = tx_hash.lower()
+    return tx_hash if tx_hash.startswith("0x") else f"0x{tx_hash}"
+
+
+def receipt_to_dict(receipt):
+    """Convert a web3 receipt into the status shape served by /tx/<hash>"""
+    return {
+        "transaction_hash": _normalize_hash(receipt.transactionHash),
+        "status": STATUS_MINED if receipt.status == 1 else STATUS_FAILED,
+        "block_number": receipt.blockNumber,
+        "gas_used": receipt.gasUsed,
+    }
@@ -0,0 +1,182 @@
+"""
+Per-block memoization of contract view calls
+Requests that arrive within the same block share one eth_call per view
+"""
+
+import sys
+import threading
+import time
+from collections import OrderedDict
+
+from shared_state import SharedGeneration
+
+
+def approximate_size(value):
+    """Rough in-memory size of a decoded ABI value, in bytes"""
+    if isinstance(value, (list, tuple)):
+        return sys.getsizeof(value) + sum(approximate_size(item) for item in value)
+    return sys.getsizeof(value)
+
+
+class ViewCallCache:
+    """LRU cache of view call results keyed by (function, args, block number)
+
+    The block number is polled at most every block_poll seconds. When it
+    advances every entry is dropped, since any view may have changed.
+    invalidate() does the same immediately; it is called when this server
+    sends a write and again when the write's receipt arrives. A SharedCounter
+    passed as shared_generation extends invalidation to every process
+    sharing it.
+
+    Entries are bounded by count and by approximate size, evicting the least
+    recently used first. Cached results are shared between callers and must
+    not be mutated. max_entries=0 disables caching.
+    """
+
+    def __init__(self, w3, max_entries=1024, max_bytes=64 * 1024 * 1024, block_poll=1.0,
+                 shared_generation=None, on_lookup=None):
+        self.w3 = w3
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.block_poll = block_poll
+        self.on_lookup = on_lookup
+        self._entries = OrderedDict()
+        self._bytes = 0
+        self._block = None
+        self._polled_at = 0.0
+        self._generation = 0
+        self._shared = SharedGeneration(shared_generation)
+        self._lock = threading.Lock()
+        self._poll_lock = threading.Lock()
+        self._async_polling = False
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def call(self, fn_name, args, loader):
+        """Return the result of fn_name(*args), calling loader() on a miss"""
+        if not self.max_entries:
+            return loader()
+        key = (fn_name, tuple(args), self._current_block())
+        found, value, generation = self._lookup(key)
+        if found:
+            return value
+
+        value = loader()
+        self._store(key, value, generation)
+        return value
+
+    async def async_call(self, fn_name, args, loader):
+        """call() for a coroutine loader and an AsyncWeb3 instance"""
+        if not self.max_entries:
+            return await loader()
+        key = (fn_name, tuple(args), await self._async_current_block())
+        found, value, generation = self._lookup(key)
+        if found:
+            return value
+
+        value = await loader()
+        self._store(key, value, generation)
+        return value
+
+    def _lookup(self, key):
+        """Return (found, value, generation) for key and count the lookup"""
+        with self._lock:
+            if self._shared.changed():
+                self._clear()
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._entries.move_to_end(key)
+                self.hits += 1
+            else:
+                self.misses += 1
+            generation = self._generation
+        if self.on_lookup:
+            self.on_lookup("hit" if entry is not None else "miss")
+        if entry is not None:
+            return True, entry[0], generation
+        return False, None, generation
+
+    def _current_block(self):
+        """The latest known block number, polling the node when it is due
+
+        Only one thread polls at a time; the others use the block from the
+        previous poll instead of waiting.
+        """
+        if self._block is not None and time.monotonic() - self._polled_at < self.block_poll:
+            return self._block
+        if self._poll_lock.acquire(blocking=self._block is None):
+            try:
+                self.note_block(self.w3.eth.block_number)
+                self._polled_at = time.monotonic()
+            finally:
+                self._poll_lock.release()
+        return self._block
+
+    async def _async_current_block(self):
+        """_current_block() for an AsyncWeb3 instance
+
+        Tasks that find a poll in progress use the previous block, as
+        threads do, unless no block is known yet.
+        """
+        if self._block is not None and (
+            time.monotonic() - self._polled_at < self.block_poll or self._async_polling
+        ):
+            return self._block
+        self._async_polling = True
+        try:
+            self.note_block(await self.w3.eth.block_number)
+            self._polled_at = time.monotonic()
+        finally:
+            self._async_polling = False
+        return self._block
+
+    def _store(self, key, value, generation):
+        size = approximate_size(value)
+        if size > self.max_bytes:
+            return
+        with self._lock:
+            if self._shared.changed():
+                self._clear()
+            # Skip results that an invalidation or a newer block overtook
+            if generation != self._generation or key[2] != self._block:
+                return
+            previous = self._entries.pop(key, None)
+            if previous is not None:
+                self._bytes -= previous[1]
+            self._entries[key] = (value, size)
+            self._bytes += size
+            while len(self._entries) > self.max_entries or self._bytes > self.max_bytes:
+                _, (_, evicted_size) = self._entries.popitem(last=False)
+                self._bytes -= evicted_size
+                self.evictions += 1
+
+    def _clear(self):
+        self._entries.clear()
+        self._bytes = 0
+        self._generation += 1
+
+    def note_block(self, block_number):
+        """Drop every entry once a newer block has been seen"""
+        with self._lock:
+            if self._block is None or block_number > self._block:
+                if self._block is not None:
+                    self._clear()
+                self._block = block_number
+
+    def invalidate(self):
+        """Drop every entry and discard loads that are in flight"""
+        with self._lock:
+            self._clear()
+            self._shared.bump()
+
+    def status(self):
+        with self._lock:
+            return {
+                "entries": len(self._entries),
+                "bytes": self._bytes,
+                "block": self._block,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+            }